@@ -1,32 +1,63 @@
 import os
+import re
 import logging
 import json
-import csv
-import io
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file
+import time
+import math
+import hashlib
+import mimetypes
+import unicodedata
+from datetime import datetime
+from urllib.parse import quote
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response, stream_with_context, send_from_directory, make_response, g, before_render_template, template_rendered
+from flask.sessions import SecureCookieSessionInterface
+from werkzeug.security import safe_join
 from dotenv import load_dotenv
-from utils.together_ai import generate_seo_content, create_sample_seo_data
-from utils.google_sheets import save_to_google_sheets
+from utils.together_ai import generate_seo_content, create_sample_seo_data, simplify_seo_data
+from utils.google_sheets import save_to_google_sheets, save_batch_to_google_sheets, SheetsExportError
+from utils.batch import BatchStore, parse_batch_csv, run_batch, EXPORT_HEADER, default_db_path as default_batch_db_path
+from utils.seo_cache import get_seo_cache
+from utils.json_stream import SEO_SECTIONS
+from utils.llm_providers import get_model_router
+from utils.token_budget import DEFAULT_BUDGET, BUDGET_LIMITS, normalize_budget
+from utils.compression import Compress, strip_encoding_suffix
+from utils.assets import VENDOR_ASSETS, load_manifest
+from utils.export import EXPORT_FORMATS, RESULT_HEADER, result_rows, stream_export
+from utils.result_store import ResultStore, default_db_path as default_result_db_path
+from utils.job_queue import JobQueue, RetryJob, STATUS_DONE, STATUS_FAILED, default_db_path
+from utils.metrics import get_metrics
+from utils.structured_logging import configure_logging
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
-
-# Load environment variables
+# Load environment variables first, .env may hold the logging settings
 load_dotenv()
 
+# Configure logging: level, format and sampling come from LOG_* environment variables
+configure_logging()
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """The default cookie session, with the time spent writing it recorded as a stage."""
+    
+    def save_session(self, app, session, response):
+        started = time.perf_counter()
+        super().save_session(app, session, response)
+        elapsed = time.perf_counter() - started
+        get_metrics().record_stage('session_write', elapsed)
+        # The session is written after the after_request hooks have set Server-Timing
+        if 'Server-Timing' in response.headers:
+            response.headers['Server-Timing'] += f", session_write;dur={elapsed * 1000:.1f}"
+
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "default-secret-key-for-development")
+app.session_interface = TimedSessionInterface()
 
 # Make sure the app can run correctly in different environments
 is_production = os.environ.get('RENDER', False)
 
+# The session cookie only carries job and result IDs, the results themselves
+# live in the server-side result store
 if is_production:
     # In production (e.g., Render), prioritize stability over everything
-    app.config['SESSION_TYPE'] = 'filesystem'
-    app.config['SESSION_USE_SIGNER'] = True
-    app.config['SESSION_FILE_DIR'] = '/tmp/flask_session'
-    os.makedirs(app.config['SESSION_FILE_DIR'], exist_ok=True)
     app.config['PREFERRED_URL_SCHEME'] = 'https'
     
     # Set a very long session lifetime to prevent unexpected logouts
@@ -34,165 +65,404 @@ if is_production:
     app.config['SESSION_PERMANENT'] = True
 else:
     # Local development
-    app.config['SESSION_TYPE'] = 'filesystem'
     app.config['SESSION_PERMANENT'] = False
-    app.config['SESSION_FILE_DIR'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'flask_session')
-    os.makedirs(app.config['SESSION_FILE_DIR'], exist_ok=True)
+
+# Generated results, kept server-side and looked up by result ID
+app.config['RESULT_STORE_DB'] = default_result_db_path()
+
+# Job queue database shared by every worker process
+app.config['JOB_QUEUE_DB'] = default_db_path()
+
+# Batch uploads: row store, size limit and default fan-out
+app.config['BATCH_DB'] = default_batch_db_path()
+app.config['BATCH_MAX_ROWS'] = int(os.environ.get('BATCH_MAX_ROWS', 1000))
+app.config['BATCH_CONCURRENCY'] = int(os.environ.get('BATCH_CONCURRENCY', 4))
+app.config['BATCH_RATE_PER_SEC'] = float(os.environ.get('BATCH_RATE_PER_SEC', 1.0))
+
+# Google Sheets exports are retried in the background with exponential backoff
+app.config['SHEETS_EXPORT_MAX_ATTEMPTS'] = int(os.environ.get('SHEETS_EXPORT_MAX_ATTEMPTS', 5))
+app.config['SHEETS_EXPORT_RETRY_DELAY'] = float(os.environ.get('SHEETS_EXPORT_RETRY_DELAY', 15))
+
+# Content budget offered on the form: items per section and blog length
+app.config['DEFAULT_BUDGET'] = DEFAULT_BUDGET
+app.config['BUDGET_LIMITS'] = BUDGET_LIMITS
+
+# Server-sent event streams check for new items this often. Each stream holds a
+# worker, so it ends after a few seconds and the browser reconnects after
+# SSE_RETRY_MS, resuming from the last event it saw
+SSE_POLL_INTERVAL = 0.5
+SSE_MAX_DURATION = float(os.environ.get('SSE_MAX_DURATION', 5))
+SSE_RETRY_MS = 1000
+
+# Stream completions so generated items can be pushed to the browser as they arrive
+app.config['STREAM_GENERATION'] = os.environ.get('TOGETHER_STREAM', '1') != '0'
+
+# Items per section shown on the results page and returned per page by the results API
+app.config['RESULTS_PAGE_SIZE'] = int(os.environ.get('RESULTS_PAGE_SIZE', 10))
+RESULTS_MAX_PAGE_SIZE = 100
+
+# Sections of a stored result: the generated ones and the on-page audit findings
+RESULT_SECTIONS = SEO_SECTIONS + ('audit',)
+
+# Fingerprinted static assets built by python -m utils.assets, served with
+# far-future caching; without a build the plain files (or CDNs) are used
+app.config['ASSET_MANIFEST'] = load_manifest(app.static_folder)
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# Changes whenever the templates do, so pages rendered by older ones are not revalidated as current
+RENDER_VERSION = hashlib.sha1(repr(sorted(
+    (name, os.path.getmtime(os.path.join(app.root_path, 'templates', name)))
+    for name in os.listdir(os.path.join(app.root_path, 'templates'))
+)).encode('utf-8')).hexdigest()[:12]
+
+# Report the time spent in each stage of a request in a Server-Timing header
+app.config['METRICS_TIMING_HEADERS'] = os.environ.get('METRICS_TIMING_HEADERS', '0') != '0'
+
+@app.before_request
+def start_request_timing():
+    """Start timing the request and collecting its stage timings."""
+    g.request_started = time.perf_counter()
+    get_metrics().start_request()
+
+@app.after_request
+def record_request_timing(response):
+    """Record the request duration and add the Server-Timing header if enabled."""
+    metrics = get_metrics()
+    timings = metrics.finish_request()
+    if 'request_started' not in g:
+        return response
+    
+    elapsed = time.perf_counter() - g.request_started
+    metrics.observe('seo_http_request_duration_seconds', elapsed, endpoint=request.endpoint or 'unknown')
+    if app.config['METRICS_TIMING_HEADERS']:
+        stages = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings]
+        response.headers['Server-Timing'] = ", ".join(stages + [f"total;dur={elapsed * 1000:.1f}"])
+    return response
+
+def start_template_timing(sender, template, context, **extra):
+    g.template_started = time.perf_counter()
+
+def record_template_timing(sender, template, context, **extra):
+    if 'template_started' in g:
+        get_metrics().record_stage('template_render', time.perf_counter() - g.pop('template_started'))
+
+before_render_template.connect(start_template_timing, app)
+template_rendered.connect(record_template_timing, app)
+
+@app.template_global()
+def asset_url(path):
+    """
+    Get the URL of a stylesheet, script or other file under static/.
+    
+    Returns the fingerprinted build of the file if there is one, else the
+    file itself, else (for third-party files never downloaded) its CDN URL.
+    """
+    built = app.config['ASSET_MANIFEST'].get(path)
+    if built:
+        return url_for('asset', filename=built)
+    if path in VENDOR_ASSETS and not os.path.exists(os.path.join(app.static_folder, path)):
+        return VENDOR_ASSETS[path]
+    return url_for('static', filename=path)
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    """Serve a fingerprinted asset, precompressed if the client accepts it, cached for a year."""
+    dist_dir = os.path.join(app.static_folder, 'dist')
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    
+    encoding = None
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        path = safe_join(dist_dir, filename + suffix)
+        if request.accept_encodings[candidate] and path and os.path.isfile(path):
+            encoding = candidate
+            filename += suffix
+            break
+    
+    response = send_from_directory(dist_dir, filename, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    # The name changes with the content, so a cached copy never goes stale
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    return response
 
 @app.route('/')
 def index():
     """Render the home page with the SEO form."""
     return render_template('index.html')
 
+def run_generation_job(payload, publish=None):
+    """
+    Generate SEO content for a queued job and queue its Google Sheets export.
+    
+    Runs on a job queue worker thread, outside of any request context.
+    
+    Args:
+        payload (dict): The job payload with website_url, keyword and the content budget
+        publish (callable, optional): Called with (event, data) for each item
+            as soon as it is generated, for the live results stream
+        
+    Returns:
+        dict: The ID of the stored result and any warnings for the user
+    """
+    website_url = payload['website_url']
+    keyword = payload['keyword']
+    warnings = []
+    
+    def publish_item(section, item):
+        publish('item', {'section': section, 'item': simplify_seo_data({section: [item]}, keyword)[section][0]})
+    
+    on_item = publish_item if publish is not None and app.config['STREAM_GENERATION'] else None
+    
+    # Generate SEO content using Together AI
+    logging.debug("Calling generate_seo_content")
+    result = generate_seo_content(
+        website_url, keyword, on_item=on_item, budget=payload.get('budget'), fresh=payload.get('fresh', False)
+    )
+    logging.debug("generate_seo_content returned type: %s", type(result))
+    
+    # Check if we got an error message instead of data
+    if isinstance(result, tuple) and len(result) == 2:
+        error_type, error_msg = result
+        logging.error(f"Error from Together AI: {error_type} - {error_msg}")
+        raise RuntimeError(f"{error_type}: {error_msg}")
+    
+    # If we got valid SEO data
+    seo_data = result
+    
+    # Log seo_data keys and structure for debugging
+    if isinstance(seo_data, dict) and logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug("Items per section: %s", {key: len(value) for key, value in seo_data.items() if isinstance(value, list)})
+    
+    try:
+        simplified_data = simplify_seo_data(seo_data, keyword)
+    except Exception as simplify_error:
+        logging.error(f"Error simplifying SEO data: {str(simplify_error)}")
+        import traceback
+        logging.error(traceback.format_exc())
+        
+        # As a final fallback, show a sample dataset
+        get_metrics().inc('seo_sample_fallbacks_total', reason='simplify_error')
+        simplified_data = create_sample_seo_data(website_url, keyword)
+        warnings.append("We encountered an issue processing your request, but we've generated sample content for you.")
+    
+    # The on-page audit comes from the generation's own crawl, or from the cache with its content
+    simplified_data['audit'] = seo_data.get('audit', []) if isinstance(seo_data, dict) else []
+    
+    # Export to Google Sheets in the background so the results can be shown right away
+    export_job_id = job_queue.enqueue({
+        'type': 'export',
+        'website_url': website_url,
+        'keyword': keyword,
+        'seo_data': simplified_data
+    })
+    
+    with get_metrics().time('result_store_write'):
+        result_id = result_store.save(website_url, keyword, simplified_data, export_job_id=export_job_id)
+    return {'result_id': result_id, 'warnings': warnings}
+
+def run_export_job(payload, publish=None):
+    """
+    Save generated SEO content to Google Sheets for a queued export job.
+    
+    Transient failures are retried with exponential backoff by the job queue;
+    configuration problems (e.g. missing credentials) are reported, not retried.
+    The spreadsheet created by the first attempt is kept in the payload, so
+    retries finish it instead of creating another one.
+    
+    Args:
+        payload (dict): The job payload with website_url, keyword and seo_data
+        publish (callable, optional): Unused, exports have no progress events
+        
+    Returns:
+        dict: The sheet URL, or the error shown to the user instead
+    """
+    def remember_spreadsheet(spreadsheet_id):
+        payload['spreadsheet_id'] = spreadsheet_id
+    
+    logging.debug("Calling save_to_google_sheets")
+    try:
+        sheet_result = save_to_google_sheets(
+            payload['website_url'], payload['keyword'], payload['seo_data'],
+            spreadsheet_id=payload.get('spreadsheet_id'), on_create=remember_spreadsheet
+        )
+    except SheetsExportError as e:
+        raise RetryJob(
+            f"Google Sheets export failed: {str(e)}",
+            delay=app.config['SHEETS_EXPORT_RETRY_DELAY'],
+            max_attempts=app.config['SHEETS_EXPORT_MAX_ATTEMPTS']
+        )
+    
+    # Check if we got an error from Google Sheets
+    if isinstance(sheet_result, tuple) and len(sheet_result) == 2:
+        error_type, error_msg = sheet_result
+        logging.warning(f"Google Sheets error: {error_type} - {error_msg}")
+        return {'sheet_url': None, 'error': f"Google Sheets: {error_msg}"}
+    
+    return {'sheet_url': sheet_result, 'error': None}
+
+def run_batch_job(payload, publish=None):
+    """
+    Generate SEO content for every unfinished row of an uploaded batch.
+    
+    A batch job that was interrupted is picked up again by the job queue and
+    continues with the rows that never finished.
+    
+    Args:
+        payload (dict): The job payload with batch_id, concurrency and rate
+        publish (callable, optional): Called with (event, data) after each row
+        
+    Returns:
+        dict: The final row counts and the sheet URL
+    """
+    batch_id = payload['batch_id']
+    
+    def on_row(row, status, result, error):
+        if publish is not None:
+            publish('row', {'row_index': row['row_index'], 'status': status, 'error': error})
+    
+    batch = run_batch(batch_store, batch_id, concurrency=payload['concurrency'], rate=payload['rate'], on_row=on_row)
+    
+    # Export everything that finished to one combined sheet
+    sheet_url = None
+    warnings = []
+    if batch['done']:
+        sheet_result = save_batch_to_google_sheets(batch['name'], batch_store.iter_export_rows(batch_id))
+        if isinstance(sheet_result, tuple):
+            logging.warning(f"Google Sheets error for batch {batch_id}: {sheet_result[1]}")
+            warnings.append(f"Google Sheets: {sheet_result[1]}")
+        elif sheet_result:
+            sheet_url = sheet_result
+            batch_store.set_sheet_url(batch_id, sheet_url)
+    
+    return {'batch_id': batch_id, 'done': batch['done'], 'failed': batch['failed'], 'sheet_url': sheet_url, 'warnings': warnings}
+
+# Handlers for each kind of queued job
+JOB_HANDLERS = {
+    'generate': run_generation_job,
+    'batch': run_batch_job,
+    'export': run_export_job
+}
+
+def run_job(payload, publish=None):
+    """Dispatch a queued job to the handler for its type."""
+    return JOB_HANDLERS[payload.get('type', 'generate')](payload, publish)
+
+# Compress responses with brotli or gzip; set COMPRESS_MIN_SIZE and COMPRESS_LEVEL to tune
+Compress(app)
+
+batch_store = BatchStore(app.config['BATCH_DB'])
+result_store = ResultStore(app.config['RESULT_STORE_DB'])
+
+# Background generation queue shared by all gunicorn workers through one SQLite file
+job_queue = JobQueue(
+    app.config['JOB_QUEUE_DB'],
+    run_job,
+    num_workers=int(os.environ.get('JOB_WORKERS', 2))
+)
+
+def wants_json():
+    """Check whether the client asked for a JSON response instead of HTML."""
+    return request.is_json or request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+def job_status(job):
+    """Build the public JSON view of a job."""
+    status = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at'],
+        'results_url': url_for('results', job_id=job['id'])
+    }
+    
+    # Export jobs report their sheet, or why there is none
+    if job['payload'].get('type') == 'export':
+        result = job['result'] or {}
+        status['sheet_url'] = result.get('sheet_url')
+        if job['status'] == STATUS_DONE:
+            status['error'] = result.get('error')
+    return status
+
+def load_result():
+    """
+    Load the stored result for the current request.
+    
+    The result is found through the job_id of a generation job, an explicit
+    result_id, or the result ID kept in the session, in that order.
+    
+    Returns:
+        tuple: (result, response) where response is a redirect or pending page to
+               return instead when the result isn't available or not finished yet
+    """
+    job_id = request.args.get('job_id')
+    result_id = request.args.get('result_id')
+    if not job_id and not result_id:
+        result_id = session.get('result_id')
+        if not result_id:
+            job_id = session.get('job_id')
+    
+    if job_id:
+        job = job_queue.get_job(job_id)
+        
+        if job is None:
+            flash('No SEO data available. Please submit the form first.', 'warning')
+            return None, redirect(url_for('index'))
+        
+        if job['status'] == STATUS_FAILED:
+            flash(job['error'] or 'An error occurred while generating SEO content.', 'danger')
+            return None, redirect(url_for('index'))
+        
+        if job['status'] != STATUS_DONE:
+            job_queue.start()
+            return None, render_template('job_status.html', job=job_status(job), website_url=job['payload']['website_url'], keyword=job['payload']['keyword'])
+        
+        result_id = job['result']['result_id']
+        for warning in job['result'].get('warnings', []):
+            flash(warning, 'warning')
+    
+    result = result_store.get(result_id) if result_id else None
+    if result is None:
+        flash('No SEO data available. Please submit the form first.', 'warning')
+        return None, redirect(url_for('index'))
+    
+    # Later visits to /results and /download_csv find the result by its ID alone
+    session['result_id'] = result_id
+    session.pop('job_id', None)
+    return result, None
+
 @app.route('/generate', methods=['POST'])
 def generate():
-    """Process the form submission and generate SEO content."""
+    """Validate the form submission and queue a job to generate SEO content."""
     try:
         # Get form data
-        website_url = request.form.get('website_url')
-        keyword = request.form.get('keyword')
+        data = request.get_json(silent=True) if request.is_json else request.form
+        website_url = data.get('website_url')
+        keyword = data.get('keyword')
         
-        logging.debug(f"Form submission: website_url={website_url}, keyword={keyword}")
+        logging.debug("Form submission: website_url=%s, keyword=%s", website_url, keyword)
         
         if not website_url or not keyword:
+            if wants_json():
+                return jsonify({'error': 'Please provide both website URL and target keyword'}), 400
             flash('Please provide both website URL and target keyword', 'danger')
             return redirect(url_for('index'))
         
-        # Generate SEO content using Together AI
-        logging.debug("Calling generate_seo_content")
-        result = generate_seo_content(website_url, keyword)
-        logging.debug(f"generate_seo_content returned type: {type(result)}")
-        
-        # Check if we got an error message instead of data
-        if isinstance(result, tuple) and len(result) == 2:
-            error_type, error_msg = result
-            logging.error(f"Error from Together AI: {error_type} - {error_msg}")
-            flash(f"{error_type}: {error_msg}", 'danger')
-            return redirect(url_for('index'))
-        
-        # If we got valid SEO data
-        seo_data = result
-        
-        # Log seo_data keys and structure for debugging
-        logging.debug(f"SEO data keys: {seo_data.keys() if isinstance(seo_data, dict) else 'Not a dictionary'}")
-        for key in seo_data.keys() if isinstance(seo_data, dict) else []:
-            logging.debug(f"Items in {key}: {len(seo_data.get(key, []))}")
+        job_id = job_queue.enqueue({
+            'website_url': website_url,
+            'keyword': keyword,
+            'budget': normalize_budget(data),
+            # Skip the cache, including near-duplicate matches of earlier submissions
+            'fresh': str(data.get('fresh', '')).lower() in ('1', 'true', 'on')
+        })
+        session.permanent = app.config['SESSION_PERMANENT']
+        session['job_id'] = job_id
+        session.pop('result_id', None)
+        logging.debug("Queued generation job %s", job_id)
         
-        try:
-            # Try to save to Google Sheets
-            logging.debug("Calling save_to_google_sheets")
-            sheet_result = save_to_google_sheets(website_url, keyword, seo_data)
-            
-            # Check if we got an error from Google Sheets
-            if isinstance(sheet_result, tuple) and len(sheet_result) == 2:
-                # We still want to proceed, but inform the user about the sheets error
-                sheet_url = None
-                error_type, error_msg = sheet_result
-                logging.warning(f"Google Sheets error: {error_type} - {error_msg}")
-                flash(f"Google Sheets: {error_msg}", 'warning')
-            else:
-                sheet_url = sheet_result
-        except Exception as sheets_error:
-            logging.error(f"Error with Google Sheets: {str(sheets_error)}")
-            sheet_url = None
-            flash(f"Google Sheets error: {str(sheets_error)}", 'warning')
-        
-        # Store data in session for display and download
-        try:
-            # Make sure seo_data is JSON serializable by creating a simplified version
-            simplified_data = {"blogs": [], "backlinks": [], "bookmarks": []}
-            
-            # Process blogs
-            if isinstance(seo_data, dict) and "blogs" in seo_data and isinstance(seo_data["blogs"], list):
-                for blog in seo_data["blogs"]:
-                    if not isinstance(blog, dict):
-                        continue
-                        
-                    blog_item = {}
-                    
-                    # Get title
-                    if "title" in blog:
-                        blog_item["title"] = str(blog["title"])
-                    else:
-                        blog_item["title"] = f"Blog Post {len(simplified_data['blogs']) + 1}"
-                    
-                    # Get content from various possible fields
-                    content = None
-                    for field in ["content", "post", "blog_post"]:
-                        if field in blog and blog[field]:
-                            content = str(blog[field])
-                            break
-                    
-                    blog_item["content"] = content or "No content available for this blog post."
-                    simplified_data["blogs"].append(blog_item)
-            
-            # Process backlinks
-            if isinstance(seo_data, dict) and "backlinks" in seo_data and isinstance(seo_data["backlinks"], list):
-                for backlink in seo_data["backlinks"]:
-                    if not isinstance(backlink, dict):
-                        continue
-                        
-                    backlink_item = {}
-                    
-                    # Map common field names
-                    backlink_item["platform"] = str(backlink.get("platform", backlink.get("website", "Unknown Platform")))
-                    backlink_item["keyword"] = str(backlink.get("keyword", ""))
-                    backlink_item["strategy"] = str(backlink.get("strategy", ""))
-                    
-                    simplified_data["backlinks"].append(backlink_item)
-            
-            # Process bookmarks
-            if isinstance(seo_data, dict) and "bookmarks" in seo_data and isinstance(seo_data["bookmarks"], list):
-                for bookmark in seo_data["bookmarks"]:
-                    if not isinstance(bookmark, dict):
-                        continue
-                        
-                    bookmark_item = {}
-                    
-                    # Map common field names
-                    bookmark_item["title"] = str(bookmark.get("title", ""))
-                    bookmark_item["description"] = str(bookmark.get("description", ""))
-                    bookmark_item["platform"] = str(bookmark.get("platform", ""))
-                    
-                    simplified_data["bookmarks"].append(bookmark_item)
-            
-            # If we have empty sections, add at least one sample item
-            if not simplified_data["blogs"]:
-                simplified_data["blogs"] = [{"title": "Sample Blog Title", "content": "Sample blog content would appear here."}]
-                
-            if not simplified_data["backlinks"]:
-                simplified_data["backlinks"] = [{"platform": "Sample Platform", "keyword": keyword, "strategy": "Sample strategy for backlinks."}]
-                
-            if not simplified_data["bookmarks"]:
-                simplified_data["bookmarks"] = [{"title": "Sample Bookmark", "description": "Sample bookmark description.", "platform": "Sample Platform"}]
-            
-            # Store the simplified data in the session
-            session['seo_data'] = simplified_data
-            session['website_url'] = website_url
-            session['keyword'] = keyword
-            session['sheet_url'] = sheet_url
-            
-            logging.debug("Data stored in session successfully")
-            
-            # Redirect to results page
-            return redirect(url_for('results'))
-        except Exception as session_error:
-            logging.error(f"Error storing data in session: {str(session_error)}")
-            import traceback
-            logging.error(traceback.format_exc())
-            
-            # As a final fallback, create a new sample dataset and show that
-            try:
-                sample_data = create_sample_seo_data(website_url, keyword)
-                session['seo_data'] = sample_data
-                session['website_url'] = website_url
-                session['keyword'] = keyword
-                session['sheet_url'] = None
-                flash("We encountered an issue processing your request, but we've generated sample content for you.", 'warning')
-                return redirect(url_for('results'))
-            except:
-                flash(f"Error storing results: {str(session_error)}", 'danger')
-                return redirect(url_for('index'))
+        if wants_json():
+            return jsonify(job_status(job_queue.get_job(job_id))), 202
+        return redirect(url_for('results', job_id=job_id))
         
     except Exception as e:
         logging.error(f"Error in generate function: {str(e)}")
@@ -201,90 +471,387 @@ def generate():
         flash(f'An error occurred: {str(e)}', 'danger')
         return redirect(url_for('index'))
 
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Return the status of a generation job as JSON."""
+    job = job_queue.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    
+    if job['status'] not in (STATUS_DONE, STATUS_FAILED):
+        job_queue.start()
+    return jsonify(job_status(job))
+
+@app.route('/jobs/<job_id>/stream')
+def stream_job(job_id):
+    """Push generated items and the final job status to the browser as server-sent events."""
+    if job_queue.get_job(job_id) is None:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    job_queue.start()
+    
+    # Resume after the last event the browser saw if it reconnects
+    last_event_id = request.headers.get('Last-Event-ID', '0')
+    after_id = int(last_event_id) if last_event_id.isdigit() else 0
+    
+    def event_stream(after_id):
+        deadline = time.monotonic() + SSE_MAX_DURATION
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while time.monotonic() < deadline:
+            # Read the status before the events so nothing published in between is missed
+            job = job_queue.get_job(job_id)
+            for event in job_queue.get_events(job_id, after_id):
+                after_id = event['id']
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+            
+            if job['status'] in (STATUS_DONE, STATUS_FAILED):
+                yield f"event: done\ndata: {json.dumps(job_status(job))}\n\n"
+                return
+            
+            # Comment line keeps proxies from closing an idle connection
+            yield ": keep-alive\n\n"
+            time.sleep(SSE_POLL_INTERVAL)
+    
+    response = Response(stream_with_context(event_stream(after_id)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/batch', methods=['GET', 'POST'])
+def batch_upload():
+    """Upload a CSV of website URL / keyword pairs and queue them as one batch."""
+    if request.method == 'GET':
+        return render_template('batch.html', batch=None)
+    
+    upload = request.files.get('csv_file')
+    if upload is None or not upload.filename:
+        flash('Please choose a CSV file to upload', 'danger')
+        return redirect(url_for('batch_upload'))
+    
+    try:
+        text = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        flash('The CSV file must be UTF-8 encoded', 'danger')
+        return redirect(url_for('batch_upload'))
+    
+    pairs = parse_batch_csv(text, max_rows=app.config['BATCH_MAX_ROWS'])
+    if isinstance(pairs, tuple):
+        flash(pairs[1], 'danger')
+        return redirect(url_for('batch_upload'))
+    
+    # Clamp the requested fan-out to the configured limits
+    concurrency = request.form.get('concurrency', type=int) or app.config['BATCH_CONCURRENCY']
+    concurrency = max(1, min(concurrency, app.config['BATCH_CONCURRENCY']))
+    
+    batch_id = batch_store.create_batch(upload.filename, pairs)
+    job_id = job_queue.enqueue({
+        'type': 'batch',
+        'batch_id': batch_id,
+        'concurrency': concurrency,
+        'rate': app.config['BATCH_RATE_PER_SEC']
+    })
+    logging.debug("Queued batch %s with %d rows as job %s", batch_id, len(pairs), job_id)
+    
+    if wants_json():
+        return jsonify({'batch_id': batch_id, 'job_id': job_id, 'rows': len(pairs)}), 202
+    return redirect(url_for('batch_progress', batch_id=batch_id))
+
+@app.route('/batch/<batch_id>')
+def batch_progress(batch_id):
+    """Show the per-row progress of a batch."""
+    batch = batch_store.get_batch(batch_id)
+    if batch is None:
+        flash('Unknown batch.', 'warning')
+        return redirect(url_for('batch_upload'))
+    
+    job_queue.start()
+    if wants_json():
+        return jsonify(batch)
+    return render_template('batch.html', batch=batch, rows=batch_store.get_rows(batch_id))
+
+def content_disposition(filename):
+    """
+    Build the Content-Disposition header of a download.
+    
+    Keywords end up in download names, so the name is sent twice: as a quoted
+    ASCII filename for old clients and as an RFC 5987 filename* carrying the
+    full UTF-8 name. Headers are written as latin-1, so the raw name could
+    not be sent as it is.
+    
+    Args:
+        filename (str): Download name with extension
+        
+    Returns:
+        str: The header value
+    """
+    # Separators, quotes and control characters have no place in a file name
+    filename = re.sub(r'[\x00-\x1f\x7f"\\/;:*?<>|]', '_', filename).strip() or 'download'
+    ascii_name = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+def export_response(header, rows, filename):
+    """
+    Stream export rows as a download in the format named by the format query parameter.
+    
+    Args:
+        header (list): Column names
+        rows (iterable): Export rows, read as the response is sent
+        filename (str): Download name without extension
+        
+    Returns:
+        Response or None: The streaming download, or None after flashing why
+                          the requested format is unavailable
+    """
+    export_format = request.args.get('format', 'csv').lower()
+    chunks = stream_export(export_format, header, rows)
+    if isinstance(chunks, tuple):
+        flash(chunks[1], 'danger')
+        return None
+    
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': content_disposition(f'{filename}.{extension}')}
+    )
+
+@app.route('/batch/<batch_id>/download')
+def batch_download(batch_id):
+    """Stream the combined CSV export of every finished row of a batch."""
+    batch = batch_store.get_batch(batch_id)
+    if batch is None:
+        flash('Unknown batch.', 'warning')
+        return redirect(url_for('batch_upload'))
+    
+    def build():
+        response = export_response(EXPORT_HEADER, batch_store.iter_export_rows(batch_id), f"seo_batch_{batch_id}")
+        if response is None:
+            return redirect(url_for('batch_progress', batch_id=batch_id))
+        return response
+    
+    # The export changes whenever a row finishes or is retried
+    export_format = request.args.get('format', 'csv').lower()
+    etag = validator(batch_id, batch['updated_at'], batch['done'], batch['failed'], export_format)
+    return conditional(etag, batch['updated_at'], build)
+
+@app.route('/cache/stats')
+def cache_stats():
+    """Return the hit/miss counters of the generation cache as JSON."""
+    cache = get_seo_cache()
+    if cache is None:
+        return jsonify({'error': 'Cache unavailable'}), 503
+    return jsonify(cache.stats())
+
+@app.route('/models/stats')
+def model_stats():
+    """Return the rolling latency, failure and cost statistics of the configured models as JSON."""
+    router = get_model_router()
+    if router is None:
+        return jsonify({'error': 'No model configured'}), 503
+    return jsonify(router.stats())
+
+@app.route('/metrics')
+def metrics():
+    """Expose the latency histograms and counters of every worker in the Prometheus text format."""
+    gauges = {'seo_jobs': {(('status', status),): count for status, count in job_queue.counts().items()}}
+    return Response(get_metrics().render(gauges), mimetype='text/plain; version=0.0.4')
+
+def blog_content(blog):
+    """Get the body of a blog post, whichever field the model put it in."""
+    return blog.get('content') or blog.get('post') or blog.get('blog_post') or ''
+
+def result_item(result_id, section, index, item):
+    """
+    Build the JSON view of one item of a result.
+    
+    Blog posts only carry their title and length; the body is fetched from
+    its content_url when the post is opened.
+    """
+    if section == 'blogs':
+        return {
+            'index': index,
+            'title': item.get('title', ''),
+            'words': len(blog_content(item).split()),
+            'content_url': url_for('api_result_blog', result_id=result_id, index=index)
+        }
+    return dict(item, index=index)
+
+def result_page(result, section, page, per_page):
+    """
+    Get one page of a section of a result.
+    
+    Args:
+        result (dict): The stored result
+        section (str): blogs, backlinks, bookmarks or audit
+        page (int): 1-based page number, clamped to the pages there are
+        per_page (int): Items per page
+        
+    Returns:
+        dict: The items of the page and the paging information
+    """
+    items = result['seo_data'].get(section, [])
+    pages = max(1, math.ceil(len(items) / per_page))
+    page = min(max(page, 1), pages)
+    start = (page - 1) * per_page
+    return {
+        'section': section,
+        'page': page,
+        'per_page': per_page,
+        'total': len(items),
+        'pages': pages,
+        'items': [result_item(result['id'], section, start + i, item) for i, item in enumerate(items[start:start + per_page])],
+        'next_url': url_for('api_result_items', result_id=result['id'], section=section, page=page + 1, per_page=per_page) if page < pages else None
+    }
+
+def validator(*parts):
+    """Build an ETag from the parts that identify a response."""
+    return hashlib.sha1(repr((RENDER_VERSION,) + parts).encode('utf-8')).hexdigest()
+
+def conditional(etag, last_modified, build):
+    """
+    Answer a request for a response identified by an ETag and a modification time.
+    
+    A client whose copy is current, by If-None-Match or else If-Modified-Since,
+    gets a 304 without build ever being called. Otherwise the response from
+    build gets the validators and is marked for revalidation on every use.
+    
+    Args:
+        etag (str): Changes whenever the response would
+        last_modified (float): When what the response shows last changed
+        build (callable): Returns the full response
+        
+    Returns:
+        Response: The 304 or the built response
+    """
+    # A compressed copy carries the ETag with its encoding appended, and a 304 repeats the client's
+    current_etag = None
+    if request.if_none_match:
+        current_etag = next((tag for tag in request.if_none_match.as_set(include_weak=True) if strip_encoding_suffix(tag) == etag), None)
+        current = current_etag is not None or request.if_none_match.star_tag
+    else:
+        current = bool(request.if_modified_since) and int(last_modified) <= request.if_modified_since.timestamp()
+    
+    response = Response(status=304) if current else make_response(build())
+    if response.status_code in (200, 304):
+        response.set_etag(current_etag or etag)
+        response.last_modified = last_modified
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        # The result shown may come from the session
+        response.vary.add('Cookie')
+    return response
+
+def conditional_json(data, result):
+    """
+    Return JSON validated by an ETag and Last-Modified of the stored result.
+    
+    Stored results never change, so the URL and the result's creation time
+    identify the response; a revisit sends If-None-Match and gets a 304.
+    """
+    return conditional(validator(result['id'], result['created_at'], request.full_path), result['created_at'], lambda: jsonify(data))
+
+@app.route('/api/results/<result_id>')
+def api_result(result_id):
+    """Return a stored result's summary and the first page of every section as JSON."""
+    result = result_store.get(result_id)
+    if result is None:
+        return jsonify({'error': 'Unknown result ID'}), 404
+    
+    per_page = min(max(request.args.get('per_page', type=int) or app.config['RESULTS_PAGE_SIZE'], 1), RESULTS_MAX_PAGE_SIZE)
+    return conditional_json({
+        'result_id': result['id'],
+        'website_url': result['website_url'],
+        'keyword': result['keyword'],
+        'created_at': result['created_at'],
+        'sections': {section: result_page(result, section, 1, per_page) for section in RESULT_SECTIONS}
+    }, result)
+
+@app.route('/api/results/<result_id>/<section>')
+def api_result_items(result_id, section):
+    """Return one page of blogs, backlinks, bookmarks or audit findings of a stored result as JSON."""
+    if section not in RESULT_SECTIONS:
+        return jsonify({'error': f"Unknown section, use one of: {', '.join(RESULT_SECTIONS)}"}), 404
+    result = result_store.get(result_id)
+    if result is None:
+        return jsonify({'error': 'Unknown result ID'}), 404
+    
+    page = request.args.get('page', 1, type=int)
+    per_page = min(max(request.args.get('per_page', type=int) or app.config['RESULTS_PAGE_SIZE'], 1), RESULTS_MAX_PAGE_SIZE)
+    return conditional_json(result_page(result, section, page, per_page), result)
+
+@app.route('/api/results/<result_id>/blogs/<int:index>')
+def api_result_blog(result_id, index):
+    """Return the full body of one blog post of a stored result as JSON."""
+    result = result_store.get(result_id)
+    if result is None:
+        return jsonify({'error': 'Unknown result ID'}), 404
+    
+    blogs = result['seo_data'].get('blogs', [])
+    if not 0 <= index < len(blogs):
+        return jsonify({'error': 'Unknown blog post'}), 404
+    content = blog_content(blogs[index])
+    return conditional_json({
+        'index': index,
+        'title': blogs[index].get('title', ''),
+        'content': content,
+        'words': len(content.split())
+    }, result)
+
 @app.route('/results')
 def results():
-    """Display the generated SEO content."""
-    # Check if we have data in the session
-    if 'seo_data' not in session:
-        flash('No SEO data available. Please submit the form first.', 'warning')
-        return redirect(url_for('index'))
+    """Display the first page of the generated SEO content, or a progress page while the job runs."""
+    result, response = load_result()
+    if response is not None:
+        return response
     
-    # Get data from session
-    seo_data = session['seo_data']
-    website_url = session['website_url']
-    keyword = session['keyword']
-    sheet_url = session.get('sheet_url', None)
-    
-    return render_template(
-        'results.html',
-        website_url=website_url,
-        keyword=keyword,
-        blogs=seo_data.get('blogs', []),
-        backlinks=seo_data.get('backlinks', []),
-        bookmarks=seo_data.get('bookmarks', []),
-        sheet_url=sheet_url
-    )
+    # The Google Sheets export runs separately and may still be in progress
+    export_job = job_queue.get_job(result['export_job_id']) if result['export_job_id'] else None
+    export = job_status(export_job) if export_job else None
+    
+    def build():
+        # Further items and every blog body are fetched from the results API on demand
+        per_page = app.config['RESULTS_PAGE_SIZE']
+        pages = {section: result_page(result, section, 1, per_page) for section in RESULT_SECTIONS}
+        
+        return render_template(
+            'results.html',
+            result_id=result['id'],
+            website_url=result['website_url'],
+            keyword=result['keyword'],
+            blogs=pages['blogs'],
+            backlinks=pages['backlinks'],
+            bookmarks=pages['bookmarks'],
+            audit=pages['audit'],
+            export=export
+        )
+    
+    # A page showing flashed messages is never the same twice
+    if '_flashes' in session:
+        return build()
+    
+    # The page only changes with the export status
+    etag = validator(result['id'], result['created_at'], app.config['RESULTS_PAGE_SIZE'], export)
+    last_modified = max(result['created_at'], datetime.fromisoformat(export_job['updated_at']).timestamp() if export_job else 0)
+    return conditional(etag, last_modified, build)
 
 @app.route('/download_csv')
 def download_csv():
-    """Generate and download the SEO data as a CSV file."""
-    if 'seo_data' not in session:
-        flash('No SEO data available. Please submit the form first.', 'warning')
-        return redirect(url_for('index'))
+    """Stream the SEO data as a CSV file, or as NDJSON, XLSX or Parquet with ?format=."""
+    result, response = load_result()
+    if response is not None:
+        return response
     
-    # Get data from session
-    seo_data = session['seo_data']
-    website_url = session['website_url']
-    keyword = session['keyword']
-    
-    # Create a string IO object for the CSV data
-    si = io.StringIO()
-    writer = csv.writer(si)
-    
-    # Write header
-    writer.writerow(['Type', 'Title', 'Content', 'Additional Info'])
-    
-    # Write blog data
-    for blog in seo_data.get('blogs', []):
-        writer.writerow(['Blog', blog.get('title', ''), blog.get('content', ''), ''])
-    
-    # Write backlink data
-    for backlink in seo_data.get('backlinks', []):
-        writer.writerow([
-            'Backlink', 
-            backlink.get('keyword', ''), 
-            backlink.get('strategy', ''), 
-            backlink.get('platform', '')
-        ])
-    
-    # Write bookmark data
-    for bookmark in seo_data.get('bookmarks', []):
-        writer.writerow([
-            'Bookmark', 
-            bookmark.get('title', ''), 
-            bookmark.get('description', ''), 
-            bookmark.get('platform', '')
-        ])
-    
-    # Reset the pointer to the beginning
-    si.seek(0)
-    
-    # Create the response
-    output = si.getvalue()
-    
-    # Create a string buffer
-    buf = io.BytesIO()
-    buf.write(output.encode('utf-8'))
-    buf.seek(0)
-    
-    # Send the file
-    filename = f"seo_data_{website_url.replace('https://', '').replace('http://', '').replace('/', '_')}_{keyword}.csv"
-    return send_file(
-        buf,
-        as_attachment=True,
-        download_name=filename,
-        mimetype='text/csv'
-    )
+    website_url = result['website_url']
+    keyword = result['keyword']
+    filename = f"seo_data_{website_url.replace('https://', '').replace('http://', '').replace('/', '_')}_{keyword}"
+    
+    def build():
+        response = export_response(RESULT_HEADER, result_rows(result['seo_data']), filename)
+        if response is None:
+            return redirect(url_for('results', result_id=result['id']))
+        return response
+    
+    export_format = request.args.get('format', 'csv').lower()
+    return conditional(validator(result['id'], result['created_at'], export_format), result['created_at'], build)
 
 @app.errorhandler(404)
 def page_not_found(e):
@@ -0,0 +1,70 @@
+"""
+Measure how many pages per minute the on-page audit analyzes on one core.
+
+    python -m bench.bench_audit --pages 500 --paragraphs 60
+
+Every page is a generated, realistically sized document with navigation,
+scripts, headings, paragraphs mentioning the keyword and images. The report
+shows the CPU time of parsing the pages and of auditing the whole set.
+"""
+import sys
+import time
+import random
+import argparse
+
+from utils.audit import audit_page, audit_site
+
+KEYWORD = "coffee brewing"
+
+WORDS = ("roast", "bean", "grind", "water", "filter", "espresso", "origin", "flavor", "kettle", "cup", "morning", "temperature")
+
+def make_page(index, paragraphs, rng):
+    """A page of about 1 KB per paragraph, linking to its neighbors."""
+    nav = "".join(f'<li><a href="/page-{i}.html">Page {i}</a></li>' for i in range(index - 10, index + 10) if i >= 0)
+    body = []
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            body.append(f"<h{2 if i % 20 == 0 else 3}>Section {i} about {KEYWORD}</h{2 if i % 20 == 0 else 3}>")
+        words = " ".join(rng.choice(WORDS) for _ in range(140))
+        body.append(f"<p>{words} <strong>{KEYWORD}</strong> {words[:200]} <a href=\"/page-{i}.html#top\">more</a></p>")
+        if i % 5 == 0:
+            # Every third image has no alt attribute
+            alt = ' alt=""' if i % 3 else ""
+            body.append(f'<img src="/img/{i}.jpg"{alt}>')
+    return f"""<!doctype html>
+<html><head><title>Page {index} on {KEYWORD} | Example Roasters</title>
+<meta name="description" content="Everything about {KEYWORD} on page {index}, from beans to cups.">
+<script>window.dataLayer = window.dataLayer || []; function gtag() {{ dataLayer.push(arguments); }}</script>
+<style>body {{ font-family: sans-serif; }} .nav li {{ display: inline; }}</style></head>
+<body><nav><ul class="nav">{nav}</ul></nav><h1>Page {index}: {KEYWORD}</h1>{''.join(body)}
+<footer><p>&copy; Example Roasters &amp; friends</p></footer></body></html>"""
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the on-page audit.")
+    parser.add_argument("--pages", type=int, default=500, help="Pages to analyze")
+    parser.add_argument("--paragraphs", type=int, default=60, help="Paragraphs per page, about 1 KB each")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    documents = [(f"https://example.com/page-{i}.html", make_page(i, args.paragraphs, rng)) for i in range(args.pages)]
+    size = sum(len(html) for _, html in documents) / len(documents)
+
+    start = time.thread_time()
+    pages = []
+    for url, html in documents:
+        page = audit_page(url, html, KEYWORD)
+        page.update(url=url, status=200)
+        pages.append(page)
+    parsed = time.thread_time() - start
+
+    start = time.thread_time()
+    findings = audit_site(pages, KEYWORD)
+    audited = time.thread_time() - start
+
+    print(f"{args.pages} pages of {size / 1024:.0f} KB, {len(findings)} findings")
+    print(f"parse:  {1000 * parsed / args.pages:.2f} ms/page, {60 * args.pages / parsed:,.0f} pages/minute")
+    print(f"audit:  {1000 * audited:.1f} ms for the whole site")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Compare the tolerant JSON extractor with the old find/rfind slicing parser.
+
+    python -m bench.bench_extract --documents 50 --repeat 20
+
+Both parsers run over a corpus of malformed completions (prose around the
+JSON, code fences, trailing commas, truncation, repeated blobs). The report
+shows how many items each recovers per defect and how long a parse takes.
+"""
+import sys
+import json
+import time
+import argparse
+
+from bench.fake_together import malformed_outputs
+from utils.json_stream import SEO_SECTIONS
+from utils.together_ai import create_sample_seo_data, parse_generated_text, parse_text_response
+
+def legacy_parse(generated_text):
+    """The parser generate_seo_content used before the tolerant extractor."""
+    try:
+        json_start = generated_text.find('{')
+        json_end = generated_text.rfind('}') + 1
+        if json_start >= 0 and json_end > json_start:
+            return json.loads(generated_text[json_start:json_end])
+        return parse_text_response(generated_text)
+    except json.JSONDecodeError:
+        return parse_text_response(generated_text)
+
+def build_corpus(documents):
+    """Malformed variants of sample completions, grouped by defect."""
+    corpus = {}
+    for i in range(documents):
+        data = create_sample_seo_data(f"https://example{i}.com", f"keyword {i}")
+        # Vary the size so truncation cuts at different places
+        for section in SEO_SECTIONS:
+            data[section] = data[section][:1 + i % len(data[section])]
+        document = json.dumps(data, indent=2 if i % 2 else None)
+        corpus.setdefault("valid", []).append(document)
+        for defect, text in malformed_outputs(document).items():
+            corpus.setdefault(defect, []).append(text)
+    return corpus
+
+def count_items(data):
+    if not isinstance(data, dict):
+        return 0
+    return sum(len(data[section]) for section in SEO_SECTIONS if isinstance(data.get(section), list))
+
+def measure(parser, texts, repeat):
+    """Items recovered, outputs with no items, and mean microseconds per parse."""
+    items = empty = 0
+    for text in texts:
+        recovered = count_items(parser(text))
+        items += recovered
+        empty += recovered == 0
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            parser(text)
+    elapsed = time.perf_counter() - start
+    return {"items": items, "empty": empty, "us_per_parse": round(1e6 * elapsed / (repeat * len(texts)), 1)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tolerant JSON extractor against the old parser.")
+    parser.add_argument("--documents", type=int, default=50, help="Sample completions per defect")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing repetitions")
+    parser.add_argument("--output", "-o", help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = {}
+    print(f"{'defect':16} {'old items':>10} {'new items':>10} {'old empty':>10} {'new empty':>10} {'old us':>9} {'new us':>9}")
+    for defect, texts in build_corpus(args.documents).items():
+        old = measure(legacy_parse, texts, args.repeat)
+        new = measure(parse_generated_text, texts, args.repeat)
+        report[defect] = {"old": old, "new": new}
+        print(f"{defect:16} {old['items']:>10} {new['items']:>10} {old['empty']:>10} {new['empty']:>10} "
+              f"{old['us_per_parse']:>9} {new['us_per_parse']:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Measure the logging cost of a generation under the old and new logging setups.
+
+    python -m bench.bench_logging --requests 200
+
+Each simulated request makes the log calls of one generation, including the
+full API response at debug level. The report shows the CPU time spent in the
+calling thread and the bytes written per request for each setup.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+
+from utils.together_ai import create_sample_seo_data
+from utils import structured_logging
+
+def response_data():
+    """A completion response the size of a full generation."""
+    text = json.dumps(create_sample_seo_data("https://example.com", "seo tools"))
+    return {"output": {"choices": [{"text": text * 4}]}, "status": "finished"}
+
+def legacy_request(data):
+    # The log calls a generation made before structured logging
+    logging.debug("Sending request to together")
+    logging.debug(f"API Response: {data}")
+    logging.debug(f"generate_seo_content returned type: {type(data)}")
+    logging.debug(f"SEO data keys: {data.keys()}")
+
+def current_request(data):
+    logging.debug("Sending request to %s", "together")
+    logging.debug("API response from %s: %s", "together", data)
+    logging.debug("generate_seo_content returned type: %s", type(data))
+    logging.debug("Items per section: %s", {key: 1 for key in data})
+
+def measure(setup, request, requests):
+    """CPU microseconds in the calling thread and bytes written per request."""
+    with tempfile.NamedTemporaryFile("w+", suffix=".log") as log_file:
+        stderr = sys.stderr
+        sys.stderr = log_file
+        try:
+            setup()
+            data = response_data()
+            start = time.thread_time()
+            for _ in range(requests):
+                request(data)
+            elapsed = time.thread_time() - start
+            # Let the background writer catch up before counting bytes
+            structured_logging._stop_listener()
+            for handler in logging.getLogger().handlers:
+                handler.flush()
+        finally:
+            sys.stderr = stderr
+        size = os.path.getsize(log_file.name)
+    return {"cpu_us": round(1e6 * elapsed / requests, 1), "bytes": size // requests}
+
+def legacy_setup():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    logging.basicConfig(level=logging.DEBUG)
+
+def structured_setup(**env):
+    def setup():
+        os.environ.update(env)
+        structured_logging.configure_logging()
+    return setup
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the logging cost of a generation.")
+    parser.add_argument("--requests", type=int, default=200, help="Simulated generations per setup")
+    args = parser.parse_args(argv)
+
+    setups = {
+        "basicConfig DEBUG": (legacy_setup, legacy_request),
+        "structured INFO": (structured_setup(LOG_LEVEL="INFO", LOG_FORMAT="text"), current_request),
+        "structured DEBUG json": (structured_setup(LOG_LEVEL="DEBUG", LOG_FORMAT="json"), current_request),
+        "structured DEBUG 10%": (structured_setup(LOG_LEVEL="DEBUG", LOG_FORMAT="json", LOG_SAMPLE_RATE="0.1"), current_request)
+    }
+    print(f"{'setup':24} {'cpu us/request':>15} {'bytes/request':>14}")
+    for name, (setup, request) in setups.items():
+        result = measure(setup, request, args.requests)
+        print(f"{name:24} {result['cpu_us']:>15} {result['bytes']:>14}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import time
+import uuid
+import threading
+
+class FakeWorksheet:
+    def __init__(self, sheet_id, title="Sheet1"):
+        self.id = sheet_id
+        self.title = title
+
+class FakeSpreadsheet:
+    """Records the API calls made against a spreadsheet, each taking the configured latency."""
+
+    def __init__(self, client, title):
+        self.client = client
+        self.title = title
+        self.id = uuid.uuid4().hex
+        self.url = f"https://docs.google.com/spreadsheets/d/{self.id}"
+        self.sheet1 = FakeWorksheet(0)
+        self._worksheets = [self.sheet1]
+        self.values = None
+
+    def share(self, *args, **kwargs):
+        self.client.call("share")
+
+    def worksheets(self):
+        self.client.call("worksheets")
+        return list(self._worksheets)
+
+    def batch_update(self, body):
+        self.client.call("batch_update")
+        for request in body["requests"]:
+            if "updateSheetProperties" in request:
+                self.sheet1.title = request["updateSheetProperties"]["properties"]["title"]
+            else:
+                self._worksheets.append(FakeWorksheet(len(self._worksheets), request["addSheet"]["properties"]["title"]))
+
+    def values_batch_update(self, body):
+        self.client.call("values_batch_update")
+        self.values = body["data"]
+
+class FakeGspreadClient:
+    """
+    Stand-in for an authorized gspread client.
+
+    Every API call sleeps for latency seconds and is counted, so benchmarks
+    can report how many Sheets round trips an export makes.
+    """
+
+    def __init__(self, latency=0.2, failures=None):
+        """
+        Args:
+            latency (float): Seconds each simulated API call takes
+            failures (dict, optional): Number of times each named call fails
+                before it succeeds, e.g. {"values_batch_update": 1}
+        """
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.calls = {}
+        self.spreadsheets = {}
+        self._lock = threading.Lock()
+
+    def call(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            fail = self.failures.get(name, 0) > 0
+            if fail:
+                self.failures[name] -= 1
+        time.sleep(self.latency)
+        if fail:
+            raise ConnectionError(f"Simulated {name} failure")
+
+    def create(self, title, folder_id=None):
+        self.call("create")
+        spreadsheet = FakeSpreadsheet(self, title)
+        self.spreadsheets[spreadsheet.id] = spreadsheet
+        return spreadsheet
+
+    def open_by_key(self, key):
+        self.call("open_by_key")
+        return self.spreadsheets[key]
@@ -0,0 +1,165 @@
+import re
+import json
+import time
+import random
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.together_ai import create_sample_seo_data
+
+# Roughly how many characters make one token, used to pace generated text
+CHARS_PER_TOKEN = 4
+
+# How build_prompt asks for the number of items of each section
+REQUESTED_COUNTS = {
+    "blogs": re.compile(r"exactly (\d+) blogs?\b|Generate (\d+) blog titles|Write (one) blog post"),
+    "backlinks": re.compile(r"Suggest (\d+) backlink opportunities"),
+    "bookmarks": re.compile(r"Generate (\d+) social bookmarking posts")
+}
+
+def requested_counts(prompt):
+    """The number of items the prompt asks for per section, for the sections it asks for."""
+    counts = {}
+    for section, pattern in REQUESTED_COUNTS.items():
+        match = pattern.search(prompt)
+        if match:
+            count = next(group for group in match.groups() if group)
+            counts[section] = 1 if count == "one" else int(count)
+    return counts
+
+def malformed_outputs(document):
+    """
+    Build the kinds of broken completions the real model returns.
+
+    Args:
+        document (str): A well-formed JSON completion
+
+    Returns:
+        dict: Name of the defect mapped to the broken completion
+    """
+    return {
+        "prose": f"Sure! Here is the SEO content you asked for:\n\n{document}\n\nLet me know if you need anything else.",
+        "fenced": f"```json\n{document}\n```",
+        "trailing_comma": document.replace("}]", "},]", 1),
+        "truncated": document[:int(len(document) * 0.7)],
+        "two_blobs": f"{document}\n\nAlternative version:\n{document}"
+    }
+
+class FakeTogetherServer:
+    """
+    Local stand-in for the Together AI inference and chat completion endpoints.
+
+    Answers POSTs with a canned SEO completion after a configurable time to
+    first byte, generating text at a configurable token rate. A share of the
+    responses can be malformed or fail with a 503, and requests with
+    stream_tokens set are answered with server-sent events like the real API.
+    """
+
+    def __init__(self, latency=0.5, token_rate=200.0, malformed_ratio=0.0, error_ratio=0.0, seed=None):
+        """
+        Args:
+            latency (float): Seconds before the first byte of the response
+            token_rate (float): Generated tokens per second, 0 for instant
+            malformed_ratio (float): Share of completions replaced by a malformed one
+            error_ratio (float): Share of requests answered with HTTP 503
+            seed (int, optional): Seed for reproducible runs
+        """
+        self.latency = latency
+        self.token_rate = token_rate
+        self.malformed_ratio = malformed_ratio
+        self.error_ratio = error_ratio
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/inference"
+
+    def completion(self, prompt):
+        """Pick the completion for one request."""
+        sample = create_sample_seo_data("https://example.com", "benchmark")
+        # Answer with as many items of each section as the prompt asks for, repeating the samples as needed
+        data = {
+            section: [sample[section][i % len(sample[section])] for i in range(count)]
+            for section, count in requested_counts(prompt).items()
+        } or sample
+        document = json.dumps(data, indent=2)
+        with self._lock:
+            if self.random.random() < self.malformed_ratio:
+                return self.random.choice(list(malformed_outputs(document).values()))
+        return document
+
+    def start(self, host="127.0.0.1", port=0):
+        """Start serving on a background thread."""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                    failed = fake.random.random() < fake.error_ratio
+
+                time.sleep(fake.latency)
+                if failed:
+                    self._send(503, b'{"error": "overloaded"}', "application/json")
+                    return
+
+                # Chat requests get OpenAI-compatible responses, the rest /inference ones
+                chat = "messages" in payload
+                prompt = payload["messages"][-1]["content"] if chat else payload.get("prompt", "")
+                text = fake.completion(prompt)
+                if payload.get("stream_tokens") or payload.get("stream"):
+                    self._stream(text, chat)
+                else:
+                    fake.pace(len(text))
+                    if chat:
+                        body = json.dumps({"choices": [{"message": {"role": "assistant", "content": text}}]})
+                    else:
+                        body = json.dumps({"output": {"choices": [{"text": text}]}})
+                    self._send(200, body.encode("utf-8"), "application/json")
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, text, chat):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for i in range(0, len(text), CHARS_PER_TOKEN):
+                    token = text[i:i + CHARS_PER_TOKEN]
+                    fake.pace(len(token))
+                    choice = {"delta": {"content": token}} if chat else {"text": token}
+                    self.wfile.write(f"data: {json.dumps({'choices': [choice]})}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def log_message(self, format, *args):
+                logging.debug(f"fake together: {format % args}")
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def pace(self, chars):
+        """Sleep as long as generating this many characters would take."""
+        if self.token_rate > 0:
+            time.sleep(chars / CHARS_PER_TOKEN / self.token_rate)
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
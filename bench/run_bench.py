@@ -0,0 +1,288 @@
+"""
+Load test the app against local stand-ins for Together AI and Google Sheets.
+
+    python -m bench.run_bench --users 8 --iterations 5 --output bench_results.json
+    python -m bench.run_bench --compare bench_results.json
+
+Each virtual user submits /generate, polls the job until it finishes, then
+loads /results and /download_csv. Latency percentiles per endpoint,
+requests/s and worker saturation are printed and written as JSON so runs on
+different commits can be compared.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import make_server
+
+from bench.fake_together import FakeTogetherServer
+from bench.fake_gspread import FakeGspreadClient
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(samples, elapsed):
+    """
+    Reduce the recorded samples of one endpoint to its statistics.
+
+    Args:
+        samples (list): (latency in seconds, ok) tuples
+        elapsed (float): Wall-clock duration of the run
+
+    Returns:
+        dict: count, errors, requests_per_sec and p50/p95/p99/max latency in ms
+    """
+    latencies = [latency for latency, ok in samples if ok]
+    to_ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        "count": len(samples),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "requests_per_sec": round(len(samples) / elapsed, 2) if elapsed else None,
+        "p50_ms": to_ms(percentile(latencies, 0.50)),
+        "p95_ms": to_ms(percentile(latencies, 0.95)),
+        "p99_ms": to_ms(percentile(latencies, 0.99)),
+        "max_ms": to_ms(max(latencies) if latencies else None)
+    }
+
+class InFlightCounter:
+    """WSGI middleware counting the requests being served at any moment."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.current = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.current += 1
+        try:
+            # Materialize the body so streamed responses count until they finish
+            return list(self.wsgi_app(environ, start_response))
+        finally:
+            with self._lock:
+                self.current -= 1
+
+class Recorder:
+    """Thread-safe collection of per-endpoint latency samples."""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def timed(self, name, func):
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = func()
+            ok = response.status_code < 400
+            return response
+        finally:
+            with self._lock:
+                self.samples.setdefault(name, []).append((time.perf_counter() - start, ok))
+
+    def record(self, name, latency, ok):
+        with self._lock:
+            self.samples.setdefault(name, []).append((latency, ok))
+
+def run_user(base_url, iterations, recorder, poll_interval, job_timeout):
+    """One virtual user: submit, wait for the job, view and download the results."""
+    session = requests.Session()
+    json_headers = {"Accept": "application/json"}
+    for i in range(iterations):
+        started = time.perf_counter()
+        response = recorder.timed("generate_submit", lambda: session.post(
+            f"{base_url}/generate",
+            data={"website_url": f"https://example{i % 3}.com", "keyword": f"benchmark keyword {i}"},
+            headers=json_headers
+        ))
+        if response.status_code != 202:
+            recorder.record("generate_end_to_end", time.perf_counter() - started, False)
+            continue
+        job_id = response.json()["job_id"]
+
+        status = None
+        deadline = time.monotonic() + job_timeout
+        while time.monotonic() < deadline:
+            job = recorder.timed("job_poll", lambda: session.get(f"{base_url}/jobs/{job_id}", headers=json_headers)).json()
+            status = job["status"]
+            if status in ("done", "failed"):
+                break
+            time.sleep(poll_interval)
+        recorder.record("generate_end_to_end", time.perf_counter() - started, status == "done")
+        if status != "done":
+            continue
+
+        recorder.timed("results", lambda: session.get(f"{base_url}/results", params={"job_id": job_id}))
+        recorder.timed("download_csv", lambda: session.get(f"{base_url}/download_csv"))
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(previous, current):
+    """Print the change of each endpoint's p50/p95 and throughput against an earlier run."""
+    print(f"\nCompared with {previous.get('commit')} ({previous.get('timestamp')}):")
+    for name, stats in current["endpoints"].items():
+        before = previous.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "requests_per_sec"):
+            if before.get(metric) and stats.get(metric) is not None:
+                change = 100 * (stats[metric] - before[metric]) / before[metric]
+                changes.append(f"{metric} {before[metric]} -> {stats[metric]} ({change:+.1f}%)")
+        print(f"  {name:22} {', '.join(changes)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SEO app against local Together AI and Google Sheets stand-ins.")
+    parser.add_argument("--users", type=int, default=8, help="Concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=5, help="Submissions per user")
+    parser.add_argument("--job-workers", type=int, default=4, help="Job queue worker threads")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake Together AI time to first byte in seconds")
+    parser.add_argument("--token-rate", type=float, default=400.0, help="Fake Together AI tokens per second (0 for instant)")
+    parser.add_argument("--malformed-ratio", type=float, default=0.0, help="Share of malformed completions")
+    parser.add_argument("--error-ratio", type=float, default=0.0, help="Share of 503 responses from Together AI")
+    parser.add_argument("--sheets-latency", type=float, default=0.2, help="Seconds per fake Google Sheets API call")
+    parser.add_argument("--stream", action="store_true", help="Use streaming generation")
+    parser.add_argument("--generation-mode", default="single", help="single, sectioned or per_post generation")
+    parser.add_argument("--structured", action="store_true", help="Use structured output with section retries")
+    parser.add_argument("--cache", action="store_true", help="Keep the generation cache enabled")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="Seconds between job status polls")
+    parser.add_argument("--job-timeout", type=float, default=120.0, help="Seconds to wait for one job")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", "-o", default="bench_results.json", help="Machine-readable results file")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    fake_together = FakeTogetherServer(
+        latency=args.latency,
+        token_rate=args.token_rate,
+        malformed_ratio=args.malformed_ratio,
+        error_ratio=args.error_ratio,
+        seed=args.seed
+    ).start()
+
+    # The app reads its configuration at import time, so set it up first
+    workdir = tempfile.mkdtemp(prefix="seo-bench-")
+    os.environ.update({
+        "TOGETHER_API_KEY": "benchmark",
+        "TOGETHER_API_URL": fake_together.url,
+        "TOGETHER_STREAM": "1" if args.stream else "0",
+        "TOGETHER_GENERATION_MODE": args.generation_mode,
+        "TOGETHER_STRUCTURED_OUTPUT": "1" if args.structured else "0",
+        "TOGETHER_MAX_RETRIES": "1",
+        "JOB_WORKERS": str(args.job_workers),
+        "JOB_QUEUE_DB": os.path.join(workdir, "jobs.sqlite3"),
+        "RESULT_STORE_DB": os.path.join(workdir, "results.sqlite3"),
+        "BATCH_DB": os.path.join(workdir, "batches.sqlite3"),
+        "SEO_CACHE_DB": os.path.join(workdir, "cache.sqlite3"),
+        "SEO_CACHE_TTL": os.environ.get("SEO_CACHE_TTL", "86400") if args.cache else "0",
+        # The submitted example sites are not real, and a benchmark must not reach the internet
+        "CRAWL_MAX_PAGES": "0"
+    })
+
+    import utils.google_sheets
+    fake_sheets = FakeGspreadClient(latency=args.sheets_latency)
+    utils.google_sheets.get_gspread_client = lambda: fake_sheets
+
+    from app import app, job_queue
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    in_flight = InFlightCounter(app.wsgi_app)
+    app.wsgi_app = in_flight
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    # Sample saturation while the load runs
+    saturation = {"in_flight": [], "busy_workers": [], "queued_jobs": []}
+    stop_sampling = threading.Event()
+
+    def sample():
+        while not stop_sampling.wait(0.1):
+            saturation["in_flight"].append(in_flight.current)
+            saturation["busy_workers"].append(job_queue.busy_workers)
+            saturation["queued_jobs"].append(job_queue.counts().get("queued", 0))
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        futures = [
+            executor.submit(run_user, base_url, args.iterations, recorder, args.poll_interval, args.job_timeout)
+            for _ in range(args.users)
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    # Let queued exports drain so their Sheets calls are counted
+    drain_deadline = time.monotonic() + args.job_timeout
+    while job_queue.counts().get("queued", 0) or job_queue.busy_workers:
+        if time.monotonic() > drain_deadline:
+            break
+        time.sleep(0.1)
+
+    stop_sampling.set()
+    sampler.join()
+    server.shutdown()
+    fake_together.stop()
+
+    busy = saturation["busy_workers"]
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": vars(args),
+        "elapsed_sec": round(elapsed, 3),
+        "endpoints": {name: summarize(samples, elapsed) for name, samples in sorted(recorder.samples.items())},
+        "saturation": {
+            "job_workers": args.job_workers,
+            "busy_workers_mean": round(sum(busy) / len(busy), 2) if busy else 0,
+            "workers_saturated_share": round(sum(1 for value in busy if value >= args.job_workers) / len(busy), 3) if busy else 0,
+            "queued_jobs_max": max(saturation["queued_jobs"], default=0),
+            "in_flight_requests_max": max(saturation["in_flight"], default=0)
+        },
+        "upstream": {
+            "together_requests": fake_together.requests,
+            "sheets_calls": dict(fake_sheets.calls)
+        }
+    }
+
+    print(f"{args.users} users x {args.iterations} submissions in {report['elapsed_sec']}s")
+    print(f"{'endpoint':22} {'count':>6} {'err':>4} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in report["endpoints"].items():
+        print(f"{name:22} {stats['count']:>6} {stats['errors']:>4} {stats['requests_per_sec']:>8} "
+              f"{stats['p50_ms']!s:>9} {stats['p95_ms']!s:>9} {stats['p99_ms']!s:>9}")
+    print(f"saturation: {json.dumps(report['saturation'])}")
+    print(f"upstream: {json.dumps(report['upstream'])}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
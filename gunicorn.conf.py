@@ -0,0 +1,5 @@
+from utils.metrics import clear_metrics_dir
+
+def on_starting(server):
+    """Start the metrics of this run from zero, before any worker writes its file."""
+    clear_metrics_dir()
@@ -1,4 +1,6 @@
 from app import app
+from utils.metrics import clear_metrics_dir
 
 if __name__ == "__main__":
+    clear_metrics_dir()
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -58,6 +58,137 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Poll the job status while SEO content is being generated
+    const jobStatus = document.getElementById('job-status');
+    if (jobStatus) {
+        const statusUrl = jobStatus.getAttribute('data-status-url');
+        const resultsUrl = jobStatus.getAttribute('data-results-url');
+        const websiteUrl = jobStatus.getAttribute('data-website-url');
+        const keyword = jobStatus.getAttribute('data-keyword');
+        const loadingStatus = document.getElementById('loading-status');
+        const loadingMessages = [
+            `Analyzing ${websiteUrl} for ${keyword} optimization...`,
+            `Researching current ${keyword} trends...`,
+            `Generating blog post ideas related to ${keyword}...`,
+            `Finding high-quality backlink opportunities...`,
+            `Creating social bookmarking strategies...`,
+            `Optimizing content for search engines...`,
+            `Almost there! Finalizing your SEO content...`
+        ];
+        let messageIndex = 0;
+
+        function pollJob() {
+            fetch(statusUrl, { headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(job => {
+                    // Both finished and failed jobs are handled by the results page
+                    if (job.status === 'done' || job.status === 'failed' || job.error) {
+                        window.location.href = resultsUrl;
+                        return;
+                    }
+                    if (job.status === 'running') {
+                        loadingStatus.textContent = loadingMessages[messageIndex];
+                        messageIndex = (messageIndex + 1) % loadingMessages.length;
+                    }
+                    setTimeout(pollJob, 2000);
+                })
+                .catch(() => setTimeout(pollJob, 5000));
+        }
+
+        // Show each item as soon as the server streams it, fall back to polling
+        const streamUrl = jobStatus.getAttribute('data-stream-url');
+        if (window.EventSource && streamUrl) {
+            const liveItems = document.getElementById('live-items');
+            const liveItemsList = document.getElementById('live-items-list');
+            const sectionIcons = { blogs: 'fa-pencil-alt', backlinks: 'fa-link', bookmarks: 'fa-bookmark' };
+            const source = new EventSource(streamUrl);
+            let finished = false;
+
+            source.addEventListener('item', function(e) {
+                const data = JSON.parse(e.data);
+                const item = data.item;
+                const entry = document.createElement('li');
+                entry.className = 'list-group-item';
+                const icon = document.createElement('i');
+                icon.className = `fas ${sectionIcons[data.section] || 'fa-file'} me-2`;
+                entry.appendChild(icon);
+                entry.appendChild(document.createTextNode(item.title || item.platform || ''));
+                liveItemsList.appendChild(entry);
+                liveItems.classList.remove('d-none');
+                loadingStatus.textContent = `Generated ${liveItemsList.children.length} items so far...`;
+            });
+
+            source.addEventListener('done', function() {
+                finished = true;
+                source.close();
+                window.location.href = resultsUrl;
+            });
+
+            source.onerror = function() {
+                // The server ends each stream after a few seconds and the browser reconnects
+                // by itself, resuming after the last item; only poll if the stream is gone for good
+                if (!finished && source.readyState === EventSource.CLOSED) {
+                    setTimeout(pollJob, 1000);
+                }
+            };
+        } else {
+            setTimeout(pollJob, 1000);
+        }
+    }
+
+    // Show the Google Sheet link once the background export finishes
+    const sheetStatus = document.getElementById('sheet-status');
+    if (sheetStatus && ['queued', 'running'].includes(sheetStatus.getAttribute('data-export-status'))) {
+        const exportStatusUrl = sheetStatus.getAttribute('data-status-url');
+
+        function pollExport() {
+            fetch(exportStatusUrl, { headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(job => {
+                    if (job.status === 'queued' || job.status === 'running') {
+                        setTimeout(pollExport, 3000);
+                        return;
+                    }
+                    const target = sheetStatus.querySelector('span');
+                    if (job.sheet_url) {
+                        const link = document.createElement('a');
+                        link.href = job.sheet_url;
+                        link.target = '_blank';
+                        link.textContent = 'View Sheet';
+                        target.replaceWith(link);
+                    } else {
+                        target.innerHTML = '';
+                        target.textContent = job.error || 'Export failed';
+                    }
+                })
+                .catch(() => setTimeout(pollExport, 10000));
+        }
+
+        setTimeout(pollExport, 3000);
+    }
+
+    // Refresh the batch page while rows are still pending
+    const batchProgress = document.getElementById('batch-progress');
+    if (batchProgress && parseInt(batchProgress.getAttribute('data-pending'), 10) > 0) {
+        const batchStatusUrl = batchProgress.getAttribute('data-status-url');
+        const pendingRows = parseInt(batchProgress.getAttribute('data-pending'), 10);
+
+        function pollBatch() {
+            fetch(batchStatusUrl, { headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(batch => {
+                    if (batch.pending !== pendingRows) {
+                        window.location.reload();
+                        return;
+                    }
+                    setTimeout(pollBatch, 3000);
+                })
+                .catch(() => setTimeout(pollBatch, 10000));
+        }
+
+        setTimeout(pollBatch, 3000);
+    }
+
     // Initialize tooltips
     const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
     tooltipTriggerList.map(function (tooltipTriggerEl) {
@@ -74,59 +205,130 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
-    // Auto-collapse long content sections on results page
-    const resultSections = document.querySelectorAll('.collapse.show');
-    if (resultSections.length > 3) {
-        // Keep only the first section expanded if there are many sections
-        for (let i = 1; i < resultSections.length; i++) {
-            resultSections[i].classList.remove('show');
+    // Load a blog post's body from the results API the first time it is opened
+    document.addEventListener('show.bs.collapse', function(e) {
+        const panel = e.target;
+        const contentUrl = panel.getAttribute('data-content-url');
+        if (!contentUrl || panel.getAttribute('data-loaded')) {
+            return;
+        }
+        panel.setAttribute('data-loaded', 'true');
+        const target = panel.querySelector('.blog-content');
+        fetch(contentUrl, { headers: { 'Accept': 'application/json' } })
+            .then(response => response.json())
+            .then(blog => {
+                target.innerHTML = '';
+                if (!blog.content) {
+                    const empty = document.createElement('p');
+                    empty.className = 'text-muted';
+                    empty.textContent = 'No content available for this blog post.';
+                    target.appendChild(empty);
+                    return;
+                }
+                blog.content.split('\n').forEach((line, i) => {
+                    if (i > 0) {
+                        target.appendChild(document.createElement('br'));
+                    }
+                    target.appendChild(document.createTextNode(line));
+                });
+            })
+            .catch(() => {
+                panel.removeAttribute('data-loaded');
+                target.textContent = 'Could not load this blog post, close and open it to try again.';
+            });
+    });
+
+    // Fill the empty item template of a section with one item from the results API
+    const platformList = document.querySelector('[data-platform-styles]');
+    const platformStyles = platformList ? JSON.parse(platformList.getAttribute('data-platform-styles')) : [];
+    const statusList = document.querySelector('[data-status-styles]');
+    const statusStyles = statusList ? JSON.parse(statusList.getAttribute('data-status-styles')) : {};
+
+    function renderItem(section, item) {
+        const node = document.getElementById(`${section}-template`).content.firstElementChild.cloneNode(true);
+        const fields = Object.assign({ number: item.index + 1 }, item);
+        node.querySelectorAll('[data-field]').forEach(element => {
+            element.textContent = fields[element.getAttribute('data-field')] || '';
+        });
+        if (section === 'blogs') {
+            node.querySelector('[data-field-target]').setAttribute('data-bs-target', `#blog${item.index}`);
+            const panel = node.querySelector('.accordion-collapse');
+            panel.id = `blog${item.index}`;
+            panel.setAttribute('data-content-url', item.content_url);
         }
+        if (section === 'bookmarks') {
+            const style = platformStyles.find(([name]) => (item.platform || '').includes(name));
+            if (style) {
+                node.querySelector('.platform-badge .badge').className = `badge ${style[1]} platform-badge`;
+                node.querySelector('.platform-badge i').className = `${style[2]} me-1`;
+            }
+        }
+        if (section === 'audit') {
+            node.querySelector('[data-field="status"]').className = `badge ${statusStyles[item.status] || 'bg-secondary'}`;
+        }
+        return node;
     }
-    
-    // Copy blog content functionality
-    const copyBlogButtons = document.querySelectorAll('.copy-blog-btn');
-    copyBlogButtons.forEach(button => {
+
+    // Append the next page of a section when "Show more" is clicked
+    document.querySelectorAll('.load-more-btn').forEach(button => {
         button.addEventListener('click', function() {
-            const blogId = this.getAttribute('data-blog-id');
-            // Get all the text content from the blog content div (will include whatever field was rendered)
-            const blogContent = document.querySelector(`#blog${blogId} .blog-content`).innerText;
+            const section = this.getAttribute('data-section');
+            const list = document.querySelector(`.result-items[data-section="${section}"]`);
+            button.disabled = true;
+            fetch(button.getAttribute('data-next-url'), { headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(page => {
+                    page.items.forEach(item => list.appendChild(renderItem(section, item)));
+                    const shown = list.querySelectorAll(':scope > *').length;
+                    if (page.next_url) {
+                        button.setAttribute('data-next-url', page.next_url);
+                        button.innerHTML = `<i class="fas fa-plus me-1"></i> Show more (${page.total - shown} left)`;
+                        button.disabled = false;
+                    } else {
+                        button.parentElement.remove();
+                    }
+                })
+                .catch(() => { button.disabled = false; });
+        });
+    });
+    
+    // Copy buttons, also on items added by "Show more"
+    document.addEventListener('click', function(e) {
+        const blogButton = e.target.closest('.copy-blog-btn');
+        if (blogButton) {
+            // Get all the text content from the blog content div
+            const blogContent = blogButton.closest('.blog-item').querySelector('.blog-content').innerText;
             
-            // Remove the "No content available for this blog post." message if present
-            const cleanedContent = blogContent.replace('No content available for this blog post.', '').trim();
+            // Remove the placeholder messages if present
+            const cleanedContent = blogContent.replace('No content available for this blog post.', '').replace('Loading...', '').trim();
             
             // Only copy if there's actual content
             if (cleanedContent) {
-                copyToClipboard(cleanedContent, this);
+                copyToClipboard(cleanedContent, blogButton);
             } else {
                 alert('No content available to copy');
             }
-        });
-    });
-    
-    // Copy backlink strategy functionality
-    const copyStrategyButtons = document.querySelectorAll('.copy-strategy-btn');
-    copyStrategyButtons.forEach(button => {
-        button.addEventListener('click', function() {
-            const backlinkId = this.getAttribute('data-backlink-id');
-            const backlinkStrategy = document.querySelector(`.backlink-card:nth-child(${backlinkId}) p`).innerText;
-            
-            copyToClipboard(backlinkStrategy, this);
-        });
-    });
-    
-    // Copy social bookmark functionality
-    const copyBookmarkButtons = document.querySelectorAll('.copy-bookmark-btn');
-    copyBookmarkButtons.forEach(button => {
-        button.addEventListener('click', function() {
-            const bookmarkId = this.getAttribute('data-bookmark-id');
-            const bookmarkTitle = document.querySelector(`.bookmark-card:nth-of-type(${bookmarkId}) h5`).innerText.replace(/^\d+\s+/, '');
-            const bookmarkDescription = document.querySelector(`.bookmark-card:nth-of-type(${bookmarkId}) .card-text`).innerText;
-            const bookmarkPlatform = document.querySelector(`.bookmark-card:nth-of-type(${bookmarkId}) .platform-badge`).innerText;
+            return;
+        }
+        
+        const strategyButton = e.target.closest('.copy-strategy-btn');
+        if (strategyButton) {
+            const backlinkStrategy = strategyButton.closest('.backlink-card').querySelector('.backlink-strategy').innerText;
+            copyToClipboard(backlinkStrategy, strategyButton);
+            return;
+        }
+        
+        const bookmarkButton = e.target.closest('.copy-bookmark-btn');
+        if (bookmarkButton) {
+            const card = bookmarkButton.closest('.bookmark-card');
+            const bookmarkTitle = card.querySelector('.bookmark-title').innerText;
+            const bookmarkDescription = card.querySelector('.card-text').innerText;
+            const bookmarkPlatform = card.querySelector('.platform-badge').innerText;
             
             const bookmarkContent = `Title: ${bookmarkTitle}\nDescription: ${bookmarkDescription}\nPlatform: ${bookmarkPlatform}`;
             
-            copyToClipboard(bookmarkContent, this);
-        });
+            copyToClipboard(bookmarkContent, bookmarkButton);
+        }
     });
     
     // Helper function to copy content to clipboard
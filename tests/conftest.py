@@ -0,0 +1,43 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Serves the pages of the server's site: {path: (status, headers, body)}."""
+
+    def do_GET(self):
+        status, headers, body = self.server.pages.get(self.path, (404, {"Content-Type": "text/html"}, "<title>Not found</title>"))
+        body = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def site():
+    """
+    A local HTTP server whose pages the test sets.
+
+    Yields the server; server.url is its origin, and server.pages maps each
+    path to a (status, headers, body) tuple.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.pages = {}
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture(autouse=True, scope="session")
+def metrics_dir(tmp_path_factory):
+    """Keep the metrics files of a test run out of the shared directory."""
+    os.environ["METRICS_DIR"] = str(tmp_path_factory.mktemp("metrics"))
@@ -0,0 +1,60 @@
+import functools
+
+import pytest
+
+from utils.audit import audit_page, audit_site, check_headings, keyword_independent
+from utils.crawler import Crawler
+
+HTML = {"Content-Type": "text/html; charset=utf-8"}
+
+@pytest.mark.parametrize("headings, findings", [
+    ([(1, "Coffee"), (2, "Beans"), (3, "Ethiopia"), (2, "Brewing")], []),
+    ([], [("error", "No H1 heading")]),
+    ([(2, "Beans")], [("error", "No H1 heading"), ("warning", "The first heading is an H2, not the H1")]),
+    ([(1, "Coffee"), (1, "Tea")], [("warning", "2 H1 headings, use one per page")]),
+    ([(1, "Coffee"), (3, "Grind"), (5, "Fine")], [("warning", "An H1 is followed by an H3, skipping a level")])
+])
+def test_check_headings(headings, findings):
+    assert list(check_headings(headings)) == findings
+
+def test_audit_page_counts_keyword_across_text_nodes():
+    page = audit_page("https://example.com/", "<title>Coffee brewing</title><script>coffee brewing</script>"
+                      "<p>Coffee <b>brewing</b> at home: coffee brewing.</p><img src=a.png><img src=b.png alt=''>", "coffee brewing")
+    assert page["words"] == 6
+    assert page["keyword_hits"] == 2
+    assert (page["images"], page["images_without_alt"]) == (2, 1)
+
+@pytest.fixture
+def audited(site):
+    description = '<meta name="description" content="Small-batch specialty coffee, roasted every week and shipped the same day.">'
+    site.pages.update({
+        "/": (200, HTML, f"<html><head><title>Acme Coffee Roasters | Fresh coffee</title>{description}</head>"
+                         '<body><h1>Fresh roasted coffee</h1><a href="/beans">Beans</a><a href="/brew">Brew</a><a href="/gone">Gone</a></body></html>'),
+        "/beans": (200, HTML, "<html><head><title>Beans</title></head><body><h2>Ethiopia</h2><img src=a.png></body></html>"),
+        "/brew": (200, HTML, f"<html><head><title>Beans</title>{description}</head><body><h1>Brewing</h1><p>Coffee brewing guide</p></body></html>")
+    })
+    pages = Crawler(delay=0, allow_private=True).crawl_site(site.url, functools.partial(audit_page, keyword="coffee brewing"))
+    return audit_site(pages, "coffee brewing")
+
+def findings_of(findings, check):
+    return [(finding["page"], finding["status"], finding["detail"]) for finding in findings if finding["check"] == check]
+
+def test_audit_site_summarizes_first(audited):
+    assert audited[0] == {"check": "Pages audited", "page": "All pages", "status": "warning", "detail": "3 of 4 pages loaded"}
+    statuses = [finding["status"] for finding in audited if finding["page"] != "All pages"]
+    assert statuses == sorted(statuses, key=["error", "warning", "ok"].index)
+
+def test_audit_site_reports_page_problems(audited):
+    assert findings_of(audited, "Broken internal link") == [("/", "error", "Links to /gone (404)")]
+    assert findings_of(audited, "Duplicate title") == [("/beans", "error", "The same title is used by 2 pages: /beans, /brew")]
+    assert ("/beans", "error", "No H1 heading") in findings_of(audited, "Headings")
+    assert findings_of(audited, "Meta description") == [("/beans", "warning", "The page has no meta description")]
+    assert findings_of(audited, "Image alt text")[-1] == ("/beans", "warning", "1 of 1 images have no alt text")
+
+def test_keyword_independent_findings_drop_keyword_density(audited):
+    assert findings_of(audited, "Keyword density")
+    assert not findings_of(keyword_independent(audited), "Keyword density")
+    assert findings_of(keyword_independent(audited), "Duplicate title")
+
+def test_audit_site_without_pages():
+    assert audit_site([], "coffee") == []
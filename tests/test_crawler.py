@@ -0,0 +1,143 @@
+from urllib.parse import urlsplit
+
+import socket
+
+import pytest
+
+from utils.crawler import Crawler, decode_body, is_public_host
+
+HTML = {"Content-Type": "text/html; charset=utf-8"}
+
+def page(title, *links):
+    return 200, HTML, f"<html><head><title>{title}</title></head><body><h1>{title}</h1>" + "".join(f'<a href="{link}">{link}</a>' for link in links) + "</body></html>"
+
+def redirect(location, status=302):
+    return status, {"Location": location}, ""
+
+@pytest.fixture
+def crawler():
+    return Crawler(delay=0, time_budget=10, allow_private=True)
+
+def crawled(pages):
+    """The status of every crawled page by path."""
+    return {urlsplit(page["url"]).path or "/": page["status"] for page in pages}
+
+def test_crawl_follows_internal_links_only(site, crawler):
+    site.pages.update({
+        "/": page("Home", "/a", "/b#section", "https://example.com/elsewhere", "mailto:team@example.com"),
+        "/a": page("A", "/", "/missing"),
+        "/b": page("B")
+    })
+    pages = crawler.crawl_site(site.url)
+    assert crawled(pages) == {"/": 200, "/a": 200, "/b": 200, "/missing": 404}
+    assert pages[0]["title"] == "Home"
+
+def test_crawl_honors_robots_txt(site, crawler):
+    site.pages.update({
+        "/robots.txt": (200, {"Content-Type": "text/plain"}, "User-agent: *\nDisallow: /private/\n"),
+        "/": page("Home", "/private/secret", "/public"),
+        "/public": page("Public"),
+        "/private/secret": page("Secret")
+    })
+    assert crawled(crawler.crawl_site(site.url)) == {"/": 200, "/public": 200}
+
+def test_crawl_stops_when_robots_txt_forbids_everything(site, crawler):
+    site.pages.update({
+        "/robots.txt": (200, {"Content-Type": "text/plain"}, "User-agent: *\nDisallow: /\n"),
+        "/": page("Home")
+    })
+    assert crawler.crawl_site(site.url) == []
+
+@pytest.mark.parametrize("status", [500, 503])
+def test_crawl_stops_when_robots_txt_has_a_server_error(site, crawler, status):
+    site.pages.update({"/robots.txt": (status, {"Content-Type": "text/plain"}, "Unavailable"), "/": page("Home")})
+    assert crawler.crawl_site(site.url) == []
+
+def test_crawl_allows_everything_without_robots_txt(site, crawler):
+    site.pages["/"] = page("Home")
+    assert crawled(crawler.crawl_site(site.url)) == {"/": 200}
+
+def test_crawl_adds_sitemap_pages(site, crawler):
+    site.pages.update({
+        "/robots.txt": (200, {"Content-Type": "text/plain"}, f"Sitemap: {site.url}/sitemap.xml\n"),
+        "/sitemap.xml": (200, {"Content-Type": "application/xml"},
+                         f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"><url><loc>{site.url}/hidden</loc></url></urlset>'),
+        "/": page("Home"),
+        "/hidden": page("Hidden")
+    })
+    assert crawled(crawler.crawl_site(site.url)) == {"/": 200, "/hidden": 200}
+
+def test_fetch_follows_same_site_redirects(site, crawler):
+    site.pages.update({"/old": redirect("/new", 301), "/new": page("New")})
+    response, how = crawler.fetch(f"{site.url}/old")
+    assert how == "fetched"
+    assert response["url"] == f"{site.url}/old"
+    assert response["final_url"] == f"{site.url}/new"
+    assert response["status"] == 200
+
+@pytest.mark.parametrize("location", [
+    "http://localhost:{port}/",
+    "http://169.254.169.254/latest/meta-data/",
+    "https://example.com/",
+    "file:///etc/passwd"
+])
+def test_fetch_blocks_off_site_redirects(site, crawler, location):
+    site.pages["/go"] = redirect(location.format(port=site.server_address[1]))
+    assert crawler.fetch(f"{site.url}/go") == (None, "blocked")
+
+def test_fetch_gives_up_on_redirect_loops(site, crawler):
+    site.pages.update({"/a": redirect("/b"), "/b": redirect("/a")})
+    assert crawler.fetch(f"{site.url}/a") == (None, "error")
+
+def test_crawl_keeps_pages_behind_blocked_redirects_as_unreachable(site, crawler):
+    site.pages.update({"/": page("Home", "/out"), "/out": redirect("http://169.254.169.254/")})
+    assert crawled(crawler.crawl_site(site.url)) == {"/": 200, "/out": 0}
+
+def test_private_addresses_are_not_crawled_by_default(site):
+    crawler = Crawler(delay=0)
+    assert crawler.fetch(f"{site.url}/") == (None, "blocked")
+    assert crawler.crawl_site(site.url) == []
+
+@pytest.mark.parametrize("host", ["localhost", "127.0.0.1", "10.0.0.1", "192.168.1.1", "169.254.169.254", "::1", "", "unresolvable.invalid"])
+def test_non_public_hosts(host):
+    assert not is_public_host(host)
+
+@pytest.mark.parametrize("encoding, body, text", [
+    ("utf-8", "Café".encode("utf-8"), "Café"),
+    (None, "Café".encode("utf-8"), "Café"),
+    (None, b'<meta charset="windows-1252">Caf\xe9', '<meta charset="windows-1252">Café'),
+    (None, b'\xef\xbb\xbfCaf\xc3\xa9', "Café")
+])
+def test_decode_body(encoding, body, text):
+    assert decode_body({"encoding": encoding, "body": body}) == text
+
+def test_crawl_decodes_pages_without_a_header_charset(site, crawler):
+    site.pages["/"] = (200, {"Content-Type": "text/html"}, '<html><head><meta charset="utf-8"><title>Café</title></head></html>'.encode("utf-8"))
+    assert crawler.crawl_site(site.url)[0]["title"] == "Café"
+
+@pytest.fixture
+def rebinding(monkeypatch):
+    """Resolve rebind.test to loopback, recording every lookup of it."""
+    lookups = []
+    getaddrinfo = socket.getaddrinfo
+
+    def resolve(host, *args, **kwargs):
+        if host == "rebind.test":
+            lookups.append(host)
+            host = "127.0.0.1"
+        return getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", resolve)
+    return lookups
+
+def test_fetch_connects_to_the_checked_address(site, crawler, rebinding):
+    # One lookup per hop: the connection never resolves the name again
+    port = site.server_address[1]
+    site.pages.update({"/old": redirect("/new"), "/new": (200, HTML, "ok")})
+    response, how = crawler.fetch(f"http://rebind.test:{port}/old")
+    assert how == "fetched"
+    assert response["final_url"] == f"http://rebind.test:{port}/new"
+    assert rebinding == ["rebind.test", "rebind.test"]
+
+def test_fetch_blocks_host_names_of_private_addresses(site, rebinding):
+    assert Crawler(delay=0).fetch(f"http://rebind.test:{site.server_address[1]}/") == (None, "blocked")
@@ -0,0 +1,29 @@
+from urllib.parse import unquote
+
+import pytest
+
+@pytest.fixture(scope="module")
+def download(tmp_path_factory):
+    """The download URL of a result stored by the app, with its stores in a temporary directory."""
+    directory = tmp_path_factory.mktemp("app")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for name in ("RESULT_STORE_DB", "JOB_QUEUE_DB", "BATCH_DB"):
+            monkeypatch.setenv(name, str(directory / f"{name.lower()}.sqlite3"))
+        from app import app, result_store
+        from utils.together_ai import create_sample_seo_data, simplify_seo_data
+        keyword = "café crème 咖啡 ☕; x"
+        seo_data = simplify_seo_data(create_sample_seo_data("https://example.com", keyword), keyword)
+        result_id = result_store.save("https://example.com", keyword, seo_data)
+        yield app.test_client(), f"/download_csv?result_id={result_id}"
+
+def test_download_name_survives_any_keyword(download):
+    client, url = download
+    response = client.get(url)
+    assert response.status_code == 200
+    disposition = response.headers["Content-Disposition"]
+    # The header must be writable as latin-1
+    disposition.encode("latin-1")
+    assert 'filename="seo_data_example.com_cafe creme  _ x.csv"' in disposition
+    encoded = disposition.split("filename*=UTF-8''", 1)[1]
+    assert " " not in encoded and ";" not in encoded
+    assert unquote(encoded) == "seo_data_example.com_café crème 咖啡 ☕_ x.csv"
@@ -0,0 +1,35 @@
+import pytest
+
+from bench.fake_together import FakeTogetherServer, requested_counts
+from utils.together_ai import build_prompt, generate_seo_content
+from utils.token_budget import normalize_budget
+
+@pytest.fixture
+def fake_together(monkeypatch):
+    server = FakeTogetherServer(latency=0, token_rate=0).start()
+    monkeypatch.delenv("LLM_MODELS", raising=False)
+    monkeypatch.setenv("TOGETHER_API_KEY", "test")
+    monkeypatch.setenv("TOGETHER_API_URL", server.url)
+    monkeypatch.setenv("TOGETHER_MAX_RETRIES", "0")
+    monkeypatch.setenv("CRAWL_MAX_PAGES", "0")
+    yield server
+    server.stop()
+
+@pytest.mark.parametrize("mode, requests", [("single", 1), ("sectioned", 3), ("per_post", 5)])
+def test_fake_answers_with_the_requested_counts(fake_together, mode, requests):
+    budget = {"blog_count": 3, "blog_words": 200, "backlink_count": 2, "bookmark_count": 4}
+    seo_data = generate_seo_content("https://example.com", "coffee", mode=mode, budget=budget, fresh=True)
+    assert {section: len(seo_data[section]) for section in ("blogs", "backlinks", "bookmarks")} == {"blogs": 3, "backlinks": 2, "bookmarks": 4}
+    assert fake_together.requests == requests
+
+@pytest.mark.parametrize("counts, angles", [
+    ({"blogs": 5, "backlinks": 4, "bookmarks": 3}, None),
+    ({"blogs": 1}, ["a beginner's guide"]),
+    ({"blogs": 1}, None),
+    ({"blogs": 3}, ["a guide", "a checklist", "a case study"]),
+    ({"backlinks": 7}, None),
+    ({"bookmarks": 2}, None)
+])
+def test_fake_reads_the_counts_build_prompt_asks_for(counts, angles):
+    prompt = build_prompt("https://example.com", "coffee", counts, normalize_budget(None), angles)
+    assert requested_counts(prompt) == counts
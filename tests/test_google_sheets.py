@@ -0,0 +1,56 @@
+import pytest
+
+import utils.google_sheets
+from bench.fake_gspread import FakeGspreadClient
+from utils.google_sheets import SheetsExportError, save_to_google_sheets
+
+SEO_DATA = {
+    "blogs": [{"title": "Brewing at home", "content": "..."}],
+    "backlinks": [{"platform": "Coffee forum", "keyword": "coffee", "strategy": "Answer questions"}],
+    "bookmarks": [{"title": "Brew guide", "description": "...", "platform": "Reddit"}]
+}
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeGspreadClient(latency=0)
+    monkeypatch.setattr(utils.google_sheets, "get_gspread_client", lambda: client)
+    return client
+
+def export(spreadsheet_id=None):
+    """Export SEO_DATA the way the export job does, returning the URL and the created spreadsheet's ID."""
+    created = []
+    url = save_to_google_sheets("https://example.com", "coffee", SEO_DATA, spreadsheet_id, created.append)
+    return url, created[0] if created else spreadsheet_id
+
+def test_export_creates_one_filled_spreadsheet(client):
+    url, spreadsheet_id = export()
+    spreadsheet = client.spreadsheets[spreadsheet_id]
+    assert url == spreadsheet.url
+    assert [worksheet.title for worksheet in spreadsheet.worksheets()] == ["Summary", "Blog Posts", "Backlink Opportunities", "Social Bookmarks"]
+    assert spreadsheet.values[1]["values"][1] == ["Brewing at home", "..."]
+
+@pytest.mark.parametrize("failing_call", ["batch_update", "values_batch_update"])
+def test_retry_finishes_the_spreadsheet_of_the_failed_attempt(client, failing_call):
+    client.failures[failing_call] = 1
+    created = []
+    with pytest.raises(SheetsExportError):
+        save_to_google_sheets("https://example.com", "coffee", SEO_DATA, None, created.append)
+    assert len(created) == 1
+
+    url, spreadsheet_id = export(created[0])
+    assert spreadsheet_id == created[0]
+    assert len(client.spreadsheets) == 1
+    spreadsheet = client.spreadsheets[spreadsheet_id]
+    assert url == spreadsheet.url
+    assert len(spreadsheet.worksheets()) == 4
+    assert spreadsheet.values is not None
+
+def test_failed_create_is_retryable(client):
+    client.failures["create"] = 1
+    with pytest.raises(SheetsExportError):
+        export()
+    assert not client.spreadsheets
+
+def test_missing_credentials_are_reported_not_retried(monkeypatch):
+    monkeypatch.setattr(utils.google_sheets, "get_gspread_client", lambda: (None, "No credentials"))
+    assert save_to_google_sheets("https://example.com", "coffee", SEO_DATA) == (None, "No credentials")
@@ -0,0 +1,29 @@
+import time
+
+from utils.job_queue import JobQueue, RetryJob, STATUS_DONE
+
+def wait_for(queue, job_id, status, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get_job(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} is {job['status']}, not {status}")
+
+def test_retry_keeps_the_payload_changes_of_the_failed_attempt(tmp_path):
+    attempts = []
+
+    def handler(payload, publish):
+        attempts.append(dict(payload))
+        if len(attempts) == 1:
+            payload["spreadsheet_id"] = "abc"
+            raise RetryJob("Try again", delay=0)
+        return {"spreadsheet_id": payload["spreadsheet_id"]}
+
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), handler, num_workers=1, poll_interval=0.01)
+    queue.start()
+    job_id = queue.enqueue({"type": "export"})
+    job = wait_for(queue, job_id, STATUS_DONE)
+    assert attempts == [{"type": "export"}, {"type": "export", "spreadsheet_id": "abc"}]
+    assert job["result"] == {"spreadsheet_id": "abc"}
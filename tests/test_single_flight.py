@@ -0,0 +1,45 @@
+import os
+import time
+import threading
+
+import pytest
+
+from utils.single_flight import SingleFlight, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="Results are only shared across processes with file locks")
+
+def run_together(first, second):
+    """Run two callables, the second starting while the first is running, and return both results."""
+    results = {}
+    thread = threading.Thread(target=lambda: results.setdefault("first", first()))
+    thread.start()
+    time.sleep(0.1)
+    results["second"] = second()
+    thread.join()
+    return results["first"], results["second"]
+
+@pytest.mark.parametrize("result", [{"blogs": [{"title": "Brewing"}]}, ("API Error", "Rate limited"), None])
+def test_result_is_shared_between_processes(tmp_path, result):
+    # Two coordinators on one directory stand in for two gunicorn workers
+    leader, follower = SingleFlight(str(tmp_path)), SingleFlight(str(tmp_path))
+    calls = []
+
+    def func():
+        calls.append(1)
+        time.sleep(0.3)
+        return result
+
+    first, second = run_together(lambda: leader.do("key", func), lambda: follower.do("key", func))
+    assert first == (result, False)
+    assert second == (result, True)
+    assert len(calls) == 1
+
+def test_directory_is_private(tmp_path):
+    SingleFlight(str(tmp_path / "flights"))
+    assert os.stat(tmp_path / "flights").st_mode & 0o777 == 0o700
+
+def test_directory_of_another_user_is_not_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(tmp_path).st_uid + 1)
+    flight = SingleFlight(str(tmp_path))
+    assert flight.do("key", lambda: "result") == ("result", False)
+    assert not list(tmp_path.iterdir())
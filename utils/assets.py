@@ -0,0 +1,236 @@
+import os
+import re
+import sys
+import gzip
+import json
+import hashlib
+import logging
+import argparse
+import posixpath
+import urllib.request
+from urllib.parse import urljoin
+
+try:
+    import brotli
+except ImportError:
+    # Without brotli only gzip copies are written
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+
+# Third-party files fetched into static/vendor, by path under static/
+VENDOR_ASSETS = {
+    "vendor/bootstrap/bootstrap-agent-dark-theme.min.css": "https://cdn.replit.com/agent/bootstrap-agent-dark-theme.min.css",
+    "vendor/bootstrap/bootstrap.bundle.min.js": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js",
+    "vendor/fontawesome/css/all.min.css": "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css"
+}
+
+# Stylesheets and scripts the pages load, by path under static/; files they
+# reference with url() are built along with them
+ASSETS = [
+    "vendor/bootstrap/bootstrap-agent-dark-theme.min.css",
+    "vendor/fontawesome/css/all.min.css",
+    "css/style.css",
+    "vendor/bootstrap/bootstrap.bundle.min.js",
+    "js/main.js"
+]
+
+# Files smaller than this are not worth precompressing
+MIN_COMPRESS_SIZE = 256
+
+# References to other files in a stylesheet, quoted or not
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+def css_references(css):
+    """Relative file references of a stylesheet, without query strings or fragments."""
+    for match in CSS_URL.finditer(css):
+        reference = match.group(2).strip()
+        if not re.match(r"^(data:|https?:|//|/|#)", reference):
+            yield reference
+
+def strip_reference(reference):
+    return re.split(r"[?#]", reference, maxsplit=1)[0]
+
+def fetch(url):
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read()
+
+def vendor(static_dir=STATIC_DIR, refresh=False):
+    """
+    Download the third-party assets, and the fonts and images their stylesheets use.
+
+    Args:
+        static_dir (str): The static directory
+        refresh (bool): Download files that are already there again
+    """
+    for path, url in VENDOR_ASSETS.items():
+        target = os.path.join(static_dir, path)
+        if refresh or not os.path.exists(target):
+            logging.info(f"Downloading {url}")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(fetch(url))
+
+        if not path.endswith(".css"):
+            continue
+        with open(target, encoding="utf-8") as f:
+            css = f.read()
+        for reference in sorted(set(map(strip_reference, css_references(css)))):
+            resource = os.path.normpath(os.path.join(os.path.dirname(target), reference))
+            if refresh or not os.path.exists(resource):
+                logging.info(f"Downloading {urljoin(url, reference)}")
+                os.makedirs(os.path.dirname(resource), exist_ok=True)
+                with open(resource, "wb") as f:
+                    f.write(fetch(urljoin(url, reference)))
+
+def minify_css(css):
+    """Remove comments and the whitespace CSS does not need."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    # Spaces before a colon can matter in selectors (a :hover), after it never
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+def minify_js(js):
+    """
+    Remove comment lines, indentation and blank lines from a script.
+
+    Deliberately conservative: code inside a line is left alone, and lines of
+    a template literal spanning several lines are kept exactly as they are.
+    """
+    lines = []
+    in_comment = in_template = False
+    for line in js.splitlines():
+        stripped = line.strip()
+        if in_template:
+            lines.append(line)
+        elif in_comment:
+            in_comment = "*/" not in stripped
+            continue
+        elif stripped.startswith("/*"):
+            in_comment = "*/" not in stripped
+            continue
+        elif stripped and not stripped.startswith("//"):
+            lines.append(stripped)
+        # An odd number of unescaped backticks opens or closes a multi-line template literal
+        if len(re.findall(r"(?<!\\)`", line)) % 2:
+            in_template = not in_template
+    return "\n".join(lines) + "\n"
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+def hashed_path(path, data):
+    """Put the content hash before the extension: css/style.css -> css/style.<hash>.css"""
+    root, extension = posixpath.splitext(path)
+    return f"{root}.{content_hash(data)}{extension}"
+
+def write_output(dist_dir, path, data):
+    """Write a built file with its gzip and brotli copies."""
+    target = os.path.join(dist_dir, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "wb") as f:
+        f.write(data)
+    if len(data) < MIN_COMPRESS_SIZE or path.endswith((".woff2", ".woff", ".png", ".jpg", ".gif", ".webp")):
+        return
+    # mtime=0 keeps the gzip copy identical across builds
+    with open(f"{target}.gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(f"{target}.br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+
+def build(static_dir=STATIC_DIR, dist_dir=None):
+    """
+    Minify, fingerprint and precompress ASSETS into static/dist.
+
+    Every file gets its content hash in its name, stylesheets have their url()
+    references rewritten to the fingerprinted files, and a manifest maps the
+    original paths to the built ones.
+
+    Args:
+        static_dir (str): The static directory
+        dist_dir (str, optional): Output directory, static/dist by default
+
+    Returns:
+        dict: The manifest
+    """
+    dist_dir = dist_dir or os.path.join(static_dir, "dist")
+    manifest = {}
+
+    def read(path):
+        with open(os.path.join(static_dir, path), "rb") as f:
+            return f.read()
+
+    for path in ASSETS:
+        data = read(path)
+        if path.endswith(".css"):
+            css = data.decode("utf-8")
+            # Fonts and images first, so the stylesheet can point at their fingerprinted names
+            for reference in set(css_references(css)):
+                referenced = posixpath.normpath(posixpath.join(posixpath.dirname(path), strip_reference(reference)))
+                if referenced not in manifest:
+                    resource = read(referenced)
+                    manifest[referenced] = hashed_path(referenced, resource)
+                    write_output(dist_dir, manifest[referenced], resource)
+
+            def rewrite(match, path=path):
+                reference = match.group(2).strip()
+                referenced = posixpath.normpath(posixpath.join(posixpath.dirname(path), strip_reference(reference)))
+                if referenced not in manifest:
+                    return match.group(0)
+                suffix = reference[len(strip_reference(reference)):]
+                return f"url({posixpath.relpath(manifest[referenced], posixpath.dirname(path))}{suffix})"
+
+            css = CSS_URL.sub(rewrite, css)
+            if not path.endswith(".min.css"):
+                css = minify_css(css)
+            data = css.encode("utf-8")
+        elif path.endswith(".js") and not path.endswith(".min.js"):
+            data = minify_js(data.decode("utf-8")).encode("utf-8")
+
+        manifest[path] = hashed_path(path, data)
+        write_output(dist_dir, manifest[path], data)
+
+    with open(os.path.join(dist_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def load_manifest(static_dir=STATIC_DIR):
+    """
+    Load the manifest of the last build.
+
+    Returns:
+        dict: Original paths under static/ mapped to their built paths under
+              static/dist, or an empty dict if the assets were never built
+    """
+    try:
+        with open(os.path.join(static_dir, "dist", "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def main(argv=None):
+    """Command line entry point: python -m utils.assets"""
+    parser = argparse.ArgumentParser(description="Vendor, minify, fingerprint and precompress the static assets.")
+    parser.add_argument("--refresh", action="store_true", help="Download the third-party assets again")
+    parser.add_argument("--offline", action="store_true", help="Build from the files already in static/ without downloading")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if not args.offline:
+        vendor(refresh=args.refresh)
+    missing = [path for path in ASSETS if not os.path.exists(os.path.join(STATIC_DIR, path))]
+    if missing:
+        print(f"Missing assets, run without --offline first: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    manifest = build()
+    total = sum(os.path.getsize(os.path.join(STATIC_DIR, "dist", path)) for path in manifest.values())
+    print(f"Built {len(manifest)} files ({total} bytes) into static/dist{'' if brotli else ', brotli not installed so gzip only'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
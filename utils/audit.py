@@ -0,0 +1,232 @@
+import re
+from urllib.parse import urlsplit
+from utils.crawler import PageParser, host_key
+from utils.seo_cache import normalize_url
+
+# Recommended lengths in characters, outside them search results truncate or pad the snippet
+TITLE_LENGTH = (30, 60)
+DESCRIPTION_LENGTH = (70, 160)
+
+# Share of the page's words that should be the keyword, in percent
+KEYWORD_DENSITY = (0.5, 3.0)
+
+# Checks whose findings depend on the keyword
+KEYWORD_CHECKS = ("Keyword density",)
+
+# Order findings are listed in
+STATUS_ORDER = {"error": 0, "warning": 1, "ok": 2}
+
+WORD = re.compile(r"\w+")
+
+class AuditParser(PageParser):
+    """
+    Page parser that also counts words, keyword occurrences and images.
+
+    Everything is counted as the text streams through, in the same single
+    pass that extracts the title, headings and links: the visible text is
+    never joined or kept, only the last few words needed to find a
+    multi-word keyword split across text nodes.
+    """
+
+    def __init__(self, url, keyword):
+        super().__init__(url)
+        self.keyword = WORD.findall((keyword or "").casefold())
+        self.words = 0
+        self.keyword_hits = 0
+        self.images = 0
+        self.images_without_alt = 0
+        self._phrase = f" {' '.join(self.keyword)} "
+        self._tail = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "img":
+            self.images += 1
+            # alt="" is right for decorative images, only a missing alt is a gap
+            if not any(name == "alt" for name, _ in attrs):
+                self.images_without_alt += 1
+        super().handle_starttag(tag, attrs)
+
+    def handle_data(self, data):
+        super().handle_data(data)
+        if self._skip or self._heading == "title":
+            return
+        words = WORD.findall(data.casefold())
+        if not words:
+            return
+        self.words += len(words)
+        if len(self.keyword) == 1:
+            self.keyword_hits += words.count(self.keyword[0])
+        elif self.keyword:
+            # Prepend the previous text's last words, too few to hold a match on their own
+            window = self._tail + words
+            self.keyword_hits += f" {' '.join(window)} ".count(self._phrase)
+            self._tail = window[1 - len(self.keyword):]
+
+    def page(self):
+        page = super().page()
+        page.update(words=self.words, keyword_hits=self.keyword_hits, images=self.images, images_without_alt=self.images_without_alt)
+        return page
+
+def audit_page(url, html, keyword):
+    """
+    Parse a page and count what the audit needs.
+
+    Args:
+        url (str): URL the page was served from, for resolving relative links
+        html (str): The page
+        keyword (str): The target keyword
+
+    Returns:
+        dict: What parse_page extracts, plus words, keyword_hits, images and
+              images_without_alt
+    """
+    parser = AuditParser(url, keyword)
+    parser.feed(html)
+    parser.close()
+    return parser.page()
+
+def density(hits, keyword_words, words):
+    """Percent of the words that belong to a keyword occurrence."""
+    return 100 * hits * keyword_words / words if words else 0.0
+
+def check_length(text, bounds, name):
+    """A finding about the length of a title or description, or None if it is fine."""
+    low, high = bounds
+    if len(text) < low:
+        return "warning", f"{name} is {len(text)} characters, aim for {low}–{high}"
+    if len(text) > high:
+        return "warning", f"{name} is {len(text)} characters and will be cut off, aim for {low}–{high}"
+    return None
+
+def check_headings(headings):
+    """Findings about the heading outline of a page."""
+    levels = [level for level, _ in headings]
+    h1s = levels.count(1)
+    if not h1s:
+        yield "error", "No H1 heading"
+    elif h1s > 1:
+        yield "warning", f"{h1s} H1 headings, use one per page"
+    if levels and levels[0] != 1:
+        yield "warning", f"The first heading is an H{levels[0]}, not the H1"
+    for previous, level in zip(levels, levels[1:]):
+        if level > previous + 1:
+            yield "warning", f"An H{previous} is followed by an H{level}, skipping a level"
+            break
+
+def audit_site(pages, keyword):
+    """
+    Audit crawled pages for on-page SEO problems.
+
+    Checks each page's title and meta description length, heading outline,
+    keyword density and image alt text, then across pages for duplicate
+    titles and internal links to pages that failed.
+
+    Args:
+        pages (list): Pages as returned by Crawler.crawl with audit_page
+        keyword (str): The target keyword
+
+    Returns:
+        list: Findings, each a dict with check, page, status (error, warning
+              or ok) and detail; site-wide summaries first, then page
+              problems by severity
+    """
+    if not pages:
+        return []
+    site = host_key(pages[0]["url"])
+    keyword_words = len(WORD.findall((keyword or "").casefold()))
+    statuses = {page["url"]: page["status"] for page in pages}
+    ok_pages = [page for page in pages if 200 <= page["status"] < 400]
+    findings = []
+
+    def path(url):
+        parts = urlsplit(url)
+        return parts.path + (f"?{parts.query}" if parts.query else "") or "/"
+
+    def add(check, url, status, detail):
+        findings.append({"check": check, "page": path(url), "status": status, "detail": detail})
+
+    # Pages link to the same few URLs over and over, normalize each once
+    normalized = {}
+    titles = {}
+    for page in ok_pages:
+        url = page["url"]
+        title = (page["title"] or "").strip()
+        if not title:
+            add("Title", url, "error", "The page has no title")
+        else:
+            titles.setdefault(title.casefold(), []).append(url)
+            finding = check_length(title, TITLE_LENGTH, "The title")
+            if finding:
+                add("Title", url, *finding)
+
+        description = page["meta"].get("description", "").strip()
+        if not description:
+            add("Meta description", url, "warning", "The page has no meta description")
+        else:
+            finding = check_length(description, DESCRIPTION_LENGTH, "The meta description")
+            if finding:
+                add("Meta description", url, *finding)
+
+        for finding in check_headings(page["headings"]):
+            add("Headings", url, *finding)
+
+        if keyword_words and page["words"]:
+            page_density = density(page["keyword_hits"], keyword_words, page["words"])
+            if not page["keyword_hits"]:
+                add("Keyword density", url, "warning", f'"{keyword}" does not appear in the page text')
+            elif page_density < KEYWORD_DENSITY[0]:
+                add("Keyword density", url, "warning", f'"{keyword}" is {page_density:.2f}% of the text, aim for {KEYWORD_DENSITY[0]}–{KEYWORD_DENSITY[1]}%')
+            elif page_density > KEYWORD_DENSITY[1]:
+                add("Keyword density", url, "warning", f'"{keyword}" is {page_density:.2f}% of the text, which reads as keyword stuffing')
+
+        if page["images_without_alt"]:
+            add("Image alt text", url, "warning", f"{page['images_without_alt']} of {page['images']} images have no alt text")
+
+        broken = []
+        for link in page["links"]:
+            if link not in normalized:
+                internal = urlsplit(link).scheme in ("http", "https") and host_key(link) == site
+                normalized[link] = normalize_url(link) if internal else None
+            if normalized[link] is not None:
+                status = statuses.get(normalized[link])
+                if status is not None and not 200 <= status < 400 and link not in broken:
+                    broken.append(link)
+                    add("Broken internal link", url, "error", f"Links to {path(link)} ({status or 'unreachable'})")
+
+    for urls in titles.values():
+        if len(urls) > 1:
+            add("Duplicate title", urls[0], "error", f"The same title is used by {len(urls)} pages: {', '.join(path(url) for url in urls)}")
+
+    findings.sort(key=lambda finding: STATUS_ORDER[finding["status"]])
+
+    # Site-wide summaries go first
+    words = sum(page["words"] for page in ok_pages)
+    hits = sum(page["keyword_hits"] for page in ok_pages)
+    images = sum(page["images"] for page in ok_pages)
+    without_alt = sum(page["images_without_alt"] for page in ok_pages)
+    summary = [{
+        "check": "Pages audited",
+        "page": "All pages",
+        "status": "ok" if len(ok_pages) == len(pages) else "warning",
+        "detail": f"{len(ok_pages)} of {len(pages)} pages loaded"
+    }]
+    if keyword_words and words:
+        site_density = density(hits, keyword_words, words)
+        summary.append({
+            "check": "Keyword density",
+            "page": "All pages",
+            "status": "ok" if KEYWORD_DENSITY[0] <= site_density <= KEYWORD_DENSITY[1] else "warning",
+            "detail": f'"{keyword}" appears {hits} times in {words} words ({site_density:.2f}%)'
+        })
+    if images:
+        summary.append({
+            "check": "Image alt text",
+            "page": "All pages",
+            "status": "ok" if not without_alt else "warning",
+            "detail": f"{100 * (images - without_alt) / images:.0f}% of {images} images have alt text"
+        })
+    return summary + findings
+
+def keyword_independent(findings):
+    """The findings that hold for any keyword, for reusing an audit made for a similar one."""
+    return [finding for finding in findings if finding["check"] not in KEYWORD_CHECKS]
@@ -0,0 +1,448 @@
+import os
+import io
+import csv
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.together_ai import generate_seo_content, simplify_seo_data
+from utils.export import RESULT_HEADER, result_rows
+
+# Row states
+ROW_PENDING = "pending"
+ROW_DONE = "done"
+ROW_FAILED = "failed"
+
+# Columns of the combined export
+EXPORT_HEADER = ['Website URL', 'Keyword'] + RESULT_HEADER
+
+# Accepted spellings of the CSV columns
+URL_COLUMNS = ("website_url", "url", "website", "site")
+KEYWORD_COLUMNS = ("keyword", "target_keyword", "keywords")
+
+def default_db_path():
+    """
+    Get the default location of the batch database.
+
+    Returns:
+        str: Path taken from BATCH_DB, or a file in the temp directory
+    """
+    return os.environ.get("BATCH_DB", os.path.join(tempfile.gettempdir(), "seo_batches.sqlite3"))
+
+def parse_batch_csv(text, max_rows=None):
+    """
+    Parse an uploaded CSV of website URL / keyword pairs.
+
+    The file may have a header row naming the columns (website_url/url and
+    keyword), otherwise the first two columns are used. Blank rows and exact
+    duplicates are skipped.
+
+    Args:
+        text (str): The CSV file contents
+        max_rows (int, optional): Maximum number of rows accepted
+
+    Returns:
+        list or tuple: List of (website_url, keyword) tuples if successful,
+                      or tuple (None, error_message) if the file is invalid
+    """
+    rows = [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+    if not rows:
+        return None, "The CSV file is empty."
+
+    url_index, keyword_index = 0, 1
+    header = [cell.strip().lower().replace(" ", "_") for cell in rows[0]]
+    if any(name in header for name in URL_COLUMNS + KEYWORD_COLUMNS):
+        url_index = next((header.index(name) for name in URL_COLUMNS if name in header), None)
+        keyword_index = next((header.index(name) for name in KEYWORD_COLUMNS if name in header), None)
+        if url_index is None or keyword_index is None:
+            return None, "The CSV header must contain a website_url and a keyword column."
+        rows = rows[1:]
+
+    pairs = []
+    seen = set()
+    for line_number, row in enumerate(rows, start=1):
+        if len(row) <= max(url_index, keyword_index):
+            return None, f"Row {line_number} needs both a website URL and a keyword."
+        pair = (row[url_index].strip(), row[keyword_index].strip())
+        if not pair[0] or not pair[1]:
+            return None, f"Row {line_number} needs both a website URL and a keyword."
+        if pair in seen:
+            continue
+        seen.add(pair)
+        pairs.append(pair)
+
+    if not pairs:
+        return None, "The CSV file has no website URL / keyword rows."
+    if max_rows and len(pairs) > max_rows:
+        return None, f"The CSV file has {len(pairs)} rows, the limit is {max_rows}."
+    return pairs
+
+def export_rows(website_url, keyword, seo_data):
+    """
+    Flatten one result into rows of the combined export.
+
+    Args:
+        website_url (str): The website URL of the row
+        keyword (str): The keyword of the row
+        seo_data (dict): The simplified SEO data
+
+    Returns:
+        list: Export rows matching EXPORT_HEADER
+    """
+    return [[website_url, keyword] + row for row in result_rows(seo_data)]
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting how fast requests are started.
+    """
+
+    def __init__(self, rate, burst=1):
+        """
+        Args:
+            rate (float): Requests allowed per second, 0 or less means unlimited
+            burst (int): Requests that may start back to back
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may start."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class BatchStore:
+    """
+    SQLite record of batches and the state of every row.
+
+    Each row is marked done (with its result) or failed as soon as it finishes,
+    so a batch interrupted by a crash or restart resumes with only the rows
+    that never finished.
+    """
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Path of the SQLite database file
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS batches (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                sheet_url TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS batch_rows (
+                batch_id TEXT NOT NULL,
+                row_index INTEGER NOT NULL,
+                website_url TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (batch_id, row_index)
+            )
+        """)
+
+    def _connect(self):
+        """Return the SQLite connection owned by the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create_batch(self, name, pairs, batch_id=None):
+        """
+        Record a new batch, or return the existing one with the same ID.
+
+        Args:
+            name (str): Display name, e.g. the uploaded file name
+            pairs (list): (website_url, keyword) tuples
+            batch_id (str, optional): ID to use, a random one by default
+
+        Returns:
+            str: The batch ID
+        """
+        batch_id = batch_id or uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM batches WHERE id = ?", (batch_id,)).fetchone() is None:
+                conn.execute("INSERT INTO batches (id, name, created_at) VALUES (?, ?, ?)", (batch_id, name, now))
+                conn.executemany(
+                    "INSERT INTO batch_rows (batch_id, row_index, website_url, keyword, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(batch_id, i, url, keyword, ROW_PENDING, now) for i, (url, keyword) in enumerate(pairs)]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return batch_id
+
+    def get_batch(self, batch_id):
+        """
+        Get a batch with its row counts.
+
+        Returns:
+            dict or None: id, name, sheet_url, total, a count per row state and
+                          updated_at, when a row last changed
+        """
+        conn = self._connect()
+        batch = conn.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+        if batch is None:
+            return None
+
+        counts = {}
+        updated_at = batch["created_at"]
+        for status, count, last_update in conn.execute(
+            "SELECT status, COUNT(*), MAX(updated_at) FROM batch_rows WHERE batch_id = ? GROUP BY status", (batch_id,)
+        ):
+            counts[status] = count
+            updated_at = max(updated_at, last_update)
+        info = dict(batch)
+        info.update({
+            "updated_at": updated_at,
+            "total": sum(counts.values()),
+            ROW_PENDING: counts.get(ROW_PENDING, 0),
+            ROW_DONE: counts.get(ROW_DONE, 0),
+            ROW_FAILED: counts.get(ROW_FAILED, 0)
+        })
+        return info
+
+    def get_rows(self, batch_id, statuses=None, with_results=False):
+        """
+        Get the rows of a batch in upload order.
+
+        Args:
+            batch_id (str): The batch ID
+            statuses (tuple, optional): Only return rows in these states
+            with_results (bool): Decode and include the stored results
+
+        Returns:
+            list: Row dicts
+        """
+        columns = "row_index, website_url, keyword, status, error, updated_at"
+        if with_results:
+            columns += ", result"
+        query = f"SELECT {columns} FROM batch_rows WHERE batch_id = ?"
+        params = [batch_id]
+        if statuses:
+            query += f" AND status IN ({', '.join('?' for _ in statuses)})"
+            params.extend(statuses)
+
+        rows = []
+        for row in self._connect().execute(query + " ORDER BY row_index", params):
+            row = dict(row)
+            if with_results:
+                row["result"] = json.loads(row["result"]) if row["result"] else None
+            rows.append(row)
+        return rows
+
+    def mark_row(self, batch_id, row_index, status, result=None, error=None):
+        self._connect().execute(
+            "UPDATE batch_rows SET status = ?, result = ?, error = ?, updated_at = ? "
+            "WHERE batch_id = ? AND row_index = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), batch_id, row_index)
+        )
+
+    def retry_failed(self, batch_id):
+        """Put the failed rows of a batch back to pending."""
+        self._connect().execute(
+            "UPDATE batch_rows SET status = ?, error = NULL WHERE batch_id = ? AND status = ?",
+            (ROW_PENDING, batch_id, ROW_FAILED)
+        )
+
+    def set_sheet_url(self, batch_id, sheet_url):
+        self._connect().execute("UPDATE batches SET sheet_url = ? WHERE id = ?", (sheet_url, batch_id))
+
+    def iter_export_rows(self, batch_id):
+        """
+        Yield the combined export rows of every finished row, one result at a time.
+
+        Args:
+            batch_id (str): The batch ID
+
+        Yields:
+            list: Export rows matching EXPORT_HEADER
+        """
+        cursor = self._connect().execute(
+            "SELECT website_url, keyword, result FROM batch_rows "
+            "WHERE batch_id = ? AND status = ? ORDER BY row_index",
+            (batch_id, ROW_DONE)
+        )
+        for website_url, keyword, result in cursor:
+            yield from export_rows(website_url, keyword, json.loads(result))
+
+def process_row(row):
+    """
+    Generate the SEO content of one batch row.
+
+    Args:
+        row (dict): The batch row with website_url and keyword
+
+    Returns:
+        dict: The simplified SEO data with the on-page audit
+
+    Raises:
+        RuntimeError: If generation failed
+    """
+    result = generate_seo_content(row["website_url"], row["keyword"])
+    if isinstance(result, tuple) and len(result) == 2:
+        error_type, error_msg = result
+        raise RuntimeError(f"{error_type}: {error_msg}")
+    if result is None:
+        raise RuntimeError("No SEO content was generated")
+    seo_data = simplify_seo_data(result, row["keyword"])
+    seo_data["audit"] = result.get("audit", []) if isinstance(result, dict) else []
+    return seo_data
+
+def run_batch(store, batch_id, concurrency=4, rate=1.0, on_row=None):
+    """
+    Generate SEO content for every unfinished row of a batch.
+
+    Rows are processed by a pool of concurrency threads, and new requests are
+    started no faster than the rate limit. Each row is recorded as soon as it
+    finishes, so running this again after an interruption resumes the batch.
+
+    Args:
+        store (BatchStore): The batch store
+        batch_id (str): The batch ID
+        concurrency (int): Maximum rows generated at the same time
+        rate (float): Maximum requests started per second, 0 for unlimited
+        on_row (callable, optional): Called with (row, status, result, error)
+            after each row, from the worker thread that processed it
+
+    Returns:
+        dict: The batch with its final row counts
+    """
+    pending = store.get_rows(batch_id, statuses=(ROW_PENDING,))
+    logging.info(f"Batch {batch_id}: {len(pending)} rows to generate with concurrency {concurrency}")
+    limiter = RateLimiter(rate, burst=concurrency)
+
+    def work(row):
+        limiter.acquire()
+        try:
+            seo_data = process_row(row)
+        except Exception as e:
+            logging.warning(f"Batch {batch_id} row {row['row_index']} failed: {str(e)}")
+            store.mark_row(batch_id, row["row_index"], ROW_FAILED, error=str(e))
+            status, result, error = ROW_FAILED, None, str(e)
+        else:
+            store.mark_row(batch_id, row["row_index"], ROW_DONE, result=seo_data)
+            status, result, error = ROW_DONE, seo_data, None
+
+        if on_row is not None:
+            try:
+                on_row(row, status, result, error)
+            except Exception as e:
+                logging.warning(f"Error reporting batch progress: {str(e)}")
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        # Consume the results so unexpected errors surface here
+        list(executor.map(work, pending))
+
+    return store.get_batch(batch_id)
+
+def main(argv=None):
+    """Command line entry point: python -m utils.batch input.csv --output results.csv"""
+    parser = argparse.ArgumentParser(description="Generate SEO content for every website URL / keyword pair in a CSV file.")
+    parser.add_argument("input", help="CSV file with website_url and keyword columns")
+    parser.add_argument("--output", "-o", help="Combined CSV export to write (default: <input>_seo.csv)")
+    parser.add_argument("--concurrency", "-c", type=int, default=int(os.environ.get("BATCH_CONCURRENCY", 4)),
+                        help="Rows generated at the same time")
+    parser.add_argument("--rate", "-r", type=float, default=float(os.environ.get("BATCH_RATE_PER_SEC", 1.0)),
+                        help="Maximum requests started per second (0 for unlimited)")
+    parser.add_argument("--db", default=default_db_path(), help="Batch database used to resume interrupted runs")
+    parser.add_argument("--retry-failed", action="store_true", help="Generate previously failed rows again")
+    parser.add_argument("--sheets", action="store_true", help="Also export the results to one Google Sheet")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    with open(args.input, newline="", encoding="utf-8-sig") as f:
+        text = f.read()
+    pairs = parse_batch_csv(text)
+    if isinstance(pairs, tuple):
+        print(pairs[1], file=sys.stderr)
+        return 1
+
+    # The same input file always maps to the same batch, so rerunning resumes it
+    batch_id = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+    store = BatchStore(args.db)
+    store.create_batch(os.path.basename(args.input), pairs, batch_id=batch_id)
+    if args.retry_failed:
+        store.retry_failed(batch_id)
+
+    batch = store.get_batch(batch_id)
+    finished = batch[ROW_DONE] + batch[ROW_FAILED]
+    print(f"Batch {batch_id}: {batch['total']} rows, {finished} already finished")
+
+    # Rebuild the export from the rows finished so far, then append each row as it completes
+    output = args.output or f"{os.path.splitext(args.input)[0]}_seo.csv"
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_HEADER)
+        writer.writerows(store.iter_export_rows(batch_id))
+
+        progress_lock = threading.Lock()
+        progress = {"finished": finished}
+
+        def on_row(row, status, result, error):
+            with progress_lock:
+                progress["finished"] += 1
+                if result is not None:
+                    writer.writerows(export_rows(row["website_url"], row["keyword"], result))
+                    f.flush()
+                detail = f" ({error})" if error else ""
+                print(f"[{progress['finished']}/{batch['total']}] {status}: {row['website_url']} / {row['keyword']}{detail}")
+
+        batch = run_batch(store, batch_id, concurrency=args.concurrency, rate=args.rate, on_row=on_row)
+
+    print(f"Wrote {output}: {batch[ROW_DONE]} rows done, {batch[ROW_FAILED]} failed")
+
+    if args.sheets:
+        from utils.google_sheets import save_batch_to_google_sheets
+        sheet_result = save_batch_to_google_sheets(batch["name"], store.iter_export_rows(batch_id))
+        if isinstance(sheet_result, tuple):
+            print(f"Google Sheets: {sheet_result[1]}", file=sys.stderr)
+        elif sheet_result:
+            store.set_sheet_url(batch_id, sheet_result)
+            print(f"Google Sheet: {sheet_result}")
+
+    return 0 if batch[ROW_FAILED] == 0 else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import os
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    # Without brotli responses are only gzip-compressed
+    brotli = None
+
+# Suffixes added to the ETag of a compressed response, see strip_encoding_suffix
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+# Mimetypes worth compressing; images, archives, XLSX and Parquet already are
+COMPRESSIBLE_MIMETYPES = {
+    "text/html", "text/css", "text/plain", "text/csv", "text/javascript", "text/xml",
+    "application/json", "application/javascript", "application/x-ndjson", "application/xml", "image/svg+xml"
+}
+
+def strip_encoding_suffix(etag):
+    """The ETag of the uncompressed response, given the ETag of a compressed one."""
+    for suffix in ENCODING_SUFFIXES:
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)]
+    return etag
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits 16 + MAX_WBITS writes the gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        # A sync flush hands every chunk on instead of holding it for a bigger block
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+class Compress:
+    """
+    Compress responses with brotli or gzip, whichever the client prefers.
+
+    Responses are skipped when they are already encoded, too small to gain
+    anything, of a type that does not compress, or marked no-transform.
+    Streamed responses are compressed chunk by chunk as they are sent, so a
+    streaming download starts just as early and is never buffered whole.
+    Server-sent event streams are left alone so events arrive unchanged.
+    """
+
+    def __init__(self, app=None, min_size=500, level=6, brotli_quality=5):
+        """
+        Args:
+            app (Flask, optional): The app to install on
+            min_size (int): Smallest body in bytes that is compressed
+            level (int): gzip compression level
+            brotli_quality (int): brotli quality, lower is faster
+        """
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Compress the responses of an app. COMPRESS_MIN_SIZE and COMPRESS_LEVEL override the defaults."""
+        self.min_size = int(os.environ.get("COMPRESS_MIN_SIZE", self.min_size))
+        self.level = int(os.environ.get("COMPRESS_LEVEL", self.level))
+        app.after_request(self.process_response)
+
+    def choose_encoding(self):
+        """The best encoding the client accepts, or None."""
+        accepted = request.accept_encodings
+        if brotli is not None and accepted["br"] and accepted["br"] >= accepted["gzip"]:
+            return "br"
+        if accepted["gzip"]:
+            return "gzip"
+        return None
+
+    def _stream(self, encoding):
+        return _BrotliStream(self.brotli_quality) if encoding == "br" else _GzipStream(self.level)
+
+    def process_response(self, response):
+        """Compress a response if it is worth it and the client accepts it."""
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or "Content-Encoding" in response.headers
+                or "no-transform" in response.headers.get("Cache-Control", "")
+                or response.direct_passthrough):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = self.choose_encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            body = self._compress_iter(response.response, encoding)
+            response.response = body
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            stream = self._stream(encoding)
+            response.set_data(stream.compress(data) + stream.finish())
+
+        response.headers["Content-Encoding"] = encoding
+        # The compressed body is a different representation of the same resource
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f"{etag}-{encoding}")
+        return response
+
+    def _compress_iter(self, chunks, encoding):
+        stream = self._stream(encoding)
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                if chunk:
+                    yield stream.compress(chunk)
+            yield stream.finish()
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
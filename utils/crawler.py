@@ -0,0 +1,752 @@
+import os
+import re
+import gzip
+import codecs
+import socket
+import ipaddress
+import time
+import zlib
+import asyncio
+import sqlite3
+import logging
+import tempfile
+import threading
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+from utils.seo_cache import normalize_url
+from utils.metrics import get_metrics
+
+USER_AGENT = "SEOAssistantBot/1.0"
+
+# Bodies larger than this are cut off, nothing an SEO digest needs comes that late
+MAX_BODY_BYTES = 2 * 1024 * 1024
+
+# Nested sitemap indexes followed per crawl
+MAX_SITEMAPS = 5
+
+# Redirect hops followed per request, each one checked like the first
+MAX_REDIRECTS = 5
+
+# Meta tags kept from every page, by name or property
+META_NAMES = ("description", "keywords", "robots", "og:title", "og:description", "og:type", "twitter:title", "twitter:description")
+
+def host_key(url):
+    """The host of a URL without a www. prefix, so both spellings count as one site."""
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+def resolve(host):
+    """The addresses a host name resolves to, in the resolver's order; empty if it does not resolve."""
+    if not host:
+        return []
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        return []
+    # Scoped IPv6 addresses come back as fe80::1%eth0
+    return list(dict.fromkeys(info[4][0].split("%", 1)[0] for info in infos))
+
+def all_public(addresses):
+    """
+    Whether there are addresses and every one of them is publicly routable.
+
+    Loopback, private, link-local (cloud metadata at 169.254.169.254) and
+    reserved addresses are not, so submitted URLs cannot make the server
+    fetch from inside its own network.
+    """
+    return bool(addresses) and all(ipaddress.ip_address(address).is_global for address in addresses)
+
+def is_public_host(host):
+    """Whether every address a host name resolves to is publicly routable, see all_public()."""
+    return all_public(resolve(host))
+
+class BlockedAddressError(requests.ConnectionError):
+    """The host of a request resolved to an address the crawler may not connect to."""
+
+class PinnedAddressAdapter(HTTPAdapter):
+    """
+    Connect to the address that was checked, not to what the host resolves to later.
+
+    Every request, and so every redirect hop, resolves its host once, checks
+    the addresses and is sent to the first of them, with the original Host
+    header and TLS server name. A DNS answer that changes between the check
+    and the connection (DNS rebinding) cannot point the crawler elsewhere.
+    """
+
+    def __init__(self, allow_private=False, **kwargs):
+        """
+        Args:
+            allow_private (bool): Also connect to loopback and private addresses
+            **kwargs: Passed on to HTTPAdapter
+        """
+        self.allow_private = allow_private
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        url = request.url
+        parts = urlsplit(url)
+        addresses = resolve(parts.hostname)
+        if not addresses or not (self.allow_private or all_public(addresses)):
+            raise BlockedAddressError(f"{parts.hostname} does not resolve to a public address", request=request)
+        host = f"[{addresses[0]}]" if ":" in addresses[0] else addresses[0]
+        request.headers["Host"] = parts.netloc.rsplit("@", 1)[-1]
+        request.url = urlunsplit((parts.scheme, f"{host}:{parts.port}" if parts.port else host, parts.path, parts.query, ""))
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            request.url = url
+        response.url = url
+        return response
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        if host_params["scheme"] == "https":
+            # The certificate is checked against the host name, not the address connected to
+            hostname = urlsplit(f"//{request.headers['Host']}").hostname
+            pool_kwargs.update(server_hostname=hostname, assert_hostname=hostname)
+        return host_params, pool_kwargs
+
+# charset in a Content-Type header, and in a <meta> tag or XML declaration near the start of a document
+HEADER_CHARSET = re.compile(r";\s*charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+DOCUMENT_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)|<\?xml[^>]+encoding\s*=\s*["']([\w.:-]+)""", re.I)
+
+# Byte order marks, which take precedence over any declared charset
+BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+def known_encoding(name):
+    """The codec name if Python knows it, else None."""
+    try:
+        return codecs.lookup(name).name if name else None
+    except LookupError:
+        return None
+
+def header_charset(content_type):
+    """The charset given in a Content-Type header, or None if there is none."""
+    match = HEADER_CHARSET.search(content_type or "")
+    return known_encoding(match.group(1)) if match else None
+
+def decode_body(response):
+    """
+    Decode a fetched body as text.
+
+    The charset of the Content-Type header wins when there is one. Without
+    it, a byte order mark, then a <meta charset> or XML declaration in the
+    first kilobytes, then valid UTF-8, then the detected encoding are tried:
+    the ISO-8859-1 default HTTP gives text/* responses would garble every
+    UTF-8 page that only declares its charset in the markup.
+    """
+    body = response["body"]
+    encoding = response["encoding"]
+    if not encoding:
+        encoding = next((name for bom, name in BOMS if body.startswith(bom)), None)
+    if not encoding:
+        match = DOCUMENT_CHARSET.search(body[:4096])
+        if match:
+            encoding = known_encoding((match.group(1) or match.group(2)).decode("ascii"))
+    if not encoding:
+        try:
+            return body.decode("utf-8")
+        except UnicodeDecodeError:
+            encoding = known_encoding(chardet.detect(body)["encoding"]) if chardet else None
+    return body.decode(encoding or "utf-8", "replace")
+
+def keeps_body(content_type):
+    """Whether a response body is worth caching: pages, sitemaps and robots.txt, not images or downloads."""
+    content_type = content_type.lower()
+    return content_type.startswith("text/") or "html" in content_type or "xml" in content_type or "gzip" in content_type
+
+class PageParser(HTMLParser):
+    """
+    Pull the title, meta tags, headings and links out of a page in one pass.
+
+    Text is only collected inside the title and headings, and scripts and
+    styles are skipped entirely, so parsing costs little beyond tokenizing.
+    """
+
+    def __init__(self, url):
+        super().__init__(convert_charrefs=True)
+        self.base = url
+        self.title = None
+        self.meta = {}
+        self.canonical = None
+        self.headings = []
+        self.links = []
+        self._text = None
+        self._heading = None
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style", "noscript", "template"):
+            self._skip += 1
+            return
+        attrs = dict(attrs)
+        if tag == "a":
+            href = (attrs.get("href") or "").strip()
+            if href and not href.startswith(("#", "mailto:", "tel:", "javascript:")):
+                self.links.append(urljoin(self.base, href).split("#", 1)[0])
+        elif tag == "meta":
+            name = (attrs.get("name") or attrs.get("property") or "").lower()
+            if name in META_NAMES and attrs.get("content") and name not in self.meta:
+                self.meta[name] = " ".join(attrs["content"].split())
+        elif tag == "link":
+            if "canonical" in (attrs.get("rel") or "").lower().split() and attrs.get("href"):
+                self.canonical = urljoin(self.base, attrs["href"].strip())
+        elif tag == "base" and attrs.get("href"):
+            self.base = urljoin(self.base, attrs["href"].strip())
+        elif tag in ("h1", "h2", "h3", "h4", "h5", "h6") or (tag == "title" and self.title is None):
+            self._heading = tag
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "noscript", "template"):
+            self._skip = max(self._skip - 1, 0)
+        elif tag == self._heading:
+            text = " ".join("".join(self._text).split())
+            if tag == "title":
+                self.title = text
+            elif text:
+                self.headings.append((int(tag[1]), text))
+            self._heading = self._text = None
+
+    def handle_data(self, data):
+        if self._text is not None and not self._skip:
+            self._text.append(data)
+
+    def page(self):
+        """What was extracted, once the whole page has been fed."""
+        return {
+            "title": self.title,
+            "meta": self.meta,
+            "canonical": self.canonical,
+            "headings": self.headings,
+            "links": self.links
+        }
+
+def parse_page(url, html):
+    """
+    Extract what the SEO digest needs from a page.
+
+    Args:
+        url (str): URL the page was served from, for resolving relative links
+        html (str): The page
+
+    Returns:
+        dict: title, meta (name -> content), canonical, headings as
+              (level, text) pairs and the absolute URLs of all links
+    """
+    parser = PageParser(url)
+    parser.feed(html)
+    parser.close()
+    return parser.page()
+
+def sitemap_locations(xml):
+    """
+    Read a sitemap or sitemap index.
+
+    Returns:
+        tuple: (page URLs, nested sitemap URLs)
+    """
+    try:
+        root = ElementTree.fromstring(xml)
+    except ElementTree.ParseError:
+        return [], []
+    # Tags are namespaced, {http://www.sitemaps.org/schemas/sitemap/0.9}loc
+    locations = [element.text.strip() for element in root.iter() if element.tag.endswith("loc") and element.text]
+    if root.tag.endswith("sitemapindex"):
+        return [], locations
+    return locations, []
+
+class PageCache:
+    """
+    Persistent cache of fetched pages, robots.txt files and sitemaps.
+
+    Entries live in one SQLite file so all gunicorn workers share them. An
+    entry younger than fresh_for is used without asking the site; an older one
+    is revalidated with If-None-Match / If-Modified-Since, so an unchanged page
+    costs a 304 instead of a download. Entries not fetched for ttl seconds,
+    and the least recently fetched beyond max_entries, are evicted.
+    """
+
+    def __init__(self, db_path, fresh_for=3600, ttl=7 * 24 * 3600, max_entries=5000):
+        """
+        Args:
+            db_path (str): Path of the SQLite database file
+            fresh_for (int): Seconds an entry is used without revalidation
+            ttl (int): Seconds an entry is kept after it was last fetched or revalidated
+            max_entries (int): Maximum number of entries kept
+        """
+        self.db_path = db_path
+        self.fresh_for = fresh_for
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                final_url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                content_type TEXT NOT NULL,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._connect().execute("CREATE INDEX IF NOT EXISTS pages_fetched_at ON pages (fetched_at)")
+
+    def _connect(self):
+        """Return the SQLite connection owned by the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, url):
+        """
+        Look up a cached response.
+
+        Returns:
+            dict or None: The response as stored by set(), with a "fresh" flag
+        """
+        row = self._connect().execute(
+            "SELECT final_url, status, content_type, encoding, etag, last_modified, body, fetched_at "
+            "FROM pages WHERE url = ? AND fetched_at > ?", (url, time.time() - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        final_url, status, content_type, encoding, etag, last_modified, body, fetched_at = row
+        return {
+            "url": url,
+            "final_url": final_url,
+            "status": status,
+            "content_type": content_type,
+            "encoding": encoding,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": zlib.decompress(body),
+            "fresh": fetched_at > time.time() - self.fresh_for
+        }
+
+    def set(self, response):
+        """Store a response as returned by Crawler.fetch and evict old entries."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (url, final_url, status, content_type, encoding, etag, last_modified, body, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (response["url"], response["final_url"], response["status"], response["content_type"], response["encoding"],
+                 response["etag"], response["last_modified"], zlib.compress(response["body"]), now)
+            )
+            conn.execute("DELETE FROM pages WHERE fetched_at <= ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM pages WHERE url IN (SELECT url FROM pages ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def touch(self, url):
+        """Mark an entry as just revalidated."""
+        self._connect().execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+class Crawler:
+    """
+    Polite, bounded-concurrency crawler of one site.
+
+    A crawl starts at the submitted URL and the pages listed in the site's
+    sitemaps, then follows internal links breadth first until max_pages pages
+    are seen or the time budget runs out. It runs on an asyncio event loop
+    with at most `concurrency` requests in flight; the blocking HTTP calls run
+    on a pooled keep-alive session in a thread pool. robots.txt is honored,
+    including its Crawl-delay, and requests to one host are spaced at least
+    `delay` seconds apart across every crawl in the process.
+    """
+
+    def __init__(self, cache=None, max_pages=20, max_depth=3, concurrency=8, delay=0.25, timeout=10, time_budget=15,
+                 allow_private=False):
+        """
+        Args:
+            cache (PageCache, optional): Cache of fetched responses
+            max_pages (int): Most pages parsed per crawl
+            max_depth (int): Most links followed from the start page
+            concurrency (int): Most requests in flight at once
+            delay (float): Least seconds between two requests to one host
+            timeout (float): Seconds to wait for a connection and between bytes of a response
+            time_budget (float): Seconds after which a crawl returns the pages it has
+            allow_private (bool): Also crawl hosts on loopback and private
+                networks, for local development and tests only
+        """
+        self.cache = cache
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.delay = delay
+        self.timeout = timeout
+        self.time_budget = time_budget
+        self.allow_private = allow_private
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = PinnedAddressAdapter(allow_private, pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="crawler")
+        self._next_request = {}
+        self._next_request_lock = threading.Lock()
+
+    def allowed(self, url, site):
+        """
+        Whether a URL, or a redirect to it, may be fetched: http(s) and on the site.
+
+        Its address is checked by the session's PinnedAddressAdapter, on the
+        very lookup the connection is made with.
+        """
+        return urlsplit(url).scheme in ("http", "https") and host_key(url) == site
+
+    def fetch(self, url, cached=None):
+        """
+        GET a URL, revalidating a cached response when one is given. Blocking.
+
+        Redirects are followed one hop at a time, and every hop is checked
+        with allowed() before it is requested and by the adapter when it
+        connects, so the response always comes from the site of the URL asked
+        for and never from a private address.
+
+        Returns:
+            tuple: (response dict, how it was obtained: "fetched",
+                   "revalidated", "blocked" or "error")
+        """
+        headers = {}
+        if cached is not None:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+        site = host_key(url)
+        location = url
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                if not self.allowed(location, site):
+                    logging.warning(f"Not crawling {location}: off-site")
+                    return None, "blocked"
+                response = self.session.get(location, headers=headers, timeout=self.timeout, stream=True, allow_redirects=False)
+                if not response.is_redirect:
+                    break
+                location = urljoin(location, response.headers["Location"])
+                response.close()
+            else:
+                logging.debug("Crawling %s took more than %d redirects", url, MAX_REDIRECTS)
+                return None, "error"
+
+            with response:
+                if response.status_code == 304 and cached is not None:
+                    return cached, "revalidated"
+                content_type = response.headers.get("Content-Type", "")
+                body = b""
+                if keeps_body(content_type):
+                    chunks = []
+                    size = 0
+                    for chunk in response.iter_content(64 * 1024):
+                        chunks.append(chunk)
+                        size += len(chunk)
+                        if size >= MAX_BODY_BYTES:
+                            break
+                    body = b"".join(chunks)[:MAX_BODY_BYTES]
+                return {
+                    "url": url,
+                    "final_url": response.url,
+                    "status": response.status_code,
+                    "content_type": content_type,
+                    "encoding": header_charset(content_type),
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "body": body
+                }, "fetched"
+        except BlockedAddressError as e:
+            logging.warning(f"Not crawling {url}: {str(e)}")
+            return None, "blocked"
+        except requests.RequestException as e:
+            logging.debug("Crawling %s failed: %s", url, e)
+            return None, "error"
+
+    def _wait(self, host, delay):
+        """Seconds to wait for the next request slot of a host, reserving that slot."""
+        with self._next_request_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_request.get(host, 0))
+            self._next_request[host] = slot + delay
+        return slot - now
+
+    async def get(self, url, delay=None):
+        """
+        Get a response from the cache, revalidating or fetching it as needed.
+
+        Returns:
+            dict or None: The response, or None if the URL could not be fetched
+        """
+        loop = asyncio.get_running_loop()
+        cached = None
+        if self.cache is not None:
+            cached = await loop.run_in_executor(self._executor, self.cache.get, url)
+            if cached is not None and cached["fresh"]:
+                get_metrics().inc("seo_crawl_pages_total", result="fresh")
+                return cached
+
+        wait = self._wait(host_key(url), self.delay if delay is None else delay)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        response, result = await loop.run_in_executor(self._executor, self.fetch, url, cached)
+        get_metrics().inc("seo_crawl_pages_total", result=result)
+
+        if self.cache is not None and response is not None and response["status"] < 500:
+            try:
+                if result == "revalidated":
+                    await loop.run_in_executor(self._executor, self.cache.touch, url)
+                else:
+                    await loop.run_in_executor(self._executor, self.cache.set, response)
+            except Exception as e:
+                logging.warning(f"Error caching crawled page: {str(e)}")
+        return response
+
+    async def robots(self, origin):
+        """
+        Fetch and parse the robots.txt of a site.
+
+        A missing one (4xx) allows everything. A server error disallows
+        everything, as RFC 9309 asks, as do 401 and 403.
+
+        Returns:
+            RobotFileParser or None: The rules, or None if the site could not be reached
+        """
+        response = await self.get(f"{origin}/robots.txt")
+        if response is None:
+            return None
+        robots = RobotFileParser(f"{origin}/robots.txt")
+        if response["status"] in (401, 403) or response["status"] >= 500:
+            robots.disallow_all = True
+        elif response["status"] < 400:
+            robots.parse(decode_body(response).splitlines())
+        else:
+            robots.parse([])
+        return robots
+
+    async def sitemap_urls(self, origin, robots, delay):
+        """Page URLs listed in the site's sitemaps, following sitemap indexes."""
+        pending = list(robots.site_maps() or [f"{origin}/sitemap.xml"])
+        urls = []
+        fetched = 0
+        while pending and fetched < MAX_SITEMAPS and len(urls) < self.max_pages:
+            response = await self.get(pending.pop(0), delay)
+            fetched += 1
+            if response is None or response["status"] >= 400 or not response["body"]:
+                continue
+            body = response["body"]
+            if body[:2] == b"\x1f\x8b":
+                try:
+                    body = gzip.decompress(body)
+                except (OSError, EOFError):
+                    continue
+            pages, sitemaps = sitemap_locations(body)
+            urls.extend(pages)
+            pending.extend(sitemaps)
+        return urls
+
+    async def crawl(self, website_url, parse=parse_page):
+        """
+        Crawl a site.
+
+        Pages that could not be fetched or returned an error status are kept,
+        parsed as empty documents, so links to them can be told apart.
+
+        Args:
+            website_url (str): The website URL as submitted
+            parse (callable): Called with (url, html) for every page, returns
+                a dict like parse_page does
+
+        Returns:
+            list: One dict per HTML or failed page, the start page first and
+                  then by depth, with the url, status (0 if unreachable) and
+                  what parse extracts
+        """
+        start = normalize_url(website_url)
+        parts = urlsplit(start)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        site = host_key(start)
+
+        robots = await self.robots(origin)
+        if robots is None and "://" not in website_url:
+            # A URL submitted without a scheme gets https first, then plain http
+            start = f"http{start[5:]}"
+            origin = f"http{origin[5:]}"
+            robots = await self.robots(origin)
+        if robots is None:
+            logging.warning(f"Could not reach {origin} to crawl it")
+            return []
+        # Crawl-delay may slow us down further, but not so far that a crawl stalls
+        delay = min(max(self.delay, float(robots.crawl_delay(USER_AGENT) or 0)), 5)
+
+        # Pages are returned by depth and URL, not in the order they happened to arrive
+        seen = {}
+        pages = []
+        queue = asyncio.Queue()
+
+        def enqueue(url, depth):
+            url = normalize_url(url)
+            if url in seen or len(seen) >= self.max_pages or host_key(url) != site:
+                return
+            if not robots.can_fetch(USER_AGENT, url):
+                get_metrics().inc("seo_crawl_pages_total", result="disallowed")
+                return
+            seen[url] = depth
+            queue.put_nowait((url, depth))
+
+        async def worker():
+            while True:
+                url, depth = await queue.get()
+                try:
+                    response = await self.get(url, delay)
+                    if response is None or response["status"] >= 400:
+                        page = parse(url, "")
+                    elif "html" in response["content_type"].lower():
+                        page = parse(response["final_url"], decode_body(response))
+                    else:
+                        continue
+                    page["url"] = url
+                    page["status"] = response["status"] if response is not None else 0
+                    pages.append(page)
+                    # Failed pages were parsed as empty, so they have no links to follow
+                    if depth < self.max_depth:
+                        for link in page["links"]:
+                            if urlsplit(link).scheme in ("http", "https"):
+                                enqueue(link, depth + 1)
+                except Exception as e:
+                    logging.warning(f"Error crawling {url}: {str(e)}")
+                finally:
+                    queue.task_done()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.time_budget
+        enqueue(start, 0)
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            for url in await asyncio.wait_for(self.sitemap_urls(origin, robots, delay), self.time_budget):
+                enqueue(url, 1)
+            await asyncio.wait_for(queue.join(), max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            logging.warning(f"Crawl of {start} stopped after {self.time_budget}s with {len(pages)} pages")
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return sorted(pages, key=lambda page: (seen[page["url"]], page["url"]))
+
+    def crawl_site(self, website_url, parse=parse_page):
+        """Crawl a site from synchronous code, see crawl()."""
+        return asyncio.run(self.crawl(website_url, parse))
+
+def site_digest(pages, max_chars=4000):
+    """
+    Summarize crawled pages for the generation prompt.
+
+    Lists every page with its title, meta description and headings, followed by
+    the other internal pages they link to, and stops before max_chars.
+
+    Args:
+        pages (list): Pages as returned by Crawler.crawl
+        max_chars (int): Longest digest returned
+
+    Returns:
+        str: The digest, empty if no page was crawled
+    """
+    if not pages:
+        return ""
+    site = host_key(pages[0]["url"])
+    lines = []
+    linked = []
+    crawled = {page["url"] for page in pages}
+    for page in pages:
+        if not 200 <= page["status"] < 400:
+            continue
+        lines.append(f"- {urlsplit(page['url']).path or '/'}: {page['title'] or '(no title)'}")
+        description = page["meta"].get("description") or page["meta"].get("og:description")
+        if description:
+            lines.append(f"  Description: {description[:300]}")
+        if page["headings"]:
+            lines.append("  Headings: " + "; ".join(f"H{level} {text[:100]}" for level, text in page["headings"][:12]))
+        for link in page["links"]:
+            if urlsplit(link).scheme in ("http", "https") and host_key(link) == site:
+                link = normalize_url(link)
+                if link not in crawled and link not in linked:
+                    linked.append(link)
+    if linked:
+        lines.append("Other internal pages: " + ", ".join(urlsplit(link).path or "/" for link in linked[:40]))
+
+    digest = ""
+    for line in lines:
+        if len(digest) + len(line) + 1 > max_chars:
+            break
+        digest += line + "\n"
+    return digest.rstrip("\n")
+
+_crawler = None
+_crawler_lock = threading.Lock()
+
+def get_crawler():
+    """
+    Get the process-wide crawler configured from environment variables.
+
+    CRAWL_MAX_PAGES sets the pages per crawl (0 disables crawling), CRAWL_DEPTH
+    the links followed from the start page, CRAWL_CONCURRENCY the requests in
+    flight, CRAWL_DELAY the seconds between requests to one host, CRAWL_TIMEOUT
+    the per-request and CRAWL_TIME_BUDGET the per-crawl timeout in seconds.
+    CRAWL_ALLOW_PRIVATE=1 lets it reach loopback and private addresses, which
+    is only meant for local development.
+    The page cache lives in CRAWL_CACHE_DB; CRAWL_CACHE_FRESH sets the seconds
+    a page is used without revalidation and CRAWL_CACHE_TTL how long it is kept.
+
+    Returns:
+        Crawler or None: The crawler, or None if crawling is disabled
+    """
+    global _crawler
+    if _crawler is None:
+        with _crawler_lock:
+            if _crawler is None:
+                max_pages = int(os.environ.get("CRAWL_MAX_PAGES", 20))
+                if max_pages <= 0:
+                    return None
+                try:
+                    cache = PageCache(
+                        os.environ.get("CRAWL_CACHE_DB", os.path.join(tempfile.gettempdir(), "seo_crawl_cache.sqlite3")),
+                        fresh_for=int(os.environ.get("CRAWL_CACHE_FRESH", 3600)),
+                        ttl=int(os.environ.get("CRAWL_CACHE_TTL", 7 * 24 * 3600))
+                    )
+                except Exception as e:
+                    logging.error(f"Error opening crawl cache: {str(e)}")
+                    cache = None
+                _crawler = Crawler(
+                    cache=cache,
+                    max_pages=max_pages,
+                    max_depth=int(os.environ.get("CRAWL_DEPTH", 3)),
+                    concurrency=int(os.environ.get("CRAWL_CONCURRENCY", 8)),
+                    delay=float(os.environ.get("CRAWL_DELAY", 0.25)),
+                    timeout=float(os.environ.get("CRAWL_TIMEOUT", 10)),
+                    time_budget=float(os.environ.get("CRAWL_TIME_BUDGET", 15)),
+                    allow_private=os.environ.get("CRAWL_ALLOW_PRIVATE", "0") != "0"
+                )
+    return _crawler
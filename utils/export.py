@@ -0,0 +1,146 @@
+import io
+import csv
+import json
+import tempfile
+import itertools
+
+try:
+    import openpyxl
+except ImportError:
+    # XLSX export needs openpyxl
+    openpyxl = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    # Parquet export needs pyarrow
+    pyarrow = None
+
+# Columns of a single result's export
+RESULT_HEADER = ['Type', 'Title', 'Content', 'Additional Info']
+
+# Mimetype and file extension of every export format
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+# Bytes collected before a chunk is handed to the client
+CHUNK_SIZE = 64 * 1024
+
+# Rows per Parquet row group
+PARQUET_BATCH_ROWS = 1000
+
+def result_rows(seo_data):
+    """
+    Flatten one result into export rows, one item at a time.
+
+    Args:
+        seo_data (dict): The simplified SEO data
+
+    Yields:
+        list: Export rows matching RESULT_HEADER
+    """
+    for blog in seo_data.get('blogs', []):
+        yield ['Blog', blog.get('title', ''), blog.get('content', ''), '']
+    for backlink in seo_data.get('backlinks', []):
+        yield ['Backlink', backlink.get('keyword', ''), backlink.get('strategy', ''), backlink.get('platform', '')]
+    for bookmark in seo_data.get('bookmarks', []):
+        yield ['Bookmark', bookmark.get('title', ''), bookmark.get('description', ''), bookmark.get('platform', '')]
+    for finding in seo_data.get('audit', []):
+        yield ['Audit', finding.get('check', ''), finding.get('detail', ''), f"{finding.get('status', '')}: {finding.get('page', '')}"]
+
+def _chunked(rows, make_writer):
+    """Write rows into a text buffer, yielding it as bytes whenever it fills up."""
+    buffer = io.StringIO()
+    write = make_writer(buffer)
+    for row in rows:
+        write(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+def _csv(header, rows):
+    return _chunked(itertools.chain([header], rows), lambda buffer: csv.writer(buffer).writerow)
+
+def _ndjson(header, rows):
+    # No header line, every record carries its column names
+    def make_writer(buffer):
+        def write(row):
+            buffer.write(json.dumps(dict(zip(header, row)), ensure_ascii=False))
+            buffer.write('\n')
+        return write
+    return _chunked(rows, make_writer)
+
+def _stream_file(f):
+    """Stream a finished temporary file, closing (and so removing) it at the end."""
+    try:
+        f.seek(0)
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+def _xlsx(header, rows):
+    # Write-only workbooks stream rows to disk instead of keeping cells in memory
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('SEO Results')
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    f = tempfile.TemporaryFile()
+    workbook.save(f)
+    yield from _stream_file(f)
+
+def _parquet(header, rows):
+    schema = pyarrow.schema([(name, pyarrow.string()) for name in header])
+    f = tempfile.TemporaryFile()
+    with pyarrow.parquet.ParquetWriter(f, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append([str(value) for value in row])
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_table(pyarrow.Table.from_pylist([dict(zip(header, values)) for values in batch], schema))
+                batch = []
+        if batch:
+            writer.write_table(pyarrow.Table.from_pylist([dict(zip(header, values)) for values in batch], schema))
+    yield from _stream_file(f)
+
+def stream_export(export_format, header, rows):
+    """
+    Encode export rows in one of EXPORT_FORMATS, chunk by chunk.
+
+    CSV and NDJSON are produced as the rows are read. XLSX and Parquet files
+    are written to a temporary file first, as both formats end with an index,
+    and then streamed from it; neither keeps the rows in memory.
+
+    Args:
+        export_format (str): One of EXPORT_FORMATS
+        header (list): Column names
+        rows (iterable): Rows matching the header, read once
+
+    Returns:
+        iterator or tuple: Byte chunks of the file if the format is available,
+                          or tuple (None, error_message) if it is not
+    """
+    if export_format == 'csv':
+        return _csv(header, rows)
+    if export_format == 'ndjson':
+        return _ndjson(header, rows)
+    if export_format == 'xlsx':
+        if openpyxl is None:
+            return None, "XLSX export needs the openpyxl package."
+        return _xlsx(header, rows)
+    if export_format == 'parquet':
+        if pyarrow is None:
+            return None, "Parquet export needs the pyarrow package."
+        return _parquet(header, rows)
+    return None, f"Unknown export format {export_format!r}, use one of: {', '.join(EXPORT_FORMATS)}."
@@ -2,19 +2,40 @@ import os
 import json
 import base64
 import logging
-import tempfile
+import threading
 import gspread
 from google.oauth2.service_account import Credentials
 from datetime import datetime
+from utils.metrics import get_metrics
+
+# Scopes needed to create and share spreadsheets
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+class SheetsExportError(Exception):
+    """A Google Sheets API call failed in a way that may succeed when the export is tried again."""
+
+# Credentials and authorized client, built once per process and reused across requests
+_credentials = None
+_client = None
+_source = None
+_lock = threading.Lock()
 
 def get_google_credentials():
     """
     Get Google API credentials from environment variables.
     
+    The service account info is decoded and turned into credentials in memory
+    once per process; later calls return the same credentials until
+    GOOGLE_SERVICE_ACCOUNT_JSON changes.
+    
     Returns:
         Credentials or tuple: Google API credentials if successful,
                              or tuple (None, error_message) if unsuccessful
     """
+    global _credentials, _client, _source
     try:
         # Try to get the service account info from environment variable
         service_account_json = os.environ.get("GOOGLE_SERVICE_ACCOUNT_JSON")
@@ -22,183 +43,268 @@ def get_google_credentials():
         if not service_account_json:
             logging.error("GOOGLE_SERVICE_ACCOUNT_JSON not found in environment variables")
             return None, "The GOOGLE_SERVICE_ACCOUNT_JSON is required but not found. Please add this secret to use the Google Sheets feature."
+        
+        with _lock:
+            if _credentials is not None and _source == service_account_json:
+                return _credentials
             
-        # Check if the service account JSON is base64 encoded
-        try:
-            # Try to decode as base64
-            service_account_info = json.loads(base64.b64decode(service_account_json))
-        except Exception:
-            # If not base64, try to use it directly as JSON
+            # Check if the service account JSON is base64 encoded
             try:
-                service_account_info = json.loads(service_account_json)
-            except json.JSONDecodeError:
-                logging.error("Invalid GOOGLE_SERVICE_ACCOUNT_JSON format")
-                return None, "Invalid GOOGLE_SERVICE_ACCOUNT_JSON format. Please ensure it's a valid JSON string or base64 encoded JSON."
-        
-        # Create a temporary file to store the service account info
-        with tempfile.NamedTemporaryFile(mode='w+', delete=False) as temp:
-            json.dump(service_account_info, temp)
-            temp_filename = temp.name
+                # Try to decode as base64
+                service_account_info = json.loads(base64.b64decode(service_account_json))
+            except Exception:
+                # If not base64, try to use it directly as JSON
+                try:
+                    service_account_info = json.loads(service_account_json)
+                except json.JSONDecodeError:
+                    logging.error("Invalid GOOGLE_SERVICE_ACCOUNT_JSON format")
+                    return None, "Invalid GOOGLE_SERVICE_ACCOUNT_JSON format. Please ensure it's a valid JSON string or base64 encoded JSON."
             
-        # Define the scopes
-        scopes = [
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
-        try:
-            # Create credentials from the temporary file
-            creds = Credentials.from_service_account_file(
-                temp_filename, scopes=scopes
-            )
-            
-            # Remove the temporary file
-            os.unlink(temp_filename)
+            try:
+                # Create credentials straight from the decoded info, no temporary file needed
+                creds = Credentials.from_service_account_info(service_account_info, scopes=SCOPES)
+            except Exception as e:
+                logging.error(f"Error creating credentials from service account info: {str(e)}")
+                return None, "Invalid Google Service Account credentials. Please check your GOOGLE_SERVICE_ACCOUNT_JSON format."
             
+            # New credentials invalidate the client authorized with the old ones
+            _credentials = creds
+            _client = None
+            _source = service_account_json
             return creds
-        except Exception as e:
-            # Try to remove the temporary file if it exists
-            try:
-                os.unlink(temp_filename)
-            except:
-                pass
-                
-            logging.error(f"Error creating credentials from service account file: {str(e)}")
-            return None, "Invalid Google Service Account credentials. Please check your GOOGLE_SERVICE_ACCOUNT_JSON format."
         
     except Exception as e:
         logging.error(f"Error getting Google credentials: {str(e)}")
         return None, f"Error processing Google credentials: {str(e)}"
 
-def save_to_google_sheets(website_url, keyword, seo_data):
+def get_gspread_client():
+    """
+    Get a gspread client authorized with the service account credentials.
+    
+    The client is authorized once per process and reused; its session refreshes
+    the OAuth access token by itself when it expires.
+    
+    Returns:
+        gspread.Client or tuple: The authorized client if successful,
+                                or tuple (None, error_message) if unsuccessful
+    """
+    global _client
+    # Get Google credentials
+    credentials_result = get_google_credentials()
+    
+    # Check if we got an error
+    if isinstance(credentials_result, tuple) and credentials_result[0] is None:
+        return credentials_result
+        
+    creds = credentials_result
+        
+    # Authorize with gspread
+    try:
+        with _lock:
+            if _client is None or _credentials is not creds:
+                _client = gspread.authorize(creds)
+            return _client
+    except Exception as e:
+        logging.error(f"Error authorizing with Google: {str(e)}")
+        return None, "Error connecting to Google Sheets API. Please check your credentials."
+
+def build_sheet_values(website_url, keyword, seo_data, current_date):
+    """
+    Build the rows of every worksheet of an SEO export.
+    
+    Args:
+        website_url (str): The website URL
+        keyword (str): The target keyword
+        seo_data (dict): The SEO data to save
+        current_date (str): The date shown on the summary sheet
+        
+    Returns:
+        list: (worksheet title, rows) tuples in sheet order
+    """
+    summary = [
+        ["SEO Automation Results"],
+        [""],
+        ["Website URL:", website_url],
+        ["Target Keyword:", keyword],
+        ["Generated on:", current_date],
+        [""],
+        ["Contents:"],
+        ["1. Blog Posts"],
+        ["2. Backlink Opportunities"],
+        ["3. Social Bookmarks"],
+        [""]
+    ]
+    
+    blogs = [["Blog Title", "Blog Content"]]
+    for blog in seo_data.get("blogs", []):
+        blogs.append([blog.get("title", ""), blog.get("content", "")])
+    
+    backlinks = [["Platform/Website", "Keyword", "Strategy"]]
+    for backlink in seo_data.get("backlinks", []):
+        backlinks.append([backlink.get("platform", ""), backlink.get("keyword", ""), backlink.get("strategy", "")])
+    
+    bookmarks = [["Title", "Description", "Platform"]]
+    for bookmark in seo_data.get("bookmarks", []):
+        bookmarks.append([bookmark.get("title", ""), bookmark.get("description", ""), bookmark.get("platform", "")])
+    
+    return [
+        ("Summary", summary),
+        ("Blog Posts", blogs),
+        ("Backlink Opportunities", backlinks),
+        ("Social Bookmarks", bookmarks)
+    ]
+
+def write_worksheets(spreadsheet, sheets, laid_out=False):
+    """
+    Lay out and fill a new spreadsheet with two API calls.
+    
+    The first sheet is renamed and resized and the remaining sheets are added,
+    each sized to its data, in one batch update; then all values are written
+    in one values batch update.
+    
+    Args:
+        spreadsheet (gspread.Spreadsheet): A newly created spreadsheet
+        sheets (list): (worksheet title, rows) tuples, the first one replaces sheet1
+        laid_out (bool): The worksheets already exist, from an earlier attempt,
+            and only the values are written
+    """
+    metrics = get_metrics()
+    if not laid_out:
+        lay_out_worksheets(spreadsheet, sheets)
+    
+    with metrics.timer("seo_sheets_call_duration_seconds", call="values_batch_update"):
+        spreadsheet.values_batch_update({
+            "valueInputOption": "RAW",
+            "data": [{"range": f"'{title}'!A1", "values": rows} for title, rows in sheets]
+        })
+
+def lay_out_worksheets(spreadsheet, sheets):
+    """Rename and size sheet1 and add the other worksheets in one batch update."""
+    sheet_requests = []
+    for index, (title, rows) in enumerate(sheets):
+        properties = {
+            "title": title,
+            "gridProperties": {
+                "rowCount": max(len(rows), 1),
+                "columnCount": max(max(len(row) for row in rows), 1)
+            }
+        }
+        if index == 0:
+            properties["sheetId"] = spreadsheet.sheet1.id
+            sheet_requests.append({
+                "updateSheetProperties": {
+                    "properties": properties,
+                    "fields": "title,gridProperties(rowCount,columnCount)"
+                }
+            })
+        else:
+            properties["index"] = index
+            sheet_requests.append({"addSheet": {"properties": properties}})
+    with get_metrics().timer("seo_sheets_call_duration_seconds", call="batch_update"):
+        spreadsheet.batch_update({"requests": sheet_requests})
+
+def save_to_google_sheets(website_url, keyword, seo_data, spreadsheet_id=None, on_create=None):
     """
     Save SEO data to Google Sheets.
     
+    An export that failed after its spreadsheet was created is finished in
+    that same spreadsheet when tried again with its ID, so retries never
+    leave duplicates behind.
+    
     Args:
         website_url (str): The website URL
         keyword (str): The target keyword
         seo_data (dict): The SEO data to save
+        spreadsheet_id (str, optional): The spreadsheet an earlier attempt created
+        on_create (callable, optional): Called with the ID of a newly created
+            spreadsheet before anything is written to it
         
     Returns:
         str or tuple: The URL of the Google Sheet if successful,
                      or tuple (None, error_message) if unsuccessful
+        
+    Raises:
+        SheetsExportError: If an API call failed and the export should be tried again
     """
+    metrics = get_metrics()
+    with metrics.time("credentials"):
+        client = get_gspread_client()
+    if isinstance(client, tuple):
+        return client
+    
+    current_date = datetime.now().strftime("%Y-%m-%d")
     try:
-        # Get Google credentials
-        credentials_result = get_google_credentials()
-        
-        # Check if we got an error
-        if isinstance(credentials_result, tuple) and credentials_result[0] is None:
-            return credentials_result
-            
-        creds = credentials_result
-            
-        # Authorize with gspread
-        try:
-            # Only try to authorize if we have valid credentials (not an error tuple)
-            if not isinstance(creds, tuple):
-                client = gspread.authorize(creds)
-            else:
-                # If we have an error tuple, return it
-                return creds
-        except Exception as e:
-            logging.error(f"Error authorizing with Google: {str(e)}")
-            return None, "Error connecting to Google Sheets API. Please check your credentials."
-        
-        # Create a new spreadsheet
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        spreadsheet_title = f"SEO Automation - {website_url} - {keyword} - {current_date}"
-        
-        try:
-            # Try to create a new spreadsheet
-            spreadsheet = client.create(spreadsheet_title)
+        if spreadsheet_id:
+            with metrics.timer("seo_sheets_call_duration_seconds", call="open"):
+                spreadsheet = client.open_by_key(spreadsheet_id)
+            # The layout request is atomic, so either every worksheet exists or none does
+            titles = {worksheet.title for worksheet in spreadsheet.worksheets()}
+        else:
+            spreadsheet_title = f"SEO Automation - {website_url} - {keyword} - {current_date}"
+            with metrics.timer("seo_sheets_call_duration_seconds", call="create"):
+                spreadsheet = client.create(spreadsheet_title)
+            if on_create is not None:
+                on_create(spreadsheet.id)
+            titles = set()
             
             # Share the spreadsheet with anyone with the link (read-only)
             try:
-                spreadsheet.share("", perm_type='anyone', role='reader')
+                with metrics.timer("seo_sheets_call_duration_seconds", call="share"):
+                    spreadsheet.share("", perm_type='anyone', role='reader')
             except Exception as e:
                 logging.warning(f"Error sharing spreadsheet: {str(e)}")
                 # Continue anyway, as this is not critical
-            
-            # Get the first sheet
-            worksheet = spreadsheet.sheet1
-            
-            # Rename the first sheet to Summary
-            worksheet.update_title("Summary")
-            
-            # Add summary information
-            worksheet.update([
-                ["SEO Automation Results"],
-                [""],
-                ["Website URL:", website_url],
-                ["Target Keyword:", keyword],
-                ["Generated on:", current_date],
-                [""],
-                ["Contents:"],
-                ["1. Blog Posts"],
-                ["2. Backlink Opportunities"],
-                ["3. Social Bookmarks"],
-                [""]
-            ])
-            
-            # Create a sheet for blog posts
-            blog_sheet = spreadsheet.add_worksheet(title="Blog Posts", rows=100, cols=20)
-            
-            # Add headers
-            blog_sheet.update_cell(1, 1, "Blog Title")
-            blog_sheet.update_cell(1, 2, "Blog Content")
-            
-            # Add blog posts
-            for i, blog in enumerate(seo_data.get("blogs", []), start=2):
-                blog_sheet.update_cell(i, 1, blog.get("title", ""))
-                blog_sheet.update_cell(i, 2, blog.get("content", ""))
-            
-            # Create a sheet for backlink opportunities
-            backlink_sheet = spreadsheet.add_worksheet(title="Backlink Opportunities", rows=100, cols=20)
-            
-            # Add headers
-            backlink_sheet.update_cell(1, 1, "Platform/Website")
-            backlink_sheet.update_cell(1, 2, "Keyword")
-            backlink_sheet.update_cell(1, 3, "Strategy")
-            
-            # Add backlink opportunities
-            for i, backlink in enumerate(seo_data.get("backlinks", []), start=2):
-                backlink_sheet.update_cell(i, 1, backlink.get("platform", ""))
-                backlink_sheet.update_cell(i, 2, backlink.get("keyword", ""))
-                backlink_sheet.update_cell(i, 3, backlink.get("strategy", ""))
-            
-            # Create a sheet for social bookmarks
-            bookmark_sheet = spreadsheet.add_worksheet(title="Social Bookmarks", rows=100, cols=20)
-            
-            # Add headers
-            bookmark_sheet.update_cell(1, 1, "Title")
-            bookmark_sheet.update_cell(1, 2, "Description")
-            bookmark_sheet.update_cell(1, 3, "Platform")
-            
-            # Add social bookmarks
-            for i, bookmark in enumerate(seo_data.get("bookmarks", []), start=2):
-                bookmark_sheet.update_cell(i, 1, bookmark.get("title", ""))
-                bookmark_sheet.update_cell(i, 2, bookmark.get("description", ""))
-                bookmark_sheet.update_cell(i, 3, bookmark.get("platform", ""))
-            
-            # Return the spreadsheet URL
-            return spreadsheet.url
-            
-        except Exception as e:
-            logging.error(f"Error creating spreadsheet: {str(e)}")
-            
-            # Try to find an existing spreadsheet with a similar name
-            try:
-                spreadsheets = client.list_spreadsheet_files()
-                for sheet in spreadsheets:
-                    if keyword in sheet['name'] and website_url in sheet['name']:
-                        # Use the existing spreadsheet
-                        return f"https://docs.google.com/spreadsheets/d/{sheet['id']}"
-            except Exception as e2:
-                logging.error(f"Error finding existing spreadsheet: {str(e2)}")
-            
-            return None
-            
+        
+        # Build every worksheet's values up front
+        sheets = build_sheet_values(website_url, keyword, seo_data, current_date)
+        
+        # Rename the first sheet and add the others, each sized to its data, in one request
+        write_worksheets(spreadsheet, sheets, laid_out=sheets[0][0] in titles)
+        
+        return spreadsheet.url
+        
     except Exception as e:
         logging.error(f"Error saving to Google Sheets: {str(e)}")
-        return None
+        raise SheetsExportError(str(e)) from e
+
+def save_batch_to_google_sheets(batch_name, rows):
+    """
+    Save the combined results of a batch to one Google Sheet.
+    
+    Args:
+        batch_name (str): Name of the batch, used in the spreadsheet title
+        rows (iterable): Export rows of (website URL, keyword, type, title, content, additional info)
+        
+    Returns:
+        str or tuple: The URL of the Google Sheet if successful,
+                     or tuple (None, error_message) if unsuccessful
+    """
+    metrics = get_metrics()
+    try:
+        with metrics.time("credentials"):
+            client = get_gspread_client()
+        if isinstance(client, tuple):
+            return client
+        
+        values = [['Website URL', 'Keyword', 'Type', 'Title', 'Content', 'Additional Info']]
+        values.extend(list(row) for row in rows)
+        
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        with metrics.timer("seo_sheets_call_duration_seconds", call="create"):
+            spreadsheet = client.create(f"SEO Automation Batch - {batch_name} - {current_date}")
+        
+        # Share the spreadsheet with anyone with the link (read-only)
+        try:
+            with metrics.timer("seo_sheets_call_duration_seconds", call="share"):
+                spreadsheet.share("", perm_type='anyone', role='reader')
+        except Exception as e:
+            logging.warning(f"Error sharing spreadsheet: {str(e)}")
+        
+        # Size the sheet to the data and write it
+        write_worksheets(spreadsheet, [("Results", values)])
+        
+        return spreadsheet.url
+        
+    except Exception as e:
+        logging.error(f"Error saving batch to Google Sheets: {str(e)}")
+        return None, f"Error saving batch to Google Sheets: {str(e)}"
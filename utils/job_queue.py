@@ -0,0 +1,328 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import tempfile
+import threading
+from datetime import datetime
+
+# Job states
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+class RetryJob(Exception):
+    """
+    Raised by a job handler to run the job again later.
+
+    The wait doubles with every attempt: delay, 2 * delay, 4 * delay, ...
+    Changes the handler made to its payload dict are stored with the job, so
+    the next attempt can pick up what this one left behind.
+
+    Args:
+        message (str): Why the attempt failed, kept as the error if no attempts remain
+        delay (float): Seconds to wait after the first failed attempt
+        max_attempts (int): Total attempts allowed for the job
+    """
+
+    def __init__(self, message, delay=30, max_attempts=5):
+        super().__init__(message)
+        self.delay = delay
+        self.max_attempts = max_attempts
+
+def default_db_path():
+    """
+    Get the default location of the job queue database.
+
+    Returns:
+        str: Path taken from JOB_QUEUE_DB, or a file in the temp directory
+    """
+    return os.environ.get("JOB_QUEUE_DB", os.path.join(tempfile.gettempdir(), "seo_jobs.sqlite3"))
+
+class JobQueue:
+    """
+    A small SQLite-backed job queue with an in-process pool of worker threads.
+
+    The queue lives in a single database file, so every gunicorn worker that
+    points at the same file shares it and no external broker is needed. Each
+    process runs its own worker threads; jobs are claimed atomically, so a
+    job is only ever executed by one thread. Jobs left "running" by a process
+    that died are put back in the queue once they go stale.
+    """
+
+    def __init__(self, db_path, handler, num_workers=2, poll_interval=0.5, stale_after=600):
+        """
+        Args:
+            db_path (str): Path of the SQLite database file
+            handler (callable): Called with the job payload dict and a publish(event, data)
+                callback for progress events, returns a JSON-serializable result
+            num_workers (int): Number of worker threads started in this process
+            poll_interval (float): Seconds an idle worker sleeps between queue checks
+            stale_after (int): Seconds after which a running job is considered abandoned
+        """
+        self.db_path = db_path
+        self.handler = handler
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._start_lock = threading.Lock()
+        self._threads = []
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._init_db()
+
+    def _connect(self):
+        """Return the SQLite connection owned by the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                run_after REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        # Queue files created before delayed retries existed lack run_after
+        columns = [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+        if "run_after" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN run_after REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                event TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, id)")
+
+    def start(self):
+        """Start the worker threads for this process if they aren't running yet."""
+        with self._start_lock:
+            # Drop threads from a parent process after a fork
+            self._threads = [t for t in self._threads if t.is_alive()]
+            if self._threads or self.num_workers <= 0:
+                return
+
+            for i in range(self.num_workers):
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"job-worker-{os.getpid()}-{i}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            logging.debug(f"Started {self.num_workers} job worker threads in process {os.getpid()}")
+
+    def enqueue(self, payload):
+        """
+        Add a job to the queue.
+
+        Args:
+            payload (dict): JSON-serializable job arguments
+
+        Returns:
+            str: The new job ID
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, STATUS_QUEUED, json.dumps(payload), now, now)
+        )
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def get_job(self, job_id):
+        """
+        Look up a job by ID.
+
+        Args:
+            job_id (str): The job ID returned by enqueue
+
+        Returns:
+            dict or None: The job with decoded payload and result, or None if unknown
+        """
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["created_at"] = datetime.fromtimestamp(job["created_at"]).isoformat()
+        job["updated_at"] = datetime.fromtimestamp(job["updated_at"]).isoformat()
+        return job
+
+    @property
+    def busy_workers(self):
+        """Number of this process's worker threads currently running a job."""
+        return self._busy
+
+    def counts(self):
+        """
+        Count the jobs in each state.
+
+        Returns:
+            dict: Number of jobs per status
+        """
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def publish(self, job_id, event, data):
+        """
+        Record a progress event for a job, e.g. an item that finished streaming.
+
+        Args:
+            job_id (str): The job the event belongs to
+            event (str): The event name
+            data: JSON-serializable event data
+        """
+        self._connect().execute(
+            "INSERT INTO job_events (job_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, event, json.dumps(data), time.time())
+        )
+
+    def get_events(self, job_id, after_id=0):
+        """
+        Get the progress events of a job in the order they were published.
+
+        Args:
+            job_id (str): The job ID
+            after_id (int): Only return events with a higher ID than this
+
+        Returns:
+            list: Dicts with id, event and decoded data
+        """
+        rows = self._connect().execute(
+            "SELECT id, event, data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+            (job_id, after_id)
+        ).fetchall()
+        return [{"id": row["id"], "event": row["event"], "data": json.loads(row["data"])} for row in rows]
+
+    def _claim_next(self):
+        """Atomically move the oldest queued (or stale running) job to running."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, payload, attempts FROM jobs "
+                "WHERE (status = ? AND (run_after IS NULL OR run_after <= ?)) "
+                "OR (status = ? AND updated_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (STATUS_QUEUED, now, STATUS_RUNNING, now - self.stale_after)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (STATUS_RUNNING, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row["id"], json.loads(row["payload"]), row["attempts"] + 1
+
+    def _finish(self, job_id, status, result=None, error=None):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id)
+        )
+
+    def _retry_later(self, job_id, delay, error, payload):
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, payload = ?, error = ?, run_after = ?, updated_at = ? WHERE id = ?",
+            (STATUS_QUEUED, json.dumps(payload), error, now + delay, now, job_id)
+        )
+
+    def _worker_loop(self):
+        while True:
+            try:
+                claimed = self._claim_next()
+            except sqlite3.Error as e:
+                logging.error(f"Error claiming job: {str(e)}")
+                claimed = None
+
+            if claimed is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            job_id, payload, attempts = claimed
+            logging.debug(f"Running job {job_id} (attempt {attempts})")
+
+            def publish(event, data, job_id=job_id):
+                self.publish(job_id, event, data)
+
+            # Keep long jobs (e.g. batches) from being reclaimed as stale while they run
+            heartbeat_stop = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, heartbeat_stop), daemon=True)
+            heartbeat.start()
+
+            with self._busy_lock:
+                self._busy += 1
+            try:
+                # Drop events from an earlier, abandoned attempt at this job
+                self._connect().execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+                result = self.handler(payload, publish)
+                self._finish(job_id, STATUS_DONE, result=result)
+                logging.debug(f"Job {job_id} finished")
+            except RetryJob as e:
+                if attempts >= e.max_attempts:
+                    logging.error(f"Job {job_id} failed after {attempts} attempts: {str(e)}")
+                    self._finish(job_id, STATUS_FAILED, error=str(e))
+                else:
+                    delay = e.delay * 2 ** (attempts - 1)
+                    logging.warning(f"Job {job_id} attempt {attempts} failed, retrying in {delay}s: {str(e)}")
+                    self._retry_later(job_id, delay, str(e), payload)
+            except Exception as e:
+                logging.error(f"Job {job_id} failed: {str(e)}")
+                import traceback
+                logging.error(traceback.format_exc())
+                self._finish(job_id, STATUS_FAILED, error=str(e))
+            finally:
+                with self._busy_lock:
+                    self._busy -= 1
+                heartbeat_stop.set()
+                heartbeat.join()
+
+    def _heartbeat(self, job_id, stop):
+        while not stop.wait(self.stale_after / 3):
+            try:
+                self._connect().execute(
+                    "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ?",
+                    (time.time(), job_id, STATUS_RUNNING)
+                )
+            except sqlite3.Error as e:
+                logging.warning(f"Error updating heartbeat of job {job_id}: {str(e)}")
@@ -0,0 +1,229 @@
+import json
+import logging
+
+# Sections of the SEO data whose items are emitted as they complete
+SEO_SECTIONS = ("blogs", "backlinks", "bookmarks")
+
+class SeoItemStreamParser:
+    """
+    Incremental parser that picks complete items out of a streamed SEO JSON document.
+
+    Text is fed in arbitrary chunks as tokens arrive. The parser tracks string
+    and nesting state in a single pass over each chunk, and as soon as the
+    closing brace of an object inside one of the top-level section arrays
+    (blogs, backlinks, bookmarks) arrives, that object is decoded and returned.
+    Any prose the model writes before the opening brace is skipped.
+    """
+
+    def __init__(self, sections=SEO_SECTIONS):
+        """
+        Args:
+            sections (tuple): Top-level keys whose array items should be emitted
+        """
+        self.sections = set(sections)
+        self._buffer = []
+        self._offset = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_key = None
+        self._section = None
+        self._item_start = None
+        self._started = False
+
+    def feed(self, chunk):
+        """
+        Feed the next piece of generated text.
+
+        Args:
+            chunk (str): Newly generated text
+
+        Returns:
+            list: (section, item) tuples for every item completed by this chunk
+        """
+        items = []
+        start = self._offset
+        self._buffer.append(chunk)
+        self._offset += len(chunk)
+
+        for i, char in enumerate(chunk, start=start):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        # Remember the most recent string at the top level, it
+                        # is the key when an array follows
+                        self._last_key = self._text(self._string_start + 1, i)
+                continue
+
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._depth == 2:
+                    self._section = self._last_key if self._last_key in self.sections else None
+                elif char == "{" and self._depth == 3 and self._section:
+                    self._item_start = i
+            elif char in "}]":
+                if char == "}" and self._depth == 3 and self._item_start is not None:
+                    item = self._decode(self._item_start, i + 1)
+                    if item is not None:
+                        items.append((self._section, item))
+                    self._item_start = None
+                elif char == "]" and self._depth == 2:
+                    self._section = None
+                self._depth -= 1
+                if self._depth == 0:
+                    # Top-level object closed, wait for another one
+                    self._started = False
+                    self._last_key = None
+
+        return items
+
+    def _text(self, start, end):
+        """Return the fed text between two absolute offsets."""
+        if len(self._buffer) > 1:
+            self._buffer = ["".join(self._buffer)]
+        return self._buffer[0][start:end]
+
+    def _decode(self, start, end):
+        try:
+            item = json.loads(self._text(start, end))
+        except json.JSONDecodeError as e:
+            logging.debug("Skipping undecodable streamed item: %s", e)
+            return None
+        return item if isinstance(item, dict) else None
+
+_decoder = json.JSONDecoder(strict=False)
+
+def extract_seo_json(text, sections=SEO_SECTIONS):
+    """
+    Pull SEO data out of a complete generation that may not be valid JSON.
+
+    Well-formed JSON is decoded directly, skipping any prose or code fence
+    before it. Otherwise one pass over the text finds every top-level JSON
+    object while dropping trailing commas, and each closed object is decoded
+    as a whole. When decoding fails or the output
+    was cut off, the items that did finish inside the section arrays are
+    kept. When the text holds several objects, each section is taken from the
+    first object that has it.
+
+    Args:
+        text (str): The generated text
+        sections (tuple): Top-level keys holding the item arrays
+
+    Returns:
+        dict or None: The sections found, or None if no section could be recovered
+    """
+    # Fast path: well-formed JSON, possibly wrapped in prose or a code fence
+    start = text.find("{")
+    if start == -1:
+        return None
+    try:
+        data, _ = _decoder.raw_decode(text, start)
+    except json.JSONDecodeError:
+        data = None
+    if isinstance(data, dict) and all(isinstance(data.get(name), list) for name in sections):
+        return {name: data[name] for name in sections}
+
+    wanted = set(sections)
+    result = {}
+    out = []
+    depth = 0
+    in_string = escape = pending_comma = False
+    string_start = blob_start = item_start = None
+    last_key = section = None
+    items = []
+
+    def recover(blob_end):
+        # Decode the blob whole, falling back to the items that completed in it
+        data = None
+        if blob_end is not None:
+            try:
+                data = json.loads("".join(out[blob_start:blob_end]), strict=False)
+            except json.JSONDecodeError:
+                data = None
+        if not isinstance(data, dict):
+            data = {}
+            for name, start, end in items:
+                try:
+                    item = json.loads("".join(out[start:end]), strict=False)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(item, dict):
+                    data.setdefault(name, []).append(item)
+        for name in sections:
+            if name not in result and isinstance(data.get(name), list):
+                result[name] = data[name]
+
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+                if depth == 1:
+                    last_key = "".join(out[string_start + 1:-1])
+            continue
+
+        if depth == 0:
+            if char == "{":
+                depth = 1
+                blob_start = len(out)
+                out.append(char)
+                items = []
+                last_key = section = item_start = None
+                pending_comma = False
+            continue
+
+        if char in " \t\r\n":
+            continue
+        if char == ",":
+            pending_comma = True
+            continue
+        if pending_comma:
+            # A comma directly before a closing bracket is dropped
+            if char not in "}]":
+                out.append(",")
+            pending_comma = False
+
+        out.append(char)
+        if char == '"':
+            in_string = True
+            string_start = len(out) - 1
+        elif char in "{[":
+            depth += 1
+            if char == "[" and depth == 2:
+                section = last_key if last_key in wanted else None
+            elif char == "{" and depth == 3 and section:
+                item_start = len(out) - 1
+        elif char in "}]":
+            if char == "}" and depth == 3 and item_start is not None:
+                items.append((section, item_start, len(out)))
+                item_start = None
+            elif char == "]" and depth == 2:
+                section = None
+            depth -= 1
+            if depth == 0:
+                recover(len(out))
+
+    if depth > 0:
+        # The output was cut off inside an object
+        recover(None)
+
+    return result or None
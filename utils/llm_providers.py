@@ -0,0 +1,568 @@
+import os
+import time
+import json
+import random
+import logging
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from utils.json_stream import SeoItemStreamParser, SEO_SECTIONS
+from utils.metrics import get_metrics
+
+# Model used when no LLM_MODELS are configured
+MODEL = "mistralai/Mixtral-8x7B-Instruct-v0.1"
+
+# Status codes worth retrying: rate limiting and upstream failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Roughly how many characters make one token, used to estimate generated tokens
+CHARS_PER_TOKEN = 4
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream that keeps failing.
+
+    After failure_threshold consecutive failures the breaker opens and every
+    call fails fast for reset_timeout seconds. Then a single trial call is let
+    through; its success closes the breaker and its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Check whether a call may go through right now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._failures >= self.failure_threshold or self._opened_at is not None:
+                if self._opened_at is None:
+                    logging.warning(f"Opening circuit breaker after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+
+class ProviderClient:
+    """
+    HTTP client for one model provider.
+
+    Keeps a pooled keep-alive session so connections (and TLS handshakes) are
+    reused, applies connect/read timeouts to every request, retries 429 and
+    5xx responses and connection errors with jittered exponential backoff
+    (honoring Retry-After), and guards the upstream with a circuit breaker.
+    """
+
+    def __init__(self, name="Together AI", connect_timeout=5, read_timeout=120, max_retries=3, backoff_base=1.0,
+                 backoff_max=30.0, pool_size=10, breaker=None):
+        """
+        Args:
+            name (str): Provider name used in log messages
+            connect_timeout (float): Seconds to wait for a connection
+            read_timeout (float): Seconds to wait between bytes of the response
+            max_retries (int): Retries after the first attempt
+            backoff_base (float): Base delay of the exponential backoff in seconds
+            backoff_max (float): Upper bound of a single backoff delay in seconds
+            pool_size (int): Connections kept alive per host
+            breaker (CircuitBreaker, optional): Breaker shared by all calls
+        """
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_env(cls, name):
+        """
+        Build a client configured from environment variables.
+
+        TOGETHER_CONNECT_TIMEOUT and TOGETHER_READ_TIMEOUT set the timeouts in
+        seconds and TOGETHER_MAX_RETRIES the number of retries.
+        """
+        return cls(
+            name=name,
+            connect_timeout=float(os.environ.get("TOGETHER_CONNECT_TIMEOUT", 5)),
+            read_timeout=float(os.environ.get("TOGETHER_READ_TIMEOUT", 120)),
+            max_retries=int(os.environ.get("TOGETHER_MAX_RETRIES", 3))
+        )
+
+    def _backoff(self, attempt, response=None):
+        """Seconds to wait before the next attempt, honoring Retry-After when present."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(max(delay, 0), self.backoff_max)
+                except (TypeError, ValueError):
+                    pass
+        # Full jitter: anywhere between zero and the exponential ceiling
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def post(self, url, **kwargs):
+        """
+        POST to the API with timeouts, retries and the circuit breaker.
+
+        Args:
+            url (str): The API endpoint
+            **kwargs: Passed on to requests.Session.post (headers, json, stream, ...)
+
+        Returns:
+            requests.Response: The final response, which may still be an error status
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            requests.RequestException: If every attempt failed to get a response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} is unavailable, circuit breaker is open")
+
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.post(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.breaker.record_failure()
+                if last_attempt:
+                    raise
+                delay = self._backoff(attempt)
+                get_metrics().inc("seo_llm_retries_total", provider=self.name)
+                logging.warning(f"{self.name} request failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES:
+                # Other client errors (e.g. a bad API key) say nothing about upstream health
+                self.breaker.record_success()
+                return response
+
+            self.breaker.record_failure()
+            if last_attempt:
+                return response
+            delay = self._backoff(attempt, response)
+            get_metrics().inc("seo_llm_retries_total", provider=self.name)
+            logging.warning(f"{self.name} returned status {response.status_code}, retrying in {delay:.1f}s")
+            response.close()
+            time.sleep(delay)
+
+def extract_generated_text(response_data):
+    """
+    Get the generated text out of a completion response or stream event.
+
+    Args:
+        response_data (dict): The decoded API response or stream event
+
+    Returns:
+        str: The generated text, or an empty string if none was found
+    """
+    # Different API versions might have different response structures
+    if 'output' in response_data:
+        output = response_data.get('output', {})
+        if output.get('text'):
+            return output['text']
+        choices = output.get('choices') or [{}]
+        return choices[0].get('text', '')
+    elif 'response' in response_data:
+        return response_data.get('response', '')
+    elif 'choices' in response_data and response_data['choices']:
+        choice = response_data['choices'][0]
+        return (choice.get('text') or (choice.get('message') or {}).get('content')
+                or (choice.get('delta') or {}).get('content') or '')
+    elif 'token' in response_data:
+        return response_data['token'].get('text', '')
+    return ''
+
+class LLMProvider:
+    """
+    A model served over HTTP, with its price and the sections it may generate.
+
+    Subclasses know the request format of their API; the client, streaming
+    and response parsing are shared.
+    """
+
+    def __init__(self, name, model, url, api_key=None, cost_per_1k_tokens=0.0, sections=None,
+                 context_tokens=32768, max_output_tokens=4096, client=None):
+        """
+        Args:
+            name (str): Unique name of this model entry
+            model (str): Model identifier sent to the API
+            url (str): The API endpoint
+            api_key (str, optional): Bearer token, local stand-ins need none
+            cost_per_1k_tokens (float): Price of 1000 generated tokens, used for routing
+            sections (list, optional): The only sections this model may generate
+            context_tokens (int): Context window of the model, prompt and output together
+            max_output_tokens (int): Most tokens the API generates in one response
+            client (ProviderClient, optional): HTTP client, one per provider by default
+        """
+        self.name = name
+        self.model = model
+        self.url = url
+        self.api_key = api_key
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        self.sections = set(sections) if sections else None
+        self.context_tokens = context_tokens
+        self.max_output_tokens = max_output_tokens
+        self.client = client or ProviderClient.from_env(name)
+
+    def serves(self, sections):
+        """Check whether this model may generate all of the given sections."""
+        return self.sections is None or self.sections.issuperset(sections)
+
+    def headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def build_payload(self, prompt, max_tokens, schema=None, stream=False):
+        """Build the request body for a prompt."""
+        raise NotImplementedError
+
+    def complete(self, prompt, max_tokens, on_item=None, sections=SEO_SECTIONS, schema=None):
+        """
+        Send one prompt and return the generated text.
+
+        Args:
+            prompt (str): The prompt
+            max_tokens (int): Upper bound of generated tokens
+            on_item (callable, optional): When given, the completion is streamed and
+                this is called with (section, item) for each completed item
+            sections (tuple): Sections whose streamed items are reported
+            schema (dict, optional): JSON schema the output is constrained to
+
+        Returns:
+            str or tuple: The generated text if successful,
+                         or tuple (error_type, error_message) if the request failed
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            requests.RequestException: If every attempt failed to get a response
+        """
+        payload = self.build_payload(prompt, max_tokens, schema, stream=on_item is not None)
+        metrics = get_metrics()
+        metrics.inc("seo_llm_tokens_total", len(prompt) // CHARS_PER_TOKEN, provider=self.name, direction="in")
+        started = time.perf_counter()
+        if on_item is not None:
+            # Stream the completion so items reach the user as they are generated
+            logging.debug("Streaming request to %s", self.name)
+            text = self._stream(payload, on_item, sections)
+        else:
+            logging.debug("Sending request to %s", self.name)
+            response = self.client.post(self.url, headers=self.headers(), json=payload)
+            # Time until the response headers arrived, connecting included
+            metrics.observe("seo_llm_request_duration_seconds", response.elapsed.total_seconds(), provider=self.name, phase="headers")
+            if response.status_code != 200:
+                logging.error(f"API request to {self.name} failed with status code {response.status_code}: {response.text}")
+                return "API Error", f"{self.name} API request failed with status code {response.status_code}. Please check your API key and try again."
+
+            response_data = response.json()
+            # Formatted lazily and cut to LOG_MAX_CHARS, only when debug logging is on
+            logging.debug("API response from %s: %s", self.name, response_data)
+            text = extract_generated_text(response_data)
+
+        metrics.observe("seo_llm_request_duration_seconds", time.perf_counter() - started, provider=self.name, phase="total")
+        if isinstance(text, str):
+            metrics.inc("seo_llm_tokens_total", len(text) // CHARS_PER_TOKEN, provider=self.name, direction="out")
+        return text
+
+    def _stream(self, payload, on_item, sections):
+        """Stream a completion, reporting SEO items as they complete."""
+        parser = SeoItemStreamParser(sections)
+        chunks = []
+        metrics = get_metrics()
+
+        started = time.perf_counter()
+        response = self.client.post(self.url, headers=self.headers(), json=payload, stream=True)
+        metrics.observe("seo_llm_request_duration_seconds", response.elapsed.total_seconds(), provider=self.name, phase="headers")
+        try:
+            if response.status_code != 200:
+                logging.error(f"API request to {self.name} failed with status code {response.status_code}: {response.text}")
+                return "API Error", f"{self.name} API request failed with status code {response.status_code}. Please check your API key and try again."
+
+            # Server-sent events: one "data: {...}" line per token, then "data: [DONE]"
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+
+                try:
+                    text = extract_generated_text(json.loads(data))
+                except json.JSONDecodeError:
+                    logging.warning("Skipping malformed stream event")
+                    continue
+
+                if not text:
+                    continue
+                if not chunks:
+                    metrics.observe("seo_llm_request_duration_seconds", time.perf_counter() - started, provider=self.name, phase="first_token")
+                chunks.append(text)
+                for section, item in parser.feed(text):
+                    try:
+                        on_item(section, item)
+                    except Exception as e:
+                        logging.warning(f"Error publishing streamed item: {str(e)}")
+        finally:
+            response.close()
+
+        return "".join(chunks)
+
+class TogetherInferenceProvider(LLMProvider):
+    """A model behind the Together AI /inference endpoint, prompted with a raw text template."""
+
+    def __init__(self, name, model, url, prompt_template="<s>[INST] {prompt} [/INST]", **kwargs):
+        """
+        Args:
+            prompt_template (str): Wraps the prompt in the model's instruction format
+            **kwargs: See LLMProvider
+        """
+        super().__init__(name, model, url, **kwargs)
+        self.prompt_template = prompt_template
+
+    def build_payload(self, prompt, max_tokens, schema=None, stream=False):
+        payload = {
+            "model": self.model,
+            "prompt": self.prompt_template.format(prompt=prompt),
+            "temperature": 0.7,
+            "max_tokens": max_tokens,
+            "top_p": 0.7
+        }
+        if schema is not None:
+            payload["response_format"] = {"type": "json_object", "schema": schema}
+        if stream:
+            payload["stream_tokens"] = True
+        return payload
+
+class OpenAIChatProvider(LLMProvider):
+    """
+    A model behind an OpenAI-compatible /chat/completions endpoint.
+
+    Covers hosted APIs (Together, OpenAI, ...) as well as local servers such
+    as vLLM, llama.cpp or Ollama, which need no API key.
+    """
+
+    def build_payload(self, prompt, max_tokens, schema=None, stream=False):
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.7,
+            "max_tokens": max_tokens,
+            "top_p": 0.7
+        }
+        if schema is not None:
+            payload["response_format"] = {"type": "json_schema", "json_schema": {"name": "seo_content", "schema": schema}}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+# Provider classes by the "provider" value of an LLM_MODELS entry
+PROVIDERS = {
+    "together": TogetherInferenceProvider,
+    "openai": OpenAIChatProvider
+}
+
+class ModelRouter:
+    """
+    Order the configured models for each request by recent latency and cost.
+
+    Every call is recorded in a rolling window per model. A model's score is
+    its mean latency per 1000 generated tokens plus cost_weight times its
+    price per 1000 tokens, with recent failures pushing it further back.
+    Models without measurements score on price alone, so they get tried.
+    The caller walks the returned list in order, failing over on errors.
+    """
+
+    # Score added per unit of failure rate, enough to put a failing model last
+    FAILURE_PENALTY = 1000.0
+
+    def __init__(self, providers, window=50, cost_weight=1.0):
+        """
+        Args:
+            providers (list): The LLMProvider instances, in order of preference
+            window (int): Calls remembered per model
+            cost_weight (float): Seconds per 1000 tokens one unit of price is worth
+        """
+        self.providers = list(providers)
+        self.cost_weight = cost_weight
+        self._calls = {provider.name: deque(maxlen=window) for provider in self.providers}
+        self._lock = threading.Lock()
+
+    @property
+    def signature(self):
+        """The configured models, for cache keys."""
+        return ",".join(f"{provider.name}={provider.model}" for provider in self.providers)
+
+    def call_limit(self, prompt_tokens):
+        """
+        Most tokens one request may generate on every configured model.
+
+        Args:
+            prompt_tokens (int): Tokens taken by the prompt
+
+        Returns:
+            int: The smallest output limit, so any model can take any request
+        """
+        return min(min(provider.max_output_tokens, provider.context_tokens - prompt_tokens) for provider in self.providers)
+
+    def record(self, name, latency, tokens, ok):
+        """
+        Record one call to a model.
+
+        Args:
+            name (str): The model entry name
+            latency (float): Seconds the call took
+            tokens (int): Tokens generated
+            ok (bool): Whether the call produced text
+        """
+        with self._lock:
+            self._calls[name].append((latency, tokens, ok))
+
+    def _score(self, provider):
+        calls = self._calls[provider.name]
+        succeeded = [(latency, tokens) for latency, tokens, ok in calls if ok]
+        latency_per_1k = 0.0
+        if succeeded:
+            latency_per_1k = sum(latency for latency, _ in succeeded) / max(1, sum(tokens for _, tokens in succeeded)) * 1000
+        failure_rate = (len(calls) - len(succeeded)) / len(calls) if calls else 0.0
+        return latency_per_1k + self.cost_weight * provider.cost_per_1k_tokens + self.FAILURE_PENALTY * failure_rate
+
+    def candidates(self, sections=SEO_SECTIONS):
+        """
+        Get the models to try for a request, best first.
+
+        Args:
+            sections (tuple): The sections the request generates
+
+        Returns:
+            list: LLMProvider instances; models restricted to other sections are
+                  left out unless no model serves these sections
+        """
+        eligible = [provider for provider in self.providers if provider.serves(sections)] or self.providers
+        with self._lock:
+            # sorted is stable, so ties keep the configured order
+            return sorted(eligible, key=self._score)
+
+    def stats(self):
+        """Get the rolling statistics of every model."""
+        with self._lock:
+            stats = {}
+            for provider in self.providers:
+                calls = self._calls[provider.name]
+                succeeded = [latency for latency, _, ok in calls if ok]
+                stats[provider.name] = {
+                    "model": provider.model,
+                    "sections": sorted(provider.sections) if provider.sections else None,
+                    "cost_per_1k_tokens": provider.cost_per_1k_tokens,
+                    "calls": len(calls),
+                    "failures": len(calls) - len(succeeded),
+                    "mean_latency": round(sum(succeeded) / len(succeeded), 3) if succeeded else None,
+                    "tokens": sum(tokens for _, tokens, _ in calls),
+                    "score": round(self._score(provider), 3)
+                }
+            return stats
+
+def load_providers():
+    """
+    Build the configured models from environment variables.
+
+    LLM_MODELS holds a JSON list of entries with name, provider ("together" or
+    "openai"), model, url, api_key_env (the variable holding the API key),
+    cost_per_1k_tokens and optionally sections, context_tokens,
+    max_output_tokens and prompt_template. Without
+    it the Together AI Mixtral model is used with TOGETHER_API_KEY and
+    TOGETHER_API_URL. Entries whose API key variable is unset are skipped.
+
+    Returns:
+        list: LLMProvider instances
+    """
+    entries = json.loads(os.environ.get("LLM_MODELS") or "null") or [{
+        "name": "together",
+        "provider": "together",
+        "model": MODEL,
+        # API endpoint, overridable to point at a local stand-in
+        "url": os.environ.get("TOGETHER_API_URL", "https://api.together.xyz/inference"),
+        "api_key_env": "TOGETHER_API_KEY"
+    }]
+
+    providers = []
+    for entry in entries:
+        api_key = None
+        if entry.get("api_key_env"):
+            api_key = os.environ.get(entry["api_key_env"])
+            if not api_key:
+                logging.error(f"{entry['api_key_env']} not found in environment variables, skipping model {entry['name']}")
+                continue
+
+        options = {}
+        if entry.get("prompt_template"):
+            options["prompt_template"] = entry["prompt_template"]
+        provider_class = PROVIDERS[entry.get("provider", "openai")]
+        providers.append(provider_class(
+            entry["name"],
+            entry["model"],
+            entry["url"],
+            api_key=api_key,
+            cost_per_1k_tokens=float(entry.get("cost_per_1k_tokens", 0)),
+            sections=entry.get("sections"),
+            context_tokens=int(entry.get("context_tokens", 32768)),
+            max_output_tokens=int(entry.get("max_output_tokens", 4096)),
+            **options
+        ))
+    return providers
+
+_router = None
+_router_source = None
+_router_lock = threading.Lock()
+
+def get_model_router():
+    """
+    Get the process-wide model router.
+
+    The router is rebuilt when LLM_MODELS or the Together AI variables change.
+    LLM_COST_WEIGHT sets how much price counts against latency.
+
+    Returns:
+        ModelRouter or None: The shared router, or None if no model is usable
+    """
+    global _router, _router_source
+    source = tuple(os.environ.get(name) for name in ("LLM_MODELS", "TOGETHER_API_KEY", "TOGETHER_API_URL"))
+    with _router_lock:
+        if _router is None or source != _router_source:
+            providers = load_providers()
+            _router = ModelRouter(providers, cost_weight=float(os.environ.get("LLM_COST_WEIGHT", 1.0))) if providers else None
+            _router_source = source
+        return _router
@@ -0,0 +1,243 @@
+import os
+import glob
+import json
+import time
+import logging
+import tempfile
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Help text and type of every metric, in the order they are exposed
+METRICS = {
+    "seo_http_request_duration_seconds": ("histogram", "Time to handle an HTTP request, by endpoint"),
+    "seo_stage_duration_seconds": ("histogram", "Time spent in each stage of generating, storing and serving results"),
+    "seo_llm_request_duration_seconds": ("histogram", "Model API latency, by provider and phase (headers, first_token or total)"),
+    "seo_sheets_call_duration_seconds": ("histogram", "Google Sheets API call latency, by call"),
+    "seo_llm_tokens_total": ("counter", "Estimated prompt (in) and generated (out) tokens, by provider"),
+    "seo_llm_retries_total": ("counter", "Model API attempts retried after an error status or connection failure"),
+    "seo_llm_failovers_total": ("counter", "Requests moved on to the next model after a model failed"),
+    "seo_cache_lookups_total": ("counter", "Generation cache lookups, by result (hit, near_hit or miss)"),
+    "seo_sample_fallbacks_total": ("counter", "Generations answered with sample or placeholder data, by reason"),
+    "seo_crawl_pages_total": ("counter", "Site crawl requests, by result (fresh, revalidated, fetched, blocked, error or disallowed)"),
+    "seo_jobs": ("gauge", "Jobs in the job queue, by status")
+}
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Metrics:
+    """
+    Low-overhead counters and latency histograms in Prometheus format.
+
+    Observations only touch in-memory dicts under a lock. Every
+    flush_interval seconds a process writes its totals to its own file in
+    metrics_dir, and rendering sums the files of all processes, so /metrics
+    covers every gunicorn worker (including ones that have exited).
+
+    Durations timed while a request is being tracked on the current thread
+    are also collected for that request's Server-Timing header.
+    """
+
+    def __init__(self, metrics_dir, flush_interval=5.0, buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            metrics_dir (str): Directory shared by the worker processes
+            flush_interval (float): Seconds between writes of this process's file
+            buckets (tuple): Upper bounds of the histogram buckets in seconds
+        """
+        self.metrics_dir = metrics_dir
+        self.flush_interval = flush_interval
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_flush = time.monotonic()
+        self._path = os.path.join(metrics_dir, f"metrics-{os.getpid()}-{int(time.time() * 1000)}.json")
+        os.makedirs(metrics_dir, exist_ok=True)
+
+    def inc(self, name, amount=1, **labels):
+        """Add to a counter."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, seconds, **labels):
+        """Record a duration in a histogram."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # One count per bucket plus the overflow bucket, then the sum
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[bisect_left(self.buckets, seconds)] += 1
+            histogram[-1] += seconds
+        self._maybe_flush()
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time a block into a histogram."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    @contextmanager
+    def time(self, stage):
+        """Time a block as a stage of seo_stage_duration_seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - started)
+
+    def record_stage(self, stage, seconds):
+        """Record a stage duration, also for the Server-Timing header of the current request."""
+        self.observe("seo_stage_duration_seconds", seconds, stage=stage)
+        timings = getattr(self._local, "timings", None)
+        if timings is not None:
+            timings.append((stage, seconds))
+
+    def start_request(self):
+        """Start collecting the stage timings of the request handled on this thread."""
+        self._local.timings = []
+
+    def finish_request(self):
+        """
+        Stop collecting stage timings on this thread.
+
+        Returns:
+            list: (stage, seconds) tuples recorded since start_request
+        """
+        timings = getattr(self._local, "timings", None) or []
+        self._local.timings = None
+        return timings
+
+    def _snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, list(labels), list(values)] for (name, labels), values in self._histograms.items()],
+                "buckets": list(self.buckets)
+            }
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write this process's totals to its file."""
+        self._last_flush = time.monotonic()
+        temp_path = f"{self._path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(self._snapshot(), f)
+            os.replace(temp_path, self._path)
+        except OSError as e:
+            logging.warning(f"Error writing metrics: {str(e)}")
+
+    def render(self, gauges=None):
+        """
+        Render the totals of every process in the Prometheus text format.
+
+        Args:
+            gauges (dict, optional): Current gauge values as {name: {labels tuple: value}}
+
+        Returns:
+            str: The exposition text
+        """
+        self.flush()
+        counters = {}
+        histograms = {}
+        for path in glob.glob(os.path.join(self.metrics_dir, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if tuple(snapshot.get("buckets", ())) != tuple(self.buckets):
+                continue
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot["histograms"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                total = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    total[i] += value
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+            elif kind == "gauge":
+                for labels, value in sorted((gauges or {}).get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            else:
+                for (metric, labels), values in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(list(self.buckets) + ["+Inf"], values[:-1]):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, [('le', str(bound))])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {values[-1]}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+def default_metrics_dir():
+    """The directory shared by the worker processes, from METRICS_DIR."""
+    return os.environ.get("METRICS_DIR", os.path.join(tempfile.gettempdir(), "seo_metrics"))
+
+def clear_metrics_dir(metrics_dir=None):
+    """
+    Delete the files left by the processes of a previous server run.
+
+    Call this once when the server (the gunicorn master) starts, before any
+    worker writes, so the totals start from zero instead of summing every
+    run since the directory was created.
+
+    Args:
+        metrics_dir (str, optional): Directory to clear, METRICS_DIR by default
+    """
+    for path in glob.glob(os.path.join(metrics_dir or default_metrics_dir(), "metrics-*.json*")):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logging.warning(f"Error removing metrics file {path}: {str(e)}")
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """
+    Get the process-wide metrics registry.
+
+    METRICS_DIR sets the directory shared by the worker processes.
+
+    Returns:
+        Metrics: The shared registry
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics(default_metrics_dir())
+    return _metrics
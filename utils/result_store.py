@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import uuid
+import zlib
+import sqlite3
+import logging
+import tempfile
+import threading
+
+def default_db_path():
+    """
+    Get the default location of the result store database.
+
+    Returns:
+        str: Path taken from RESULT_STORE_DB, or a file in the temp directory
+    """
+    return os.environ.get("RESULT_STORE_DB", os.path.join(tempfile.gettempdir(), "seo_results.sqlite3"))
+
+class ResultStore:
+    """
+    Server-side store of generated SEO results, keyed by a result ID.
+
+    Results are kept as zlib-compressed JSON in one SQLite file, so the
+    session cookie only carries the ID and results survive worker restarts.
+    Results older than max_age are purged as new ones are saved.
+    """
+
+    def __init__(self, db_path, max_age=30 * 24 * 3600):
+        """
+        Args:
+            db_path (str): Path of the SQLite database file
+            max_age (int): Seconds a result is kept
+        """
+        self.db_path = db_path
+        self.max_age = max_age
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                id TEXT PRIMARY KEY,
+                website_url TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                data BLOB NOT NULL,
+                export_job_id TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created_at)")
+
+    def _connect(self):
+        """Return the SQLite connection owned by the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, website_url, keyword, seo_data, export_job_id=None):
+        """
+        Store a generated result.
+
+        Args:
+            website_url (str): The website URL
+            keyword (str): The target keyword
+            seo_data (dict): The simplified SEO data
+            export_job_id (str, optional): The job exporting the result to Google Sheets
+
+        Returns:
+            str: The new result ID
+        """
+        result_id = uuid.uuid4().hex
+        now = time.time()
+        data = zlib.compress(json.dumps(seo_data).encode("utf-8"))
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO results (id, website_url, keyword, data, export_job_id, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (result_id, website_url, keyword, data, export_job_id, now)
+        )
+
+        purged = conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.max_age,)).rowcount
+        if purged:
+            logging.debug(f"Purged {purged} expired results")
+        return result_id
+
+    def get(self, result_id):
+        """
+        Load a stored result.
+
+        Args:
+            result_id (str): The result ID returned by save
+
+        Returns:
+            dict or None: id, website_url, keyword, seo_data, export_job_id and
+                          created_at, or None if the result is unknown or expired
+        """
+        row = self._connect().execute(
+            "SELECT * FROM results WHERE id = ? AND created_at >= ?", (result_id, time.time() - self.max_age)
+        ).fetchone()
+        if row is None:
+            return None
+
+        result = dict(row)
+        result["seo_data"] = json.loads(zlib.decompress(result.pop("data")))
+        return result
@@ -0,0 +1,388 @@
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import numpy as np
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = ("utm_", "gclid", "fbclid", "mc_cid", "mc_eid")
+
+def normalize_url(website_url):
+    """
+    Normalize a website URL so equivalent spellings map to the same cache entry.
+
+    Lowercases the scheme and host, adds a missing scheme, drops default ports,
+    fragments, tracking parameters and trailing slashes, and sorts the query.
+
+    Args:
+        website_url (str): The website URL as submitted
+
+    Returns:
+        str: The normalized URL
+    """
+    url = (website_url or "").strip()
+    if "://" not in url:
+        url = f"https://{url}"
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower().rstrip(".")
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+
+    path = parts.path.rstrip("/")
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+def normalize_keyword(keyword):
+    """
+    Normalize a keyword by case-folding it and collapsing whitespace and edge punctuation.
+
+    Args:
+        keyword (str): The keyword as submitted
+
+    Returns:
+        str: The normalized keyword
+    """
+    return " ".join((keyword or "").casefold().split()).strip(" .,;:!?\"'")
+
+def site_key(website_url):
+    """
+    Reduce a URL to the site it names, ignoring the scheme and a www. prefix.
+
+    Args:
+        website_url (str): The website URL as submitted
+
+    Returns:
+        str: Host and path of the normalized URL without www.
+    """
+    parts = urlsplit(normalize_url(website_url))
+    host = parts.netloc[4:] if parts.netloc.startswith("www.") else parts.netloc
+    return urlunsplit(("", host, parts.path, parts.query, "")).lstrip("/")
+
+def keyword_vector(keyword, dims=512, n=3):
+    """
+    Embed a keyword as a unit vector of hashed character n-gram counts.
+
+    Words are case-folded, stripped of punctuation, naively singularized and
+    sorted first, so "SEO tools" and "tool SEO" embed identically, while
+    typos and small edits still land close together.
+
+    Args:
+        keyword (str): The keyword as submitted
+        dims (int): Vector length
+        n (int): Characters per n-gram
+
+    Returns:
+        numpy.ndarray: float32 vector of length dims with unit norm
+    """
+    words = re.findall(r"\w+", (keyword or "").casefold())
+    words = [word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word for word in words]
+    text = f" {' '.join(sorted(words))} "
+
+    vector = np.zeros(dims, dtype=np.float32)
+    for i in range(len(text) - n + 1):
+        # crc32 rather than hash() so every worker process agrees on the buckets
+        vector[zlib.crc32(text[i:i + n].encode("utf-8")) % dims] += 1
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def cache_key(website_url, keyword, model, prompt_version, **options):
+    """
+    Build the content address of a generation.
+
+    Args:
+        website_url (str): The website URL
+        keyword (str): The target keyword
+        model (str): The model that produces the content
+        prompt_version (int): Version of the prompt template
+        **options: Any other inputs that change the generated content
+
+    Returns:
+        str: Hex SHA-256 digest identifying the generation
+    """
+    material = json.dumps({
+        "url": normalize_url(website_url),
+        "keyword": normalize_keyword(keyword),
+        "model": model,
+        "prompt_version": prompt_version,
+        "options": options
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class SeoCache:
+    """
+    Persistent, size-bounded cache of generated SEO data.
+
+    Entries live in one SQLite file so all gunicorn workers share them. Each
+    entry expires after the TTL, and when the cache holds more than
+    max_entries or max_bytes the least recently used entries are evicted.
+    Hit and miss counters are kept in the same file so they cover every worker.
+
+    Entries stored with a similarity group and keyword can also be found by
+    near-duplicate keywords: the keyword vectors of each group are kept as a
+    NumPy matrix per process, and a lookup is one matrix-vector product.
+    """
+
+    def __init__(self, db_path, ttl=7 * 24 * 3600, max_entries=1000, max_bytes=50 * 1024 * 1024, similarity=0.9):
+        """
+        Args:
+            db_path (str): Path of the SQLite database file
+            ttl (int): Seconds an entry stays valid, 0 disables the cache
+            max_entries (int): Maximum number of entries kept
+            max_bytes (int): Maximum total size of the stored (compressed) values
+            similarity (float): Least cosine similarity of keywords for a
+                near-duplicate hit, above 1 disables near-duplicate lookups
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.similarity = similarity
+        self._local = threading.local()
+        self._matrices = {}
+        self._matrices_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_last_accessed ON entries (last_accessed)")
+        conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS similar (
+                key TEXT PRIMARY KEY,
+                grp TEXT NOT NULL,
+                vector BLOB NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS similar_grp ON similar (grp)")
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _connect(self):
+        """Return the SQLite connection owned by the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, amount=1):
+        self._connect().execute(
+            "INSERT INTO stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    def get(self, key):
+        """
+        Look up a cached value.
+
+        Args:
+            key (str): The cache key from cache_key()
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+
+        conn.execute("UPDATE entries SET last_accessed = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return json.loads(zlib.decompress(row[0]))
+
+    def get_similar(self, group, keyword):
+        """
+        Look up the entry of the group whose keyword is most similar to this one.
+
+        Args:
+            group (str): Similarity group, entries are only compared within one
+            keyword (str): The keyword as submitted
+
+        Returns:
+            tuple or None: (value, similarity) of the nearest entry at or above
+                           the threshold, or None
+        """
+        if not self.enabled or self.similarity > 1:
+            return None
+
+        keys, matrix = self._group_matrix(group)
+        if not keys:
+            return None
+        scores = matrix @ keyword_vector(keyword)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity:
+            return None
+
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (keys[best], now)
+        ).fetchone()
+        if row is None:
+            return None
+
+        conn.execute("UPDATE entries SET last_accessed = ? WHERE key = ?", (now, keys[best]))
+        self._count("near_hits")
+        return json.loads(zlib.decompress(row[0])), float(scores[best])
+
+    def _group_matrix(self, group):
+        """Return the keys and stacked keyword vectors of a group, reloaded when the table changed."""
+        version = self._connect().execute("SELECT value FROM stats WHERE name = 'similar_version'").fetchone()
+        version = version[0] if version else 0
+        with self._matrices_lock:
+            cached = self._matrices.get(group)
+            if cached is not None and cached[0] == version:
+                return cached[1], cached[2]
+
+        rows = self._connect().execute("SELECT key, vector FROM similar WHERE grp = ?", (group,)).fetchall()
+        keys = [key for key, _ in rows]
+        matrix = np.stack([np.frombuffer(vector, dtype=np.float32) for _, vector in rows]) if rows else None
+        with self._matrices_lock:
+            self._matrices[group] = (version, keys, matrix)
+        return keys, matrix
+
+    def set(self, key, value, group=None, keyword=None):
+        """
+        Store a value and evict expired and least recently used entries.
+
+        Args:
+            key (str): The cache key from cache_key()
+            value: JSON-serializable value to store
+            group (str, optional): Similarity group the entry can be found in
+            keyword (str, optional): Keyword the entry can be found by within its group
+        """
+        if not self.enabled:
+            return
+
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, expires_at, last_accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now + self.ttl, now)
+            )
+            if group is not None and keyword is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO similar (key, grp, vector) VALUES (?, ?, ?)",
+                    (key, group, keyword_vector(keyword).tobytes())
+                )
+                self._count("similar_version")
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn, now):
+        expired = conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        evicted = 0
+        if count > self.max_entries or total > self.max_bytes:
+            # Walk from the least recently used entry until both limits hold
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_accessed"):
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                victims.append((key,))
+                count -= 1
+                total -= size
+            conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+            evicted = len(victims)
+
+        if expired or evicted:
+            self._count("evictions", expired + evicted)
+            conn.execute("DELETE FROM similar WHERE key NOT IN (SELECT key FROM entries)")
+            self._count("similar_version")
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        Returns:
+            dict: hits, misses, near_hits, evictions, hit_rate, entries and bytes
+        """
+        conn = self._connect()
+        counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        # Near-duplicate hits are served after an exact miss
+        near_hits = counters.get("near_hits", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "near_hits": near_hits,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": (hits + near_hits) / (hits + misses) if hits + misses else 0.0,
+            "entries": entries,
+            "bytes": total
+        }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_seo_cache():
+    """
+    Get the process-wide SEO cache configured from environment variables.
+
+    SEO_CACHE_DB sets the database file, SEO_CACHE_TTL the lifetime in seconds
+    (0 disables caching), SEO_CACHE_MAX_ENTRIES / SEO_CACHE_MAX_BYTES the size bounds,
+    and SEO_CACHE_SIMILARITY the keyword similarity of a near-duplicate hit.
+
+    Returns:
+        SeoCache or None: The cache, or None if it could not be opened
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = SeoCache(
+                        os.environ.get("SEO_CACHE_DB", os.path.join(tempfile.gettempdir(), "seo_cache.sqlite3")),
+                        ttl=int(os.environ.get("SEO_CACHE_TTL", 7 * 24 * 3600)),
+                        max_entries=int(os.environ.get("SEO_CACHE_MAX_ENTRIES", 1000)),
+                        max_bytes=int(os.environ.get("SEO_CACHE_MAX_BYTES", 50 * 1024 * 1024)),
+                        similarity=float(os.environ.get("SEO_CACHE_SIMILARITY", 0.9))
+                    )
+                except Exception as e:
+                    logging.error(f"Error opening SEO cache: {str(e)}")
+                    return None
+    return _cache
@@ -0,0 +1,203 @@
+import os
+import time
+import json
+import logging
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # No file locks on this platform, calls are only coalesced within a process
+    fcntl = None
+
+class _Call:
+    """One in-flight call that other threads with the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one.
+
+    Within a process, the first thread to call with a key runs the function
+    and every other thread with that key waits for its result. Across
+    processes (gunicorn workers) the running call holds an exclusive lock on
+    a per-key lock file. A worker that arrives meanwhile blocks on that lock,
+    then picks up the result the running call left next to it instead of
+    calling the function again.
+
+    Results are shared as JSON in a directory only this user can access; a
+    directory owned by someone else, or open to them, is not used and calls
+    are then only coalesced within a process.
+    """
+
+    def __init__(self, lock_dir, result_ttl=300):
+        """
+        Args:
+            lock_dir (str): Directory of the lock and result files
+            result_ttl (int): Seconds result files are kept for waiting workers
+        """
+        self.lock_dir = lock_dir
+        self.result_ttl = result_ttl
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._last_cleanup = 0
+        self._shared = fcntl is not None and self._private_dir(lock_dir)
+
+    @staticmethod
+    def _private_dir(path):
+        """Create the directory for this user only, and check an existing one is still theirs alone."""
+        try:
+            os.makedirs(path, mode=0o700, exist_ok=True)
+            info = os.lstat(path)
+        except OSError as e:
+            logging.warning(f"Error creating single-flight directory {path}: {str(e)}")
+            return False
+        if os.path.isdir(path) and not os.path.islink(path) and info.st_uid == os.getuid() and info.st_mode & 0o077:
+            # Created by an older version with the default mode; only we could write to it
+            try:
+                os.chmod(path, 0o700)
+                info = os.lstat(path)
+            except OSError:
+                pass
+        if not os.path.isdir(path) or os.path.islink(path) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+            logging.warning(f"Not sharing results across processes: {path} is not a directory private to this user")
+            return False
+        return True
+
+    def do(self, key, func):
+        """
+        Run func unless an identical call is already running, then share its result.
+
+        Args:
+            key (str): Identifies identical calls, used in file names
+            func (callable): Called without arguments; its result must be
+                JSON-serializable (a tuple result is returned as a tuple)
+
+        Returns:
+            tuple: (result, shared) where shared is True if the result came
+                   from a call made by another thread or process
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result, shared = self._do_across_processes(key, func)
+            return call.result, shared
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _do_across_processes(self, key, func):
+        if not self._shared:
+            return func(), False
+
+        lock_path = os.path.join(self.lock_dir, f"{key}.lock")
+        result_path = os.path.join(self.lock_dir, f"{key}.result")
+        started = time.time()
+        lock_file = self._acquire(lock_path)
+        try:
+            # A worker that held the lock while we waited left its result behind
+            try:
+                if os.path.getmtime(result_path) >= started:
+                    with open(result_path) as f:
+                        shared = json.load(f)
+                    # Error results are (type, message) tuples, which JSON turns into lists
+                    result = shared["result"]
+                    return (tuple(result) if shared["tuple"] else result), True
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+
+            result = func()
+            try:
+                temp_path = f"{result_path}.{os.getpid()}.tmp"
+                with open(temp_path, "w") as f:
+                    json.dump({"tuple": isinstance(result, tuple), "result": result}, f)
+                os.replace(temp_path, result_path)
+            except (OSError, TypeError, ValueError) as e:
+                logging.warning(f"Error sharing single-flight result: {str(e)}")
+            return result, False
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+            self._cleanup()
+
+    def _acquire(self, lock_path):
+        """Open and exclusively lock a lock file, blocking while another process holds it."""
+        while True:
+            lock_file = open(lock_path, "a+b")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # The file may have been removed by a cleanup while we waited for it
+            try:
+                if os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino:
+                    return lock_file
+            except FileNotFoundError:
+                pass
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def _cleanup(self):
+        """Remove result files past their TTL and the idle lock files beside them, at most once a minute."""
+        now = time.time()
+        if now - self._last_cleanup < 60:
+            return
+        self._last_cleanup = now
+
+        for name in os.listdir(self.lock_dir):
+            if not name.endswith(".lock"):
+                continue
+            lock_path = os.path.join(self.lock_dir, name)
+            result_path = lock_path[:-len(".lock")] + ".result"
+            try:
+                with open(lock_path, "a+b") as lock_file:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                    if os.path.exists(result_path) and now - os.path.getmtime(result_path) < self.result_ttl:
+                        continue
+                    for path in (result_path, lock_path):
+                        try:
+                            os.remove(path)
+                        except FileNotFoundError:
+                            pass
+            except OSError as e:
+                logging.debug(f"Error cleaning up single-flight files: {str(e)}")
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+def get_single_flight():
+    """
+    Get the process-wide single-flight coordinator.
+
+    SINGLE_FLIGHT_DIR sets the directory shared by the worker processes.
+
+    Returns:
+        SingleFlight: The shared coordinator
+    """
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight(
+                    os.environ.get("SINGLE_FLIGHT_DIR", os.path.join(tempfile.gettempdir(), "seo_single_flight"))
+                )
+    return _single_flight
@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import reprlib
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has, anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the records below a level.
+
+    Warnings and errors are always kept; debug and info records are kept with
+    probability rate, so a busy server can log a representative sample of them.
+    """
+
+    def __init__(self, rate=1.0, below=logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.below = below
+
+    def filter(self, record):
+        return record.levelno >= self.below or self.rate >= 1 or random.random() < self.rate
+
+class TruncatingFormatter(logging.Formatter):
+    """
+    Format records with every argument and the final message cut to a size limit.
+
+    Arguments are rendered with bounded reprs before they are interpolated, so
+    logging a large API response costs a few kilobytes instead of its full size.
+    """
+
+    def __init__(self, max_chars=2000, fmt="%(asctime)s %(levelname)s %(name)s %(message)s"):
+        super().__init__(fmt)
+        self.max_chars = max_chars
+        self._repr = reprlib.Repr()
+        self._repr.maxstring = max_chars
+        self._repr.maxother = max_chars
+        self._repr.maxlevel = 6
+        self._repr.maxdict = self._repr.maxlist = 20
+
+    def truncate(self, text):
+        if len(text) <= self.max_chars:
+            return text
+        return f"{text[:self.max_chars]}... ({len(text) - self.max_chars} more chars)"
+
+    def _bound(self, arg):
+        if isinstance(arg, (dict, list, tuple, set)):
+            return self._repr.repr(arg)
+        if isinstance(arg, str):
+            return self.truncate(arg)
+        return arg
+
+    def message(self, record):
+        """The interpolated, truncated message of a record."""
+        args = record.args
+        if isinstance(args, dict):
+            args = {key: self._bound(value) for key, value in args.items()}
+        elif args:
+            args = tuple(self._bound(arg) for arg in args)
+        message = str(record.msg)
+        if args:
+            try:
+                message = message % args
+            except (TypeError, ValueError):
+                message = f"{message} {args}"
+        return self.truncate(message)
+
+    def format(self, record):
+        record.message = self.message(record)
+        record.asctime = self.formatTime(record)
+        text = self.formatMessage(record)
+        if record.exc_info:
+            text = f"{text}\n{self.formatException(record.exc_info)}"
+        return text
+
+class JsonFormatter(TruncatingFormatter):
+    """Format records as one JSON object per line, with any extra= fields included."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": self.message(record),
+            "thread": record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = self._bound(value) if not isinstance(value, (int, float, bool, type(None))) else value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Hand records to the listener thread without formatting them first.
+
+    The standard QueueHandler formats the message in the calling thread; this
+    one leaves formatting (and writing) to the listener, so a request thread
+    only pays for appending the record to the queue. Arguments are therefore
+    formatted later and must not be mutated after they are logged.
+    """
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        if _listener is None:
+            _start_listener()
+        super().enqueue(record)
+
+_listener = None
+_listener_lock = threading.Lock()
+_queue_handler = None
+_stream_handler = None
+
+def _start_listener():
+    """Start the writer thread of this process, on the first record it logs."""
+    global _listener
+    with _listener_lock:
+        if _listener is None and _queue_handler is not None:
+            _listener = QueueListener(_queue_handler.queue, _stream_handler, respect_handler_level=True)
+            _listener.start()
+
+def configure_logging():
+    """
+    Set up the root logger from environment variables.
+
+    LOG_LEVEL sets the level (INFO by default), LOG_FORMAT picks "text" or
+    "json" lines, LOG_SAMPLE_RATE the fraction of debug and info records that
+    are kept, and LOG_MAX_CHARS the length messages and arguments are cut to.
+    Records are queued and formatted and written on a background thread,
+    started in each process when it first logs, so workers forked from a
+    preloaded app get their own. Calling this again replaces the earlier
+    configuration.
+    """
+    global _queue_handler, _stream_handler
+    max_chars = int(os.environ.get("LOG_MAX_CHARS", 2000))
+    if os.environ.get("LOG_FORMAT", "text").lower() == "json":
+        formatter = JsonFormatter(max_chars)
+    else:
+        formatter = TruncatingFormatter(max_chars)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter)
+
+    _stop_listener()
+    queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(SamplingFilter(float(os.environ.get("LOG_SAMPLE_RATE", 1.0))))
+    _queue_handler, _stream_handler = queue_handler, stream_handler
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+def _stop_listener():
+    # Write out whatever is still queued when the process exits
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _after_fork():
+    # The parent's writer thread does not exist in a forked child: drop it and
+    # whatever the parent still had queued, the next record starts a new one
+    global _listener, _listener_lock
+    _listener = None
+    _listener_lock = threading.Lock()
+    if _queue_handler is not None:
+        _queue_handler.queue = queue.SimpleQueue()
+
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -1,121 +1,551 @@
 import os
+import time
+import functools
 import requests
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from utils.json_stream import SEO_SECTIONS, extract_seo_json
+from utils.llm_providers import CircuitOpenError, CHARS_PER_TOKEN, get_model_router
+from utils.token_budget import SECTION_COUNT_FIELDS, PROMPT_TOKENS, normalize_budget, max_tokens_for, split_section
+from utils.seo_cache import get_seo_cache, cache_key, site_key
+from utils.single_flight import get_single_flight
+from utils.metrics import get_metrics
+from utils.crawler import get_crawler, site_digest
+from utils.audit import audit_page, audit_site, keyword_independent
 
-def generate_seo_content(website_url, keyword):
+# Bump whenever the prompt changes so cached generations from the old prompt are not reused
+PROMPT_VERSION = 3
+
+# How a generation is split into API requests: one prompt for everything, one
+# prompt per section, or one per section with every blog post requested separately
+GENERATION_MODES = ("single", "sectioned", "per_post")
+
+# Angles of the blog posts, used to keep posts requested separately from overlapping
+BLOG_POST_ANGLES = (
+    "an ultimate beginner's guide",
+    "a step-by-step how-to tutorial",
+    "a list of practical tips",
+    "a case study with lessons learned",
+    "a look at upcoming trends and predictions",
+    "a comparison of popular tools and approaches",
+    "a myth-busting article on common mistakes",
+    "an expert Q&A",
+    "a checklist for getting started",
+    "a deep dive into advanced techniques"
+)
+
+# Fields every item of a section must have, all of them non-empty strings
+SEO_ITEM_FIELDS = {
+    "blogs": ("title", "content"),
+    "backlinks": ("platform", "keyword", "strategy"),
+    "bookmarks": ("title", "description", "platform")
+}
+
+def seo_json_schema(sections=SEO_SECTIONS):
     """
-    Generate SEO content using Together AI API.
+    Build the JSON schema that constrains structured output to the given sections.
+    
+    Args:
+        sections (tuple): The sections the output must contain
+        
+    Returns:
+        dict: A JSON schema for the response_format of the API
+    """
+    return {
+        "type": "object",
+        "properties": {
+            section: {
+                "type": "array",
+                "minItems": 1,
+                "items": {
+                    "type": "object",
+                    "properties": {field: {"type": "string"} for field in SEO_ITEM_FIELDS[section]},
+                    "required": list(SEO_ITEM_FIELDS[section])
+                }
+            }
+            for section in sections
+        },
+        "required": list(sections)
+    }
+
+def validate_seo_item(section, item):
+    """
+    Check one generated item against the schema of its section.
+    
+    Args:
+        section (str): blogs, backlinks or bookmarks
+        item: The generated item
+        
+    Returns:
+        bool: True if the item has every field of its section as a non-empty string
+    """
+    if not isinstance(item, dict):
+        return False
+    return all(isinstance(item.get(field), str) and item[field].strip() for field in SEO_ITEM_FIELDS[section])
+
+def build_prompt(website_url, keyword, counts, budget, angles=None, digest=None):
+    """
+    Build the generation prompt for the whole pack or for some of its sections.
     
     Args:
         website_url (str): The website URL for SEO analysis
         keyword (str): The target keyword
+        counts (dict): Items to ask for per section (blogs, backlinks, bookmarks)
+        budget (dict): The normalized content budget, for the blog length
+        angles (list, optional): One angle per requested blog post
+        digest (str, optional): What a crawl found on the website, see utils.crawler.site_digest
         
     Returns:
-        dict: Structured SEO data with blogs, backlinks, and bookmarks
-        str: Error message if API key is missing or error occurs
+        str: The prompt
     """
-    try:
-        api_key = os.environ.get("TOGETHER_API_KEY")
-        if not api_key:
-            logging.error("TOGETHER_API_KEY not found in environment variables")
-            return "Missing API Key", "The TOGETHER_API_KEY is required but not found. Please add this secret to use the content generation feature."
-        
-        # Prepare the prompt for Together AI
-        prompt = f"""
+    intro = f"""
 You are an expert SEO assistant. A user has submitted:
 - Website URL: {website_url}
 - Target Keyword: {keyword}
-
+"""
+    if digest:
+        intro += f"""
+The website currently has these pages (path, title, meta description and headings).
+Tailor the content to what the site actually offers, and link to its existing pages where relevant:
+{digest}
+"""
+    words = budget["blog_words"]
+    if len(counts) == len(SEO_SECTIONS):
+        return intro + f"""
 Tasks:
-1. Generate 5–10 blog titles and full blog posts (300–500 words each).
-2. Suggest 5–10 backlink opportunities including:
+1. Generate {counts['blogs']} blog titles and full blog posts (about {words} words each).
+2. Suggest {counts['backlinks']} backlink opportunities including:
    - Keyword to use
    - High DA/PA websites/platforms
    - Strategy to acquire backlinks
-3. Generate 5–10 social bookmarking posts including:
+3. Generate {counts['bookmarks']} social bookmarking posts including:
    - Title with keyword
    - Short description (2–3 sentences)
    - Suggested bookmarking platforms (Reddit, Mix, Tumblr, etc.)
 Output should be structured in JSON with sections: blogs, backlinks, bookmarks.
 """
+    
+    section, count = next(iter(counts.items()))
+    if section == "blogs":
+        if count == 1 and angles:
+            task = f"Task: Write one blog post (about {words} words) about the keyword, written as {angles[0]}."
+        else:
+            task = f"Task: Generate {count} blog titles and full blog posts (about {words} words each)."
+            if angles:
+                task += f" Write them as {'; '.join(angles)}."
+        output = f'Output JSON of the form {{"blogs": [{{"title": "...", "content": "..."}}]}} with exactly {count} blog{"s" if count > 1 else ""}.'
+    elif section == "backlinks":
+        task = f"Task: Suggest {count} backlink opportunities, each with the keyword to use, a high DA/PA website or platform and a strategy to acquire the backlink."
+        output = 'Output JSON of the form {"backlinks": [{"platform": "...", "keyword": "...", "strategy": "..."}]}.'
+    else:
+        task = f"Task: Generate {count} social bookmarking posts, each with a title containing the keyword, a short description (2–3 sentences) and a suggested bookmarking platform (Reddit, Mix, Tumblr, etc.)."
+        output = 'Output JSON of the form {"bookmarks": [{"title": "...", "description": "...", "platform": "..."}]}.'
+    return f"{intro}\n{task}\n{output}\n"
+
+def build_generation_tasks(website_url, keyword, mode, budget, call_limit, digest=None):
+    """
+    Split a generation into the API requests of the given mode.
+    
+    Every request's max_tokens is sized from the items it asks for. A section
+    whose items would not fit into call_limit tokens is split across several
+    requests, and a single-mode pack that would not fit is split by section.
+    
+    Args:
+        website_url (str): The website URL for SEO analysis
+        keyword (str): The target keyword
+        mode (str): One of GENERATION_MODES
+        budget (dict): The normalized content budget
+        call_limit (int): Most tokens one request may generate
+        digest (str, optional): What a crawl found on the website
         
-        # API endpoint
-        url = "https://api.together.xyz/inference"
-        
-        # Request headers
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        # Request payload
-        payload = {
-            "model": "mistralai/Mixtral-8x7B-Instruct-v0.1",
-            "prompt": f"<s>[INST] {prompt} [/INST]",
-            "temperature": 0.7,
-            "max_tokens": 4096,
-            "top_p": 0.7
-        }
-        
-        # Make the API request
-        logging.debug("Sending request to Together AI API")
-        response = requests.post(url, headers=headers, json=payload)
-        
-        # Check if the request was successful
-        if response.status_code != 200:
-            logging.error(f"API request failed with status code {response.status_code}: {response.text}")
-            return "API Error", f"Together AI API request failed with status code {response.status_code}. Please check your API key and try again."
+    Returns:
+        list: (counts, prompt, max_tokens) tuples, where counts maps each
+              section taken from the request's output to the items it may add
+    """
+    counts = {section: budget[SECTION_COUNT_FIELDS[section]] for section in SEO_SECTIONS}
+    if mode == "single":
+        max_tokens = max_tokens_for(counts, budget)
+        if max_tokens <= call_limit:
+            return [(counts, build_prompt(website_url, keyword, counts, budget, digest=digest), max_tokens)]
+        logging.debug("Pack needs %d tokens, more than the %d of one request, splitting by section", max_tokens, call_limit)
+    
+    tasks = []
+    if mode == "per_post":
+        for i in range(counts["blogs"]):
+            angle = BLOG_POST_ANGLES[i % len(BLOG_POST_ANGLES)]
+            tasks.append(({"blogs": 1}, build_prompt(website_url, keyword, {"blogs": 1}, budget, [angle], digest), max_tokens_for({"blogs": 1}, budget)))
+    else:
+        tasks.extend(section_tasks(website_url, keyword, "blogs", budget, call_limit, digest))
+    tasks.extend(section_tasks(website_url, keyword, "backlinks", budget, call_limit, digest))
+    tasks.extend(section_tasks(website_url, keyword, "bookmarks", budget, call_limit, digest))
+    return tasks
+
+def section_tasks(website_url, keyword, section, budget, call_limit, digest=None):
+    """Build the requests for one whole section, see build_generation_tasks."""
+    parts = split_section(section, budget[SECTION_COUNT_FIELDS[section]], budget, call_limit)
+    tasks = []
+    first = 0
+    for count in parts:
+        angles = None
+        if section == "blogs" and len(parts) > 1:
+            # Give every part its own angles so the posts do not repeat each other
+            angles = [BLOG_POST_ANGLES[i % len(BLOG_POST_ANGLES)] for i in range(first, first + count)]
+        counts = {section: count}
+        tasks.append((counts, build_prompt(website_url, keyword, counts, budget, angles, digest), max_tokens_for(counts, budget)))
+        first += count
+    return tasks
+
+def crawl_website(website_url, keyword):
+    """
+    Crawl the website once for both the prompt digest and the on-page audit.
+    
+    Args:
+        website_url (str): The website URL for SEO analysis
+        keyword (str): The target keyword, counted on every page for the audit
         
-        # Extract the response
-        response_data = response.json()
-        logging.debug(f"API Response: {response_data}")
+    Returns:
+        list: Pages as parsed by utils.audit.audit_page, empty if crawling
+              is disabled or failed
+    """
+    crawler = get_crawler()
+    if crawler is None:
+        return []
+    try:
+        with get_metrics().time("crawl"):
+            pages = crawler.crawl_site(website_url, functools.partial(audit_page, keyword=keyword))
+    except Exception as e:
+        logging.warning(f"Error crawling {website_url}: {str(e)}")
+        return []
+    logging.debug("Crawled %d pages of %s", len(pages), website_url)
+    return pages
+
+def parse_generated_text(generated_text):
+    """
+    Turn generated text into SEO data.
+    
+    Args:
+        generated_text (str): The text generated by the model
         
-        # Different API versions might have different response structures
-        if 'output' in response_data:
-            generated_text = response_data.get('output', {}).get('text', '')
-        elif 'response' in response_data:
-            generated_text = response_data.get('response', '')
-        elif 'choices' in response_data and response_data['choices']:
-            generated_text = response_data['choices'][0].get('text', '')
+    Returns:
+        dict: The SEO data found in the text, not yet validated
+    """
+    seo_data = extract_seo_json(generated_text)
+    if seo_data is not None:
+        return seo_data
+    
+    # If no JSON is found, try to extract structured data from the text
+    logging.warning("No proper JSON found in the response, attempting to parse manually")
+    return parse_text_response(generated_text)
+
+def cached_seo_data(cache, key, group, keyword):
+    """
+    Look up a generation in the cache, falling back to a near-duplicate.
+
+    A near-duplicate is an entry for the same site and nearly the same
+    keyword; its keyword density findings were measured for the other
+    keyword and are dropped.
+
+    Returns:
+        dict or None: The cached SEO data, or None on a miss
+    """
+    metrics = get_metrics()
+    try:
+        cached = cache.get(key)
+        lookup = "hit"
+        if cached is None:
+            similar = cache.get_similar(group, keyword)
+            lookup = "miss"
+            if similar is not None:
+                cached, similarity = similar
+                lookup = "near_hit"
+                cached = dict(cached, audit=keyword_independent(cached.get("audit", [])))
+                logging.debug("Serving SEO content of a similar keyword from cache (similarity %.2f)", similarity)
+        metrics.inc("seo_cache_lookups_total", result=lookup)
+        return cached
+    except Exception as e:
+        logging.warning(f"Error reading SEO cache: {str(e)}")
+        return None
+
+def replay_items(seo_data, on_item):
+    """Report every item of a finished generation to the streaming callback."""
+    for section in SEO_SECTIONS:
+        for item in seo_data.get(section, []):
+            on_item(section, item)
+
+def run_generation_task(router, task, structured=False, on_item=None, streamed=None):
+    """
+    Send one generation request, failing over between models until one produces text.
+
+    A model that fails after some of its items were streamed is not failed
+    over from, as another model's items would repeat them.
+
+    Args:
+        router (ModelRouter): Offers the models to try, best first
+        task (tuple): (counts, prompt, max_tokens) as built by build_generation_tasks
+        structured (bool): Hold the model to the schema of the requested sections
+        on_item (callable, optional): Called with (section, item) as items are completed
+        streamed (set, optional): Sections whose items have reached the user,
+            updated as items are streamed; a request for any of them is not
+            streamed again
+
+    Returns:
+        str or tuple: The generated text, or (error_type, error_message) if
+                      every model failed
+    """
+    metrics = get_metrics()
+    counts, prompt, max_tokens = task
+    sections = tuple(counts)
+    schema = seo_json_schema(sections) if structured else None
+    streamed = streamed if streamed is not None else set()
+    published = []
+
+    def stream_item(section, item):
+        # Only items that pass the schema reach the user
+        if not structured or validate_seo_item(section, item):
+            published.append(section)
+            streamed.add(section)
+            on_item(section, item)
+
+    callback = stream_item if on_item is not None and not streamed.intersection(sections) else None
+    result = None
+    for provider in router.candidates(sections):
+        started = time.monotonic()
+        try:
+            result = provider.complete(prompt, max_tokens, callback, sections, schema)
+        except CircuitOpenError:
+            logging.warning(f"{provider.name} circuit breaker is open")
+            metrics.inc("seo_llm_failovers_total", provider=provider.name)
+            continue
+        except requests.RequestException as e:
+            logging.error(f"{provider.name} request failed after retries: {str(e)}")
+            router.record(provider.name, time.monotonic() - started, 0, False)
+            result = "API Error", f"{provider.name} API request failed: {str(e)}"
         else:
-            generated_text = ''
-            
-        if not generated_text:
-            logging.error("No text generated from the API")
-            # Create some sample data for testing purposes
-            return create_sample_seo_data(website_url, keyword)
-        
-        # Extract the JSON part from the response
+            ok = isinstance(result, str) and bool(result)
+            router.record(provider.name, time.monotonic() - started, len(result) // CHARS_PER_TOKEN if ok else 0, ok)
+            if ok:
+                return result
+            logging.warning(f"{provider.name} produced no text")
+        if published:
+            logging.warning(f"{provider.name} failed mid-stream, not failing over")
+            return result
+        metrics.inc("seo_llm_failovers_total", provider=provider.name)
+    return result
+
+def run_generation_tasks(router, tasks, structured=False, on_item=None, streamed=None):
+    """
+    Send generation requests concurrently, see run_generation_task.
+
+    Returns:
+        list: The result of every task, in task order
+    """
+    run = functools.partial(run_generation_task, router, structured=structured, on_item=on_item, streamed=streamed)
+    if len(tasks) == 1:
+        return [run(tasks[0])]
+    # Every request waits on the network, so threads overlap them fully
+    logging.debug("Sending %d concurrent generation requests", len(tasks))
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        return list(executor.map(run, tasks))
+
+def merge_generated(seo_data, tasks, outputs, structured=False):
+    """
+    Add the items every request generated to one document.
+
+    Failed requests are skipped, and each section is cut to the count its
+    request asked for.
+
+    Args:
+        seo_data (dict): Lists of items per section, extended in place
+        tasks (list): The (counts, prompt, max_tokens) tuples that were sent
+        outputs (list): The result of every task
+        structured (bool): Keep only items that pass the schema
+    """
+    metrics = get_metrics()
+    for (counts, _, _), generated_text in zip(tasks, outputs):
+        if not generated_text or isinstance(generated_text, tuple):
+            continue
+        with metrics.time("json_extraction"):
+            part = parse_generated_text(generated_text)
+        if not isinstance(part, dict):
+            continue
+        for section, count in counts.items():
+            items = part.get(section)
+            if not isinstance(items, list):
+                continue
+            if structured:
+                items = [item for item in items if validate_seo_item(section, item)]
+            seo_data[section].extend(items[:count])
+
+def fill_missing_sections(seo_data, website_url, keyword):
+    """
+    Give the sections left without items sample items, keeping the others.
+
+    Returns:
+        list: The sections that were filled
+    """
+    missing = [section for section in SEO_SECTIONS if not seo_data[section]]
+    if missing:
+        logging.warning(f"Using sample items for sections without generated items: {', '.join(missing)}")
+        get_metrics().inc("seo_sample_fallbacks_total", reason="missing_section")
+        sample = create_sample_seo_data(website_url, keyword)
+        for section in missing:
+            seo_data[section] = sample[section]
+    return missing
+
+def generate_seo_data(website_url, keyword, router, mode, structured, budget, on_item=None, cache=None, key=None, group=None):
+    """
+    Crawl and audit the website and generate its SEO content, see generate_seo_content.
+
+    Sections whose request failed or left them without valid items are
+    requested again, and get sample items if they still have none.
+
+    Args:
+        website_url (str): The website URL for SEO analysis
+        keyword (str): The target keyword
+        router (ModelRouter): Offers the models to try
+        mode (str): One of GENERATION_MODES
+        structured (bool): Use structured output
+        budget (dict): The normalized content budget
+        on_item (callable, optional): Called with (section, item) as items are completed
+        cache (SeoCache, optional): Where complete generations are stored
+        key (str, optional): Cache key of the generation
+        group (str, optional): Cache group of the site, for near-duplicate lookups
+
+    Returns:
+        dict or tuple: The SEO data with the audit findings, or
+                       (error_type, error_message) if every request failed
+    """
+    metrics = get_metrics()
+    pages = crawl_website(website_url, keyword)
+    digest = site_digest(pages, int(os.environ.get("CRAWL_DIGEST_CHARS", 4000)))
+    with metrics.time("audit"):
+        audit = audit_site(pages, keyword)
+    # The site digest makes every prompt longer, leaving less room to generate
+    call_limit = router.call_limit(PROMPT_TOKENS + len(digest) // CHARS_PER_TOKEN)
+    with metrics.time("prompt_build"):
+        tasks = build_generation_tasks(website_url, keyword, mode, budget, call_limit, digest)
+
+    # Sections whose items have reached the user; requests for them again are not streamed
+    streamed = set()
+    logging.debug("Generating in %s mode with %d requests", mode, len(tasks))
+    outputs = run_generation_tasks(router, tasks, structured, on_item, streamed)
+
+    if not streamed and not any(isinstance(generated_text, str) and generated_text for generated_text in outputs):
+        # Only when every request failed before showing anything is the generation an error
+        for generated_text in outputs:
+            if isinstance(generated_text, tuple):
+                return generated_text
+        logging.error("No text generated from the API")
+        metrics.inc("seo_sample_fallbacks_total", reason="no_output")
+        return dict(create_sample_seo_data(website_url, keyword), audit=audit)
+
+    seo_data = {section: [] for section in SEO_SECTIONS}
+    merge_generated(seo_data, tasks, outputs, structured)
+
+    for _ in range(int(os.environ.get("TOGETHER_SECTION_RETRIES", 1))):
+        missing = [section for section in SEO_SECTIONS if not seo_data[section]]
+        if not missing:
+            break
+        logging.warning(f"Re-requesting sections without valid items: {', '.join(missing)}")
+        retry_tasks = [task for section in missing for task in section_tasks(website_url, keyword, section, budget, call_limit, digest)]
+        merge_generated(seo_data, retry_tasks, run_generation_tasks(router, retry_tasks, structured, on_item, streamed), structured)
+    missing = fill_missing_sections(seo_data, website_url, keyword)
+
+    valid = validate_seo_data(seo_data)
+    if not valid:
+        logging.warning("Invalid SEO data structure, attempting to fix")
+        metrics.inc("seo_sample_fallbacks_total", reason="invalid_structure")
+        with metrics.time("fix_seo_data_structure"):
+            seo_data = fix_seo_data_structure(seo_data)
+    # The audit is cached with the content, so a cache hit needs no crawl
+    seo_data["audit"] = audit
+    if valid and not missing and cache:
+        # Only complete generations are cached, never sample- or placeholder-filled ones
         try:
-            # First, try to find JSON in the response using string manipulation
-            json_start = generated_text.find('{')
-            json_end = generated_text.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_str = generated_text[json_start:json_end]
-                seo_data = json.loads(json_str)
-            else:
-                # If no proper JSON format is found, try to extract structured data from the text
-                logging.warning("No proper JSON found in the response, attempting to parse manually")
-                seo_data = parse_text_response(generated_text)
-                
-            # Validate the structure of the data
-            if not validate_seo_data(seo_data):
-                logging.warning("Invalid SEO data structure, attempting to fix")
-                seo_data = fix_seo_data_structure(seo_data)
-                
-            return seo_data
-            
-        except json.JSONDecodeError as e:
-            logging.error(f"Error parsing JSON from API response: {str(e)}")
-            # Try to parse the text response manually
-            return parse_text_response(generated_text)
-        
+            cache.set(key, seo_data, group=group, keyword=keyword)
+        except Exception as e:
+            logging.warning(f"Error caching SEO content: {str(e)}")
+    return seo_data
+
+def generate_seo_content(website_url, keyword, on_item=None, mode=None, structured=None, budget=None, fresh=False):
+    """
+    Generate SEO content using Together AI API.
+
+    In the sectioned and per_post modes the blogs, backlinks and bookmarks are
+    requested with separate, smaller prompts that run concurrently, so the
+    generation takes as long as the slowest request instead of one long decode.
+
+    Identical generations that run at the same time, in any thread or
+    gunicorn worker, are made once and their result is shared.
+
+    Before a generation the website is crawled (from the page cache where
+    possible) and a digest of its titles, headings, meta descriptions and
+    internal links is added to every prompt. The same pages are audited
+    locally, and the findings are returned and cached under "audit".
+
+    Each request goes to the best model the router offers for its sections
+    and fails over to the next one when a model errors out, unless it had
+    already streamed items.
+
+    With structured output the model is held to JSON matching the schema of
+    the requested sections and every item is validated against that schema.
+
+    Args:
+        website_url (str): The website URL for SEO analysis
+        keyword (str): The target keyword
+        on_item (callable, optional): When given, the completion is streamed and
+            this is called with (section, item) as each blog, backlink or
+            bookmark is completed
+        mode (str, optional): One of GENERATION_MODES, defaults to the
+            TOGETHER_GENERATION_MODE environment variable or "single"
+        structured (bool, optional): Use structured output, defaults to the
+            TOGETHER_STRUCTURED_OUTPUT environment variable or off
+        budget (dict, optional): Items per section and blog length, see
+            utils.token_budget; sizes the prompts and max_tokens of every request
+        fresh (bool): Skip the cache lookups and always generate new content
+
+    Returns:
+        dict: Structured SEO data with blogs, backlinks, bookmarks and the audit findings
+        str: Error message if API key is missing or error occurs
+    """
+    try:
+        mode = mode or os.environ.get("TOGETHER_GENERATION_MODE", "single")
+        if mode not in GENERATION_MODES:
+            logging.warning(f"Unknown generation mode {mode!r}, using single")
+            mode = "single"
+        if structured is None:
+            structured = os.environ.get("TOGETHER_STRUCTURED_OUTPUT", "0") != "0"
+        budget = normalize_budget(budget)
+
+        router = get_model_router()
+        if router is None:
+            return "Missing API Key", "The TOGETHER_API_KEY is required but not found. Please add this secret to use the content generation feature."
+
+        # Serve repeated submissions from the cache, and near-duplicates of
+        # them (same site, nearly the same keyword) from the most similar entry
+        cache = get_seo_cache()
+        key = cache_key(website_url, keyword, router.signature, PROMPT_VERSION, mode=mode, structured=structured, budget=budget)
+        group = cache_key(site_key(website_url), "", router.signature, PROMPT_VERSION, mode=mode, structured=structured, budget=budget)
+        cached = cached_seo_data(cache, key, group, keyword) if cache and not fresh else None
+        if cached is not None:
+            logging.debug("Serving SEO content from cache")
+            if on_item is not None:
+                replay_items(cached, on_item)
+            return cached
+
+        # Identical submissions arriving together share one generation, across threads and workers
+        generate = functools.partial(generate_seo_data, website_url, keyword, router, mode, structured, budget, on_item, cache, key, group)
+        result, shared = get_single_flight().do(key, generate)
+        if shared:
+            logging.debug("Sharing the result of an identical in-flight generation")
+            if on_item is not None and isinstance(result, dict):
+                replay_items(result, on_item)
+        return result
+
     except Exception as e:
         logging.error(f"Error in generate_seo_content: {str(e)}")
         return None
-        
+
 def parse_text_response(text):
     """
     Parse the response text to extract structured data if JSON parsing fails.
@@ -147,10 +577,11 @@ def parse_text_response(text):
         line = line.strip()
         if not line:
             continue
+        lower_line = line.lower()
             
         # Check if this line indicates a section
         for section, keywords in sections.items():
-            if any(keyword.lower() in line.lower() for keyword in keywords) and ":" in line:
+            if ":" in line and any(keyword in lower_line for keyword in keywords):
                 current_section = section
                 break
                 
@@ -161,7 +592,7 @@ def parse_text_response(text):
                     result["blogs"].append(current_item)
                     current_item = {}
                 current_item["title"] = line.split(":", 1)[1].strip()
-            elif "content" in line.lower() or ":" in line and "content" in line.lower().split(":", 1)[0]:
+            elif "content" in lower_line:
                 current_item["content"] = line.split(":", 1)[1].strip() if ":" in line else ""
             elif "title" in current_item and "content" in current_item:
                 current_item["content"] += " " + line
@@ -394,3 +825,82 @@ def fix_seo_data_structure(data):
                     bookmark["platform"] = "Unspecified Platform"
     
     return fixed_data
+
+def simplify_seo_data(seo_data, keyword):
+    """
+    Reduce the generated SEO data to the JSON-serializable fields the results page uses.
+    
+    Args:
+        seo_data (dict): The SEO data returned by generate_seo_content
+        keyword (str): The target keyword, used for placeholder backlinks
+        
+    Returns:
+        dict: SEO data with blogs, backlinks, and bookmarks
+    """
+    simplified_data = {"blogs": [], "backlinks": [], "bookmarks": []}
+    
+    # Process blogs
+    if isinstance(seo_data, dict) and "blogs" in seo_data and isinstance(seo_data["blogs"], list):
+        for blog in seo_data["blogs"]:
+            if not isinstance(blog, dict):
+                continue
+                
+            blog_item = {}
+            
+            # Get title
+            if "title" in blog:
+                blog_item["title"] = str(blog["title"])
+            else:
+                blog_item["title"] = f"Blog Post {len(simplified_data['blogs']) + 1}"
+            
+            # Get content from various possible fields
+            content = None
+            for field in ["content", "post", "blog_post"]:
+                if field in blog and blog[field]:
+                    content = str(blog[field])
+                    break
+            
+            blog_item["content"] = content or "No content available for this blog post."
+            simplified_data["blogs"].append(blog_item)
+    
+    # Process backlinks
+    if isinstance(seo_data, dict) and "backlinks" in seo_data and isinstance(seo_data["backlinks"], list):
+        for backlink in seo_data["backlinks"]:
+            if not isinstance(backlink, dict):
+                continue
+                
+            backlink_item = {}
+            
+            # Map common field names
+            backlink_item["platform"] = str(backlink.get("platform", backlink.get("website", "Unknown Platform")))
+            backlink_item["keyword"] = str(backlink.get("keyword", ""))
+            backlink_item["strategy"] = str(backlink.get("strategy", ""))
+            
+            simplified_data["backlinks"].append(backlink_item)
+    
+    # Process bookmarks
+    if isinstance(seo_data, dict) and "bookmarks" in seo_data and isinstance(seo_data["bookmarks"], list):
+        for bookmark in seo_data["bookmarks"]:
+            if not isinstance(bookmark, dict):
+                continue
+                
+            bookmark_item = {}
+            
+            # Map common field names
+            bookmark_item["title"] = str(bookmark.get("title", ""))
+            bookmark_item["description"] = str(bookmark.get("description", ""))
+            bookmark_item["platform"] = str(bookmark.get("platform", ""))
+            
+            simplified_data["bookmarks"].append(bookmark_item)
+    
+    # If we have empty sections, add at least one sample item
+    if not simplified_data["blogs"]:
+        simplified_data["blogs"] = [{"title": "Sample Blog Title", "content": "Sample blog content would appear here."}]
+        
+    if not simplified_data["backlinks"]:
+        simplified_data["backlinks"] = [{"platform": "Sample Platform", "keyword": keyword, "strategy": "Sample strategy for backlinks."}]
+        
+    if not simplified_data["bookmarks"]:
+        simplified_data["bookmarks"] = [{"title": "Sample Bookmark", "description": "Sample bookmark description.", "platform": "Sample Platform"}]
+    
+    return simplified_data
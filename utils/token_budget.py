@@ -0,0 +1,88 @@
+import math
+
+# Average tokens per English word in generated text
+TOKENS_PER_WORD = 1.35
+
+# Tokens of JSON syntax and field names per item, and of the enclosing object
+ITEM_OVERHEAD_TOKENS = 20
+DOCUMENT_OVERHEAD_TOKENS = 20
+
+# Words in the short fields of an item (blog title, backlink strategy, ...)
+ITEM_FIELD_WORDS = {"blogs": 12, "backlinks": 40, "bookmarks": 45}
+
+# Headroom over the estimate so a slightly long answer is not cut off
+SAFETY_MARGIN = 1.15
+
+# Tokens set aside for the prompt of each request
+PROMPT_TOKENS = 400
+
+# What a submission asks for when it sets no budget, and the accepted ranges
+DEFAULT_BUDGET = {"blog_count": 5, "blog_words": 350, "backlink_count": 5, "bookmark_count": 5}
+BUDGET_LIMITS = {
+    "blog_count": (1, 10),
+    "blog_words": (100, 1500),
+    "backlink_count": (1, 15),
+    "bookmark_count": (1, 15)
+}
+
+# Budget field holding the item count of each section
+SECTION_COUNT_FIELDS = {"blogs": "blog_count", "backlinks": "backlink_count", "bookmarks": "bookmark_count"}
+
+def normalize_budget(values=None):
+    """
+    Read a content budget from form or JSON values.
+
+    Args:
+        values (dict, optional): May hold blog_count, blog_words, backlink_count
+            and bookmark_count; missing or invalid ones get their default
+
+    Returns:
+        dict: Every budget field as an int clamped to BUDGET_LIMITS
+    """
+    budget = {}
+    for field, default in DEFAULT_BUDGET.items():
+        try:
+            value = int((values or {}).get(field) or default)
+        except (TypeError, ValueError):
+            value = default
+        low, high = BUDGET_LIMITS[field]
+        budget[field] = min(max(value, low), high)
+    return budget
+
+def item_tokens(section, budget):
+    """Estimate the generated tokens of one item of a section."""
+    words = ITEM_FIELD_WORDS[section]
+    if section == "blogs":
+        words += budget["blog_words"]
+    return math.ceil(words * TOKENS_PER_WORD) + ITEM_OVERHEAD_TOKENS
+
+def max_tokens_for(counts, budget):
+    """
+    Size max_tokens for a request.
+
+    Args:
+        counts (dict): Items requested per section
+        budget (dict): The normalized budget
+
+    Returns:
+        int: The estimated output tokens plus the safety margin
+    """
+    estimate = DOCUMENT_OVERHEAD_TOKENS + sum(count * item_tokens(section, budget) for section, count in counts.items())
+    return math.ceil(estimate * SAFETY_MARGIN)
+
+def split_section(section, count, budget, call_limit):
+    """
+    Split the items of one section into requests that each fit the output limit.
+
+    Args:
+        section (str): blogs, backlinks or bookmarks
+        count (int): Items wanted
+        budget (dict): The normalized budget
+        call_limit (int): Most tokens one request may generate
+
+    Returns:
+        list: Item counts per request, as even as possible
+    """
+    per_call = int((call_limit / SAFETY_MARGIN - DOCUMENT_OVERHEAD_TOKENS) // item_tokens(section, budget))
+    calls = math.ceil(count / max(1, per_call))
+    return [count // calls + (1 if i < count % calls else 0) for i in range(calls)]